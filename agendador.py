@@ -0,0 +1,254 @@
+import asyncio
+import heapq
+import itertools
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from eventos import CacheEventos, carregar_dataframe
+from historico_alertas import hash_evento
+from metricas import METRICAS
+from recorrencia import interpretar_regra, ocorrencias
+
+# --- CONFIGURAÇÕES DO AGENDADOR (MODO DAEMON) ---
+
+# Antecedências padrão dos lembretes, em minutos (1 dia e 1 hora antes do evento)
+ANTECEDENCIAS_PADRAO = [24 * 60, 60]
+# Intervalo (segundos) entre verificações de mudança na planilha
+INTERVALO_SYNC_PADRAO = 60
+# Lembretes atrasados até este limite ainda são enviados (ex.: daemon reiniciado)
+TOLERANCIA_ATRASO = timedelta(minutes=5)
+
+# Um lembrete na fila: quando disparar, de qual evento e com que antecedência
+Lembrete = namedtuple('Lembrete', ['disparo', 'ordem', 'id_evento', 'antecedencia', 'chave'])
+
+
+def antecedencias_configuradas(valor=None):
+    """Lê as antecedências (minutos, separadas por vírgula) de AGENDA_ANTECEDENCIAS."""
+    valor = valor if valor is not None else os.getenv("AGENDA_ANTECEDENCIAS", "")
+    minutos = sorted({int(parte) for parte in str(valor).split(',') if parte.strip()}, reverse=True)
+    return minutos or list(ANTECEDENCIAS_PADRAO)
+
+
+def descrever_antecedencia(minutos):
+    """1440 -> 'em 1 dia', 60 -> 'em 1 hora', 15 -> 'em 15 minutos', 0 -> 'AGORA'."""
+    if minutos <= 0:
+        return "AGORA"
+    for unidade, singular, plural in ((24 * 60, "dia", "dias"), (60, "hora", "horas")):
+        if minutos % unidade == 0:
+            quantidade = minutos // unidade
+            return f"em {quantidade} {singular if quantidade == 1 else plural}"
+    return f"em {minutos} minutos"
+
+
+def formatar_lembrete(evento, antecedencia):
+    """Mensagem (Markdown) de um lembrete individual."""
+    momento = evento['data_hora_ordenacao']
+    return (
+        f"⏰ *LEMBRETE* ({descrever_antecedencia(antecedencia)})\n"
+        f"  - **{evento['titulo']}**\n"
+        f"    _Data: {momento.strftime('%d/%m/%Y')} {evento['hora_evento']} | Local: {evento.get('local', 'N/A')}_\n"
+    )
+
+
+class AgendadorLembretes:
+    """Daemon asyncio: fila de prioridade (heap) de lembretes por evento.
+
+    Cada evento pendente gera um lembrete por antecedência configurada. O laço
+    dorme até o próximo disparo ou até a próxima verificação da planilha, o
+    que vier antes. A verificação usa store.ler_alteracoes: só os eventos
+    novos/alterados/removidos são reagendados.
+
+    Entradas obsoletas não são removidas do heap: cada evento guarda a sua
+    chave atual (data, hora, título, local, status) e um lembrete cuja chave
+    não confere mais é descartado ao sair da fila.
+
+    Séries recorrentes têm uma ocorrência por vez na fila: quando o último
+    lembrete dela sai, a próxima é gerada (sem expandir a série inteira).
+    """
+
+    def __init__(self, store, enviar, antecedencias=None, intervalo_sync=INTERVALO_SYNC_PADRAO,
+                 caminho_snapshot=None, historico=None, relogio=datetime.now):
+        self.store = store
+        # Corrotina que recebe o texto do lembrete (ex.: enviar_alerta)
+        self.enviar = enviar
+        self.antecedencias = antecedencias or list(ANTECEDENCIAS_PADRAO)
+        self.intervalo_sync = intervalo_sync
+        self.caminho_snapshot = caminho_snapshot
+        # HistoricoAlertas opcional: lembrete já entregue (mesmo conteúdo) não é reenviado após reinício
+        self.historico = historico
+        self.relogio = relogio
+        self.assinatura = None
+        self.enviados = 0
+        self._fila = []
+        self._ordem = itertools.count()
+        # id_evento -> (chave, dados do evento) dos eventos agendados
+        self._eventos = {}
+        # id_evento -> linha-mestre das séries recorrentes pendentes
+        self._series = {}
+        self._parar = asyncio.Event()
+
+    # --- MONTAGEM DA FILA ---
+
+    def _chave(self, evento):
+        return (evento['data_hora_ordenacao'], evento['titulo'], evento.get('local'), evento['status'])
+
+    def _proxima_ocorrencia(self, mestre, agora, depois=None):
+        """Primeira ocorrência da série cujo último lembrete ainda vale (e posterior a `depois`), ou None."""
+        a_partir = agora - TOLERANCIA_ATRASO + timedelta(minutes=min(self.antecedencias))
+        if depois is not None:
+            a_partir = max(a_partir, depois + timedelta(seconds=1))
+        for momento in ocorrencias(mestre['data_hora_ordenacao'], interpretar_regra(mestre['recorrencia']), a_partir):
+            momento = pd.Timestamp(momento)
+            return dict(mestre, data_evento=momento.normalize(), hora_evento=momento.strftime('%H:%M'),
+                        data_hora_ordenacao=momento)
+        return None
+
+    def _agendar(self, evento, agora, depois=None):
+        id_evento = str(evento['id_evento'])
+        if evento['status'] != 'Pendente':
+            self._eventos.pop(id_evento, None)
+            self._series.pop(id_evento, None)
+            return
+        if isinstance(evento.get('recorrencia'), str) and evento['recorrencia'].strip():
+            self._series[id_evento] = evento
+            evento = self._proxima_ocorrencia(evento, agora, depois)
+            if evento is None:
+                # Série encerrada (UNTIL/COUNT)
+                self._eventos.pop(id_evento, None)
+                return
+        else:
+            self._series.pop(id_evento, None)
+        chave = self._chave(evento)
+        self._eventos[id_evento] = (chave, evento)
+        momento = evento['data_hora_ordenacao'].to_pydatetime()
+        for antecedencia in self.antecedencias:
+            disparo = momento - timedelta(minutes=antecedencia)
+            if disparo >= agora - TOLERANCIA_ATRASO:
+                heapq.heappush(self._fila, Lembrete(disparo, next(self._ordem), id_evento, antecedencia, chave))
+
+    def reconstruir(self, df):
+        """Refaz a fila inteira a partir do DataFrame tipado (partida e recarga completa)."""
+        agora = self.relogio()
+        self._fila = []
+        self._eventos = {}
+        self._series = {}
+        if df is None or df.empty:
+            return
+        for evento in df.to_dict('records'):
+            self._agendar(evento, agora)
+
+    def aplicar_alteracoes(self, alteracoes):
+        """Reagenda só os eventos do delta; os removidos saem do mapa (e seus lembretes ficam obsoletos)."""
+        agora = self.relogio()
+        for id_evento in alteracoes.removidos:
+            self._eventos.pop(str(id_evento), None)
+            self._series.pop(str(id_evento), None)
+        if alteracoes.alterados:
+            carga = carregar_dataframe(alteracoes.alterados)
+            # Data/hora agora inválida: o evento deixa de ser lembrado
+            for registro in carga.rejeitados:
+                self._eventos.pop(str(registro.get('id_evento')), None)
+                self._series.pop(str(registro.get('id_evento')), None)
+            for evento in carga.df.to_dict('records'):
+                self._agendar(evento, agora)
+        self._compactar()
+
+    def _compactar(self):
+        # Com muitas entradas obsoletas, o heap é refeito só com as válidas
+        if len(self._fila) > 2 * len(self._eventos) * len(self.antecedencias) + 100:
+            self._fila = [item for item in self._fila if self._valido(item)]
+            heapq.heapify(self._fila)
+
+    def _valido(self, item):
+        atual = self._eventos.get(item.id_evento)
+        return atual is not None and atual[0] == item.chave
+
+    @property
+    def proximo_disparo(self):
+        while self._fila and not self._valido(self._fila[0]):
+            heapq.heappop(self._fila)
+        return self._fila[0].disparo if self._fila else None
+
+    # --- SINCRONIZAÇÃO ---
+
+    def carregar(self):
+        """Carga inicial: snapshot em disco (se houver) + delta da origem."""
+        cache = CacheEventos(caminho_snapshot=self.caminho_snapshot)
+        df = cache.sincronizar_agora(self.store)
+        self.assinatura = cache.assinatura
+        self.reconstruir(df)
+
+    def sincronizar(self):
+        """Verifica a planilha; retorna True se a fila mudou."""
+        with METRICAS.medir('agendador.sincronizar'):
+            alteracoes = self.store.ler_alteracoes(self.assinatura)
+            if alteracoes is None:
+                self.assinatura = self.store.assinatura()
+                self.reconstruir(carregar_dataframe(self.store.carregar_registros()).df)
+                return True
+            self.assinatura = alteracoes.assinatura
+            if not alteracoes.alterados and not alteracoes.removidos:
+                return False
+            self.aplicar_alteracoes(alteracoes)
+            return True
+
+    # --- LAÇO PRINCIPAL ---
+
+    async def disparar_vencidos(self):
+        """Envia todos os lembretes com horário já alcançado."""
+        agora = self.relogio()
+        while self.proximo_disparo is not None and self.proximo_disparo <= agora:
+            item = heapq.heappop(self._fila)
+            _, evento = self._eventos[item.id_evento]
+            if item.id_evento in self._series and item.antecedencia == min(self.antecedencias):
+                # Último lembrete desta ocorrência: a série passa para a seguinte
+                self._agendar(self._series[item.id_evento], agora, depois=evento['data_hora_ordenacao'].to_pydatetime())
+            reservados = []
+            if self.historico is not None:
+                reservados = self.historico.reservar(
+                    [(item.id_evento, f"lembrete_{item.antecedencia}", hash_evento(evento))]
+                )
+                if not reservados:
+                    continue
+            entregue = await self.enviar(formatar_lembrete(evento, item.antecedencia))
+            if reservados:
+                if entregue:
+                    self.historico.confirmar(reservados)
+                else:
+                    self.historico.liberar(reservados)
+            if entregue:
+                self.enviados += 1
+                METRICAS.contar('agendador.lembretes')
+
+    async def executar(self):
+        """Roda até parar(): dorme até o próximo lembrete ou a próxima verificação."""
+        await asyncio.to_thread(self.carregar)
+        print(f"🕰️ Agendador iniciado: {len(self._eventos)} evento(s) pendente(s), {len(self._fila)} lembrete(s) na fila.")
+        proximo_sync = self.relogio() + timedelta(seconds=self.intervalo_sync)
+
+        while not self._parar.is_set():
+            await self.disparar_vencidos()
+
+            agora = self.relogio()
+            if agora >= proximo_sync:
+                try:
+                    if await asyncio.to_thread(self.sincronizar):
+                        print(f"🔄 Agenda alterada: {len(self._eventos)} evento(s) pendente(s) agendado(s).")
+                except Exception as e:
+                    # Mantém a fila atual; nova tentativa na próxima verificação
+                    print(f"🚨 Erro ao sincronizar a agenda: {e}")
+                proximo_sync = agora + timedelta(seconds=self.intervalo_sync)
+                continue
+
+            alvo = min(filter(None, [self.proximo_disparo, proximo_sync]))
+            espera = max(0.0, (alvo - agora).total_seconds())
+            try:
+                await asyncio.wait_for(self._parar.wait(), timeout=espera)
+            except asyncio.TimeoutError:
+                pass
+
+    def parar(self):
+        self._parar.set()
@@ -0,0 +1,109 @@
+import itertools
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# --- CONFIGURAÇÕES DAS AGENDAS ---
+
+# Agenda padrão (implantação com uma única planilha)
+PLANILHA_ID_PADRAO = "1S54b0QtWYaCAgrDNpdQM7ZG5f_KbYXpDztK5TSOn2vU"
+ABA_PADRAO = "AGENDA"
+NOME_PADRAO = "AGENDA"
+
+# Leituras simultâneas (uma thread por agenda, até este limite)
+MAX_THREADS_CARGA = 16
+# Clientes gspread autorizados reaproveitados entre as agendas
+TAMANHO_POOL_CLIENTES = 4
+
+# Uma agenda: planilha + aba + chats do Telegram que recebem o resumo (lista vazia = TELEGRAM_CHAT_ID)
+Agenda = namedtuple('Agenda', ['nome', 'planilha_id', 'aba', 'chats'])
+
+# Resultado da carga paralela de uma agenda (valor ou erro)
+ResultadoAgenda = namedtuple('ResultadoAgenda', ['agenda', 'valor', 'erro'])
+
+
+def _agenda(dados):
+    chats = dados.get('chats') or []
+    if isinstance(chats, str):
+        chats = [chat.strip() for chat in chats.split(',') if chat.strip()]
+    aba = dados.get('aba') or ABA_PADRAO
+    return Agenda(
+        nome=str(dados.get('nome') or aba),
+        planilha_id=dados.get('planilha_id') or PLANILHA_ID_PADRAO,
+        aba=aba,
+        chats=[str(chat) for chat in chats],
+    )
+
+
+def agendas_configuradas(config=None):
+    """Lista de Agenda: config['agendas'] > AGENDA_AGENDAS (JSON) > AGENDA_AGENDAS_PATH (arquivo JSON) > padrão.
+
+    Cada item: {"nome": ..., "planilha_id": ..., "aba": ..., "chats": ["123", ...]}.
+    """
+    config = config or {}
+    itens = config.get('agendas')
+    if not itens and os.getenv("AGENDA_AGENDAS"):
+        itens = json.loads(os.environ["AGENDA_AGENDAS"])
+    if not itens and os.getenv("AGENDA_AGENDAS_PATH"):
+        with open(os.environ["AGENDA_AGENDAS_PATH"], encoding='utf-8') as arquivo:
+            itens = json.load(arquivo)
+    if not itens:
+        return [Agenda(NOME_PADRAO, PLANILHA_ID_PADRAO, ABA_PADRAO, [])]
+
+    agendas = [_agenda(dict(item)) for item in itens]
+    nomes = [agenda.nome for agenda in agendas]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError(f"Nomes de agenda repetidos na configuração: {nomes}")
+    return agendas
+
+
+def caminho_por_agenda(caminho, agenda, agendas):
+    """Arquivo local (snapshot, SQLite) de cada agenda: com uma só agenda, o caminho original."""
+    if not caminho or caminho == ":memory:" or len(agendas) <= 1:
+        return caminho
+    base, extensao = os.path.splitext(caminho)
+    return f"{base}_{re.sub(r'[^0-9A-Za-z_-]+', '_', agenda.nome)}{extensao}"
+
+
+class PoolClientes:
+    """Clientes gspread autorizados, distribuídos em rodízio entre as planilhas.
+
+    Cada planilha fica presa ao cliente que a abriu; com várias agendas, as
+    leituras simultâneas se espalham por `tamanho` sessões HTTP em vez de
+    disputar uma só.
+    """
+
+    def __init__(self, criar_cliente, tamanho=TAMANHO_POOL_CLIENTES):
+        self.criar_cliente = criar_cliente
+        self.tamanho = tamanho
+        self._clientes = [None] * tamanho
+        self._rodizio = itertools.cycle(range(tamanho))
+        self._lock = threading.Lock()
+
+    def cliente(self):
+        with self._lock:
+            posicao = next(self._rodizio)
+            if self._clientes[posicao] is None:
+                self._clientes[posicao] = self.criar_cliente()
+            return self._clientes[posicao]
+
+
+def executar_por_agenda(funcao, agendas, max_threads=MAX_THREADS_CARGA):
+    """Aplica funcao(agenda) a todas as agendas em paralelo; retorna ResultadoAgenda na ordem recebida.
+
+    O tempo total fica próximo da agenda mais lenta, não da soma. Um erro em
+    uma agenda não interrompe as outras.
+    """
+    def executar(agenda):
+        try:
+            return ResultadoAgenda(agenda, funcao(agenda), None)
+        except Exception as e:
+            return ResultadoAgenda(agenda, None, e)
+
+    if len(agendas) <= 1:
+        return [executar(agenda) for agenda in agendas]
+    with ThreadPoolExecutor(max_workers=min(max_threads, len(agendas)), thread_name_prefix="carga-agenda") as pool:
+        return list(pool.map(executar, agendas))
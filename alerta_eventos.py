@@ -1,100 +1,282 @@
+import functools
 import os
+import sys
+from collections import namedtuple
 from datetime import datetime, timedelta
 
-# Importa as bibliotecas necessárias
-import gspread
-import pandas as pd
-from telegram import Bot
+from metricas import METRICAS, PerfilImportacoes, relatar_perfil
+
+# --profile: mede os imports a partir daqui (inclusive os tardios, feitos dentro das funções)
+PERFIL = PerfilImportacoes()
+if __name__ == "__main__" and "--profile" in sys.argv[1:]:
+    PERFIL.iniciar()
+
+# Importa as bibliotecas necessárias.
+# pandas (eventos, agendador, arquivamento), gspread e python-telegram-bot são importados só
+# quando usados: o modo enxuto (--enxuto) do cron não carrega nenhum dos três se não precisar.
 import asyncio
 
+from armazenamento import OPCOES_LEITURA_SHEETS, criar_store, criar_store_arquivo
+from agendas import (
+    ABA_PADRAO, NOME_PADRAO, PLANILHA_ID_PADRAO, Agenda, PoolClientes, agendas_configuradas,
+    caminho_por_agenda, executar_por_agenda
+)
+from cliente_sheets import ClienteSheets
+from entrega_telegram import chats_configurados, criar_entregador
+from historico_alertas import abrir_historico, hash_evento
+from registros import carregar_registros_leves, chave_evento, entre_leve
+from snapshot import caminho_snapshot, carregar_snapshot, modo_offline
+
 # --- CONFIGURAÇÃO E AUTENTICAÇÃO DO SISTEMA ---
 
 # 🛑 VARIÁVEIS DE AMBIENTE (SECRETS DO GITHUB)
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# TELEGRAM_CHAT_ID aceita vários chats separados por vírgula (ex.: a equipe inteira)
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
-# ID da Planilha no seu Google Drive
-PLANILHA_ID = "1S54b0QtWYaCAgrDNpdQM7ZG5f_KbYXpDztK5TSOn2vU"
-ABA_NOME = "AGENDA"
+# Agendas atendidas (planilha + aba + chats): AGENDA_AGENDAS / AGENDA_AGENDAS_PATH, ou a agenda padrão
+PLANILHA_ID = PLANILHA_ID_PADRAO
+ABA_NOME = ABA_PADRAO
 
 # --- CONSTANTE DE GOVERNANÇA (REQUISITO FINAL) ---
 # Alerta sempre 5 dias antes de qualquer evento (a partir de hoje)
 DIAS_DE_ALERTA = 5
 
+# Chaves do histórico de alertas: alerta de 5 dias por evento e estado geral da agenda
+TIPO_ALERTA = f"alerta_{DIAS_DE_ALERTA}_dias"
+TIPO_STATUS = "status"
+ID_STATUS_AGENDA = "__agenda__"
+
+# Uma mensagem pronta para uma agenda, com as reservas do histórico que ela fecha
+Envio = namedtuple('Envio', ['agenda', 'mensagem', 'reservados'])
+
 # --- FUNÇÕES CORE (Sem Alterações) ---
 
-def conectar_sheets():
-    """Conecta ao Google Sheets usando Secrets armazenadas no ambiente."""
-    try:
-        GSPREAD_CREDENTIALS_JSON = os.getenv("GSPREAD_CREDENTIALS_JSON")
-        
-        if not GSPREAD_CREDENTIALS_JSON:
-            print("🚨 ERRO: Credenciais do Google Sheets não encontradas. Verifique a Secret 'GSPREAD_CREDENTIALS_JSON'.")
-            return None
+def criar_cliente_gspread():
+    """Cliente gspread autorizado com as credenciais de GSPREAD_CREDENTIALS_JSON."""
+    GSPREAD_CREDENTIALS_JSON = os.getenv("GSPREAD_CREDENTIALS_JSON")
+    if not GSPREAD_CREDENTIALS_JSON:
+        raise RuntimeError("Credenciais do Google Sheets não encontradas. Verifique a Secret 'GSPREAD_CREDENTIALS_JSON'.")
+
+    import json
+    import gspread
+    return gspread.service_account_from_dict(json.loads(GSPREAD_CREDENTIALS_JSON))
+
+# Clientes autorizados compartilhados pelas agendas deste processo
+POOL_CLIENTES = PoolClientes(criar_cliente_gspread)
 
-        import json
-        creds_dict = json.loads(GSPREAD_CREDENTIALS_JSON)
-        gc = gspread.service_account_from_dict(creds_dict)
-        
-        spreadsheet = gc.open_by_key(PLANILHA_ID)
-        sheet = spreadsheet.worksheet(ABA_NOME)
-        print("✅ Conexão com Google Sheets estabelecida.")
-        return sheet
+def conectar_sheets(planilha_id=PLANILHA_ID):
+    """Conecta ao Google Sheets usando Secrets armazenadas no ambiente e retorna a planilha."""
+    try:
+        spreadsheet = ClienteSheets(POOL_CLIENTES.cliente()).abrir(planilha_id)
+        print(f"✅ Conexão com Google Sheets estabelecida ({planilha_id}).")
+        return spreadsheet
     
     except Exception as e:
         print(f"🚨 Erro fatal ao conectar ao Sheets: {e}")
         return None
 
-def carregar_eventos(sheet):
-    """Lê todos os registros e retorna como DataFrame."""
-    if sheet is None:
-         return pd.DataFrame()
+def conectar_store(agenda=None, agendas=None, arquivo=False):
+    """Cria o EventStore da agenda no motor de AGENDA_STORE (padrão: Google Sheets); `arquivo` abre a partição de arquivo."""
+    agenda = agenda or Agenda(NOME_PADRAO, PLANILHA_ID, ABA_NOME, [])
+    agendas = agendas or [agenda]
+    config = {}
+    if os.getenv("AGENDA_SQLITE_PATH"):
+        config['sqlite_path'] = caminho_por_agenda(os.environ["AGENDA_SQLITE_PATH"], agenda, agendas)
     try:
-        dados = sheet.get_all_records()
-        df = pd.DataFrame(dados)
-        # Garante que a coluna 'data_evento' seja um objeto datetime para filtros
-        if 'data_evento' in df.columns:
-            df['data_evento'] = pd.to_datetime(df['data_evento'], errors='coerce')
-        return df
+        return (criar_store_arquivo if arquivo else criar_store)(
+            config,
+            conectar_planilha=lambda: conectar_sheets(agenda.planilha_id),
+            aba=agenda.aba,
+            **OPCOES_LEITURA_SHEETS
+        )
     except Exception as e:
-        print(f"Erro ao carregar eventos: {e}")
-        return pd.DataFrame()
+        print(f"🚨 Erro fatal ao preparar o armazenamento: {e}")
+        return None
 
-async def enviar_alerta(mensagem):
-    """Envia a mensagem para o Telegram de forma assíncrona."""
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-        print("🚨 ERRO: Token ou Chat ID do Telegram não configurados.")
-        return
+def carregar_eventos(store, caminho=None):
+    """Lê os eventos (IndiceEventos), partindo do snapshot local e aplicando só o delta da origem."""
+    from eventos import CacheEventos, IndiceEventos
 
+    caminho = caminho or caminho_snapshot()
+    if store is None:
+        # Modo offline (ou origem inacessível): último snapshot local, se houver
+        snapshot = carregar_snapshot(caminho)
+        if snapshot is None:
+            return IndiceEventos()
+        print(f"📴 Usando o snapshot local salvo em {snapshot.salvo_em}.")
+        return IndiceEventos(snapshot.df)
     try:
-        bot = Bot(token=TELEGRAM_BOT_TOKEN)
-        await bot.send_message(
-            chat_id=TELEGRAM_CHAT_ID, 
-            text=mensagem, 
-            parse_mode='Markdown' # Usa Markdown para negrito, etc.
-        )
-        print("🎉 Alerta enviado com sucesso para o Telegram!")
+        # Mesma carga tipada do app: 'data_evento' vira datetime para os filtros
+        cache = CacheEventos(caminho_snapshot=caminho)
+        with METRICAS.medir('alerta.carregar_eventos') as info:
+            cache.sincronizar_agora(store)
+            info['linhas'] = len(cache.indice)
+        if cache.rejeitados:
+            print(f"⚠️ {len(cache.rejeitados)} linha(s) ignorada(s) por data/hora inválida.")
+        if cache.ultimo_sync is not None:
+            sync = cache.ultimo_sync
+            tipo = "completa" if sync.completa else "incremental"
+            print(f"🔄 Carga {tipo}: +{sync.inseridos} ~{sync.atualizados} -{sync.removidos}.")
+        return cache.indice
     except Exception as e:
-        print(f"🚨 Erro ao enviar mensagem para o Telegram: {e}")
+        print(f"Erro ao carregar eventos: {e}")
+        return carregar_eventos(None, caminho)
+
+def carregar_agenda(agenda, agendas):
+    """Conecta e carrega uma agenda; None se não há origem nem snapshot."""
+    caminho = caminho_por_agenda(caminho_snapshot(), agenda, agendas)
+    store = None if modo_offline() else conectar_store(agenda, agendas)
+    if store is None and carregar_snapshot(caminho) is None:
+        return None
+    return carregar_eventos(store, caminho)
+
+def janela_alerta(hoje, limite_alerta):
+    """[início, fim) da janela do alerta: de hoje 00:00 até o fim do dia limite."""
+    inicio = datetime.combine(hoje, datetime.min.time())
+    return inicio, inicio + timedelta(days=(limite_alerta - hoje).days + 1)
+
+def filtrar_alerta(indice, hoje, limite_alerta):
+    """Eventos pendentes com data entre hoje e o limite (inclusive), do mais próximo ao mais distante."""
+    # Busca binária no balde 'Pendente' (já ordenado por data/hora), sem máscaras nem ordenação
+    return indice.entre(*janela_alerta(hoje, limite_alerta))
+
+def filtrar_alerta_enxuto(eventos, hoje, limite_alerta):
+    """Mesmo filtro de filtrar_alerta sobre a lista de EventoLeve (modo enxuto, sem pandas)."""
+    return entre_leve(eventos, *janela_alerta(hoje, limite_alerta))
+
+async def enviar_alerta(mensagem, entregador=None, chats=None):
+    """Envia a mensagem aos chats (padrão: TELEGRAM_CHAT_ID). Retorna True se todos receberam.
+
+    Sem `entregador`, abre um (um Bot, uma sessão HTTP) só para este envio;
+    o modo daemon e os resumos de várias agendas passam um entregador compartilhado.
+    """
+    chats = chats or chats_configurados(TELEGRAM_CHAT_ID)
+    if not TELEGRAM_BOT_TOKEN or not chats:
+        print("🚨 ERRO: Token ou Chat ID do Telegram não configurados.")
+        return False
+
+    if entregador is None:
+        async with criar_entregador(TELEGRAM_BOT_TOKEN) as entregador:
+            return await enviar_alerta(mensagem, entregador, chats)
+
+    with METRICAS.medir('telegram.enviar_alerta') as info:
+        info['bytes'] = len(mensagem.encode('utf-8'))
+        # Usa Markdown para negrito, etc.; resumos longos são divididos no limite do Telegram
+        resultados = await entregador.enviar_para_todos(chats, mensagem, parse_mode='Markdown')
+
+    falhas = [chat for chat, entregue in resultados.items() if not entregue]
+    if falhas:
+        print(f"🚨 Erro ao enviar mensagem para o Telegram: {len(falhas)} de {len(chats)} chat(s) sem entrega.")
+        return False
+    print(f"🎉 Alerta enviado com sucesso para o Telegram ({len(chats)} chat(s))!")
+    return True
+
+async def entregar_envios(envios, historico):
+    """Envia as mensagens de todas as agendas em paralelo (um Bot) e fecha as reservas no histórico."""
+    if not TELEGRAM_BOT_TOKEN:
+        print("🚨 ERRO: Token ou Chat ID do Telegram não configurados.")
+        entregues = [False] * len(envios)
+    else:
+        try:
+            async with criar_entregador(TELEGRAM_BOT_TOKEN) as entregador:
+                entregues = await asyncio.gather(*(
+                    enviar_alerta(envio.mensagem, entregador, envio.agenda.chats or None) for envio in envios
+                ))
+        except Exception as e:
+            # Ex.: falha ao iniciar o Bot: nada foi entregue, as reservas voltam para a próxima execução
+            print(f"🚨 Erro ao conectar ao Telegram: {e}")
+            entregues = [False] * len(envios)
+    for envio, entregue in zip(envios, entregues):
+        if historico is not None and envio.reservados:
+            if entregue:
+                historico.confirmar(envio.reservados)
+            else:
+                historico.liberar(envio.reservados)
+    return entregues
+
+def preparar_status(agenda, historico, estado, mensagem):
+    """Mensagens de estado ('sem eventos', 'nada consta'): só quando o estado da agenda muda."""
+    reservados = []
+    if historico is not None:
+        reservados = historico.reservar([(f"{ID_STATUS_AGENDA}:{agenda.nome}", TIPO_STATUS, estado)])
+        if not reservados:
+            print(f"[{agenda.nome}] Estado '{estado}' já notificado; nada a enviar.")
+            return None
+    return Envio(agenda, mensagem, reservados)
 
 # --- LÓGICA DO AGENTE DE ALERTA (MODIFICADA) ---
 
-def main_alerta():
-    """Função principal que executa a lógica de alerta e notificação."""
-    print("Iniciando Agente de Alerta...")
-    
-    sheet = conectar_sheets()
-    if sheet is None:
-        return
+def preparar_sem_eventos(agenda, historico, varias_agendas=False):
+    """NOVO ALERTA 1: SEM REGISTRO DE EVENTOS (Planilha vazia)."""
+    print(f"[{agenda.nome}] Nenhum evento ou coluna de data encontrado na planilha.")
+    mensagem_vazia = "OLÁ! NÃO HÁ EVENTOS REGISTRADOS!"
+    if varias_agendas:
+        mensagem_vazia += f" ({agenda.nome})"
+    return preparar_status(agenda, historico, 'sem_eventos', mensagem_vazia)
 
-    df_eventos = carregar_eventos(sheet)
-    
-    # NOVO ALERTA 1: SEM REGISTRO DE EVENTOS (Planilha vazia)
+def montar_resumo(agenda, eventos, hoje, varias_agendas=False):
+    """Texto do resumo de 5 dias a partir dos eventos da janela (dicts, na ordem), igual nos dois modos."""
+    msg_alerta = f"🗓️ *ALERTA DE AGENDA ({DIAS_DE_ALERTA} DIAS)* 🗓️\n"
+
+    # Lista os 5 primeiros eventos mais próximos
+    for row in eventos[:5]:
+         data_formatada = row['data_evento'].strftime('%d/%m/%Y')
+
+         # 🛠️ CORREÇÃO DE BUG (Remove .dt)
+         dias_restantes = (row['data_evento'].date() - hoje).days
+
+         if dias_restantes == 0:
+             dias_info = "HOJE"
+         elif dias_restantes == 1:
+             dias_info = "AMANHÃ"
+         else:
+             dias_info = f"em {dias_restantes} dias"
+
+         msg_alerta += f"  - **{row['titulo']}** ({dias_info})\n    _Data: {data_formatada} | Local: {row.get('local', 'N/A')}_\n"
+
+    if len(eventos) > 5:
+         msg_alerta += f"  ... e mais {len(eventos) - 5} eventos pendentes em breve.\n"
+
+    titulo = "🤖 *Relatório da Sua Agenda Simplificada*"
+    if varias_agendas:
+        titulo += f" — {agenda.nome}"
+    return titulo + "\n\n" + msg_alerta
+
+def concluir_alerta(agenda, chaves, eventos, hoje, historico, varias_agendas=False):
+    """Envio com os eventos da janela (chaves do histórico + dicts) que ainda não foram alertados, ou None."""
+    # Só entram no alerta os eventos novos, alterados ou que acabaram de entrar na janela
+    reservados = []
+    if historico is not None and eventos:
+        reservados = historico.reservar(
+            [(chave, TIPO_ALERTA, hash_evento(reg)) for chave, reg in zip(chaves, eventos)]
+            + [(f"{ID_STATUS_AGENDA}:{agenda.nome}", TIPO_STATUS, 'com_alertas')]
+        )
+        ids_novos = {str(item[0]) for item in reservados}
+        eventos = [reg for chave, reg in zip(chaves, eventos) if chave in ids_novos]
+        if not eventos:
+            historico.liberar(reservados)
+            print(f"[{agenda.nome}] Todos os eventos da janela já foram alertados; nada novo a enviar.")
+            return None
+
+    # ALERTA ÚNICO: EVENTOS PENDENTES NOS PRÓXIMOS 5 DIAS
+    if eventos:
+        return Envio(agenda, montar_resumo(agenda, eventos, hoje, varias_agendas), reservados)
+
+    # NOVO ALERTA 2: SEM EVENTOS URGENTES
+    print(f"[{agenda.nome}] Nenhum evento pendente nos próximos {DIAS_DE_ALERTA} dias. Paz de espírito.")
+    mensagem_nada_consta = "OLÁ! NÃO HÁ EVENTOS URGENTES!"
+    if varias_agendas:
+        mensagem_nada_consta += f" ({agenda.nome})"
+    return preparar_status(agenda, historico, 'nada_consta', mensagem_nada_consta)
+
+def preparar_alerta(agenda, indice, historico, varias_agendas=False):
+    """Monta o resumo de uma agenda (Envio) ou None se não há nada novo a dizer."""
+    from eventos import chaves_ocorrencia
+
+    df_eventos = indice.df
     if df_eventos.empty or 'data_evento' not in df_eventos.columns:
-        print("Nenhum evento ou coluna de data encontrado na planilha.")
-        mensagem_vazia = "OLÁ! NÃO HÁ EVENTOS REGISTRADOS!"
-        asyncio.run(enviar_alerta(mensagem_vazia))
-        return
+        return preparar_sem_eventos(agenda, historico, varias_agendas)
 
     # 1. DEFINIÇÃO DO NOVO FILTRO DE ALERTA (5 DIAS)
     
@@ -102,51 +284,174 @@ def main_alerta():
     limite_alerta = hoje + timedelta(days=DIAS_DE_ALERTA)
     
     # Filtro: Status Pendente E data do evento de HOJE até o limite de 5 dias
-    df_alerta_5_dias = df_eventos[
-        (df_eventos['status'] == 'Pendente') &
-        (df_eventos['data_evento'].dt.date >= hoje) & 
-        (df_eventos['data_evento'].dt.date <= limite_alerta)
-    ].sort_values(by='data_evento', ascending=True)
+    df_alerta_5_dias = filtrar_alerta(indice, hoje, limite_alerta)
 
-    # --- CONSTRUÇÃO DA MENSAGEM ---
-    
-    mensagens = []
-    
-    # ALERTA ÚNICO: EVENTOS PENDENTES NOS PRÓXIMOS 5 DIAS
-    if not df_alerta_5_dias.empty:
-        msg_alerta = f"🗓️ *ALERTA DE AGENDA ({DIAS_DE_ALERTA} DIAS)* 🗓️\n"
-        
-        # Lista os 5 primeiros eventos mais próximos
-        for index, row in df_alerta_5_dias.head(5).iterrows():
-             data_formatada = row['data_evento'].strftime('%d/%m/%Y')
-             
-             # 🛠️ CORREÇÃO DE BUG (Remove .dt)
-             dias_restantes = (row['data_evento'].date() - hoje).days
-             
-             if dias_restantes == 0:
-                 dias_info = "HOJE"
-             elif dias_restantes == 1:
-                 dias_info = "AMANHÃ"
-             else:
-                 dias_info = f"em {dias_restantes} dias"
-
-             msg_alerta += f"  - **{row['titulo']}** ({dias_info})\n    _Data: {data_formatada} | Local: {row.get('local', 'N/A')}_\n"
-        
-        if len(df_alerta_5_dias) > 5:
-             msg_alerta += f"  ... e mais {len(df_alerta_5_dias) - 5} eventos pendentes em breve.\n"
-             
-        mensagens.append(msg_alerta)
-
-    # ALERTA FINAL: SE HOUVE MENSAGEM OU NADA CONSTA
-    if mensagens:
-        mensagem_final = "🤖 *Relatório da Sua Agenda Simplificada*\n\n" + "\n---\n".join(mensagens)
-        asyncio.run(enviar_alerta(mensagem_final))
-    else:
-        # NOVO ALERTA 2: SEM EVENTOS URGENTES
-        print(f"Nenhum evento pendente nos próximos {DIAS_DE_ALERTA} dias. Paz de espírito.")
-        mensagem_nada_consta = "OLÁ! NÃO HÁ EVENTOS URGENTES!"
-        asyncio.run(enviar_alerta(mensagem_nada_consta))
+    # Cada ocorrência de uma série recorrente tem o seu registro no histórico
+    chaves = chaves_ocorrencia(df_alerta_5_dias).tolist() if not df_alerta_5_dias.empty else []
+    return concluir_alerta(
+        agenda, chaves, df_alerta_5_dias.to_dict('records'), hoje, historico, varias_agendas
+    )
+
+def preparar_alerta_enxuto(agenda, registros, historico, varias_agendas=False):
+    """preparar_alerta sobre os registros brutos do store (get_all_records), sem pandas: mesma mensagem."""
+    carga = carregar_registros_leves(registros)
+    if carga.rejeitados:
+        print(f"⚠️ {len(carga.rejeitados)} linha(s) ignorada(s) por data/hora inválida.")
+    if not carga.eventos:
+        return preparar_sem_eventos(agenda, historico, varias_agendas)
+
+    hoje = datetime.now().date()
+    janela = filtrar_alerta_enxuto(carga.eventos, hoje, hoje + timedelta(days=DIAS_DE_ALERTA))
+    # Só os (poucos) eventos da janela viram dicts, para o hash do histórico e a mensagem
+    return concluir_alerta(
+        agenda, [chave_evento(evento) for evento in janela], [evento._asdict() for evento in janela],
+        hoje, historico, varias_agendas
+    )
+
+def main_alerta():
+    """Função principal que executa a lógica de alerta e notificação (todas as agendas configuradas)."""
+    print("Iniciando Agente de Alerta...")
+
+    agendas = agendas_configuradas()
+    # Leitura das agendas em paralelo: o tempo total fica perto da agenda mais lenta
+    cargas = executar_por_agenda(lambda agenda: carregar_agenda(agenda, agendas), agendas)
+
+    # Histórico local: cada evento é alertado uma vez por conteúdo (reenvio só se mudar)
+    historico = abrir_historico()
+    envios = []
+    for carga in cargas:
+        if carga.erro is not None:
+            print(f"🚨 [{carga.agenda.nome}] Erro ao carregar a agenda: {carga.erro}")
+            continue
+        if carga.valor is None:
+            continue
+        envio = preparar_alerta(carga.agenda, carga.valor, historico, varias_agendas=len(agendas) > 1)
+        if envio is not None:
+            envios.append(envio)
+
+    if envios:
+        asyncio.run(entregar_envios(envios, historico))
+
+def main_alerta_enxuto():
+    """main_alerta sem pandas: registros brutos do store, filtro e resumo sobre tuplas (mesmas mensagens).
+
+    Sem snapshot nem carga incremental (o snapshot em parquet exige pyarrow): cada execução lê a agenda
+    inteira da origem. Em modo offline, cai no main_alerta, que serve o snapshot local.
+    """
+    if modo_offline():
+        main_alerta()
+        return
+    print("Iniciando Agente de Alerta (modo enxuto)...")
+
+    agendas = agendas_configuradas()
+
+    def ler_registros(agenda):
+        store = conectar_store(agenda, agendas)
+        if store is None:
+            raise RuntimeError("armazenamento indisponível")
+        with METRICAS.medir('alerta.carregar_registros') as info:
+            registros = store.carregar_registros()
+            info['linhas'] = len(registros)
+        return registros
+
+    cargas = executar_por_agenda(ler_registros, agendas)
+
+    historico = abrir_historico()
+    envios = []
+    for carga in cargas:
+        if carga.erro is not None:
+            print(f"🚨 [{carga.agenda.nome}] Erro ao carregar a agenda: {carga.erro}")
+            continue
+        envio = preparar_alerta_enxuto(carga.agenda, carga.valor, historico, varias_agendas=len(agendas) > 1)
+        if envio is not None:
+            envios.append(envio)
+
+    if envios:
+        asyncio.run(entregar_envios(envios, historico))
+
+
+# --- MODO DAEMON (LEMBRETES POR EVENTO) ---
+
+def main_daemon():
+    """Processo contínuo: lembretes individuais nas antecedências de AGENDA_ANTECEDENCIAS, para todas as agendas."""
+    print("Iniciando Agente de Alerta (modo daemon)...")
+    from agendador import INTERVALO_SYNC_PADRAO, AgendadorLembretes, antecedencias_configuradas
+
+    if not TELEGRAM_BOT_TOKEN:
+        print("🚨 ERRO: Token do Telegram não configurado.")
+        return
+    agendas = agendas_configuradas()
+    conectadas = [
+        (resultado.agenda, resultado.valor)
+        for resultado in executar_por_agenda(lambda agenda: conectar_store(agenda, agendas), agendas)
+        if resultado.valor is not None
+    ]
+    if not conectadas:
+        return
+    historico = abrir_historico()
+    agendadores = []
+
+    async def executar():
+        # Um único Bot (e sessão HTTP) para os lembretes de todas as agendas
+        async with criar_entregador(TELEGRAM_BOT_TOKEN) as entregador:
+            for agenda, store in conectadas:
+                agendadores.append(AgendadorLembretes(
+                    store,
+                    functools.partial(enviar_alerta, entregador=entregador, chats=agenda.chats or None),
+                    antecedencias=antecedencias_configuradas(),
+                    intervalo_sync=int(os.getenv("AGENDA_INTERVALO_SYNC", INTERVALO_SYNC_PADRAO)),
+                    caminho_snapshot=caminho_por_agenda(caminho_snapshot(), agenda, agendas),
+                    historico=historico
+                ))
+            await asyncio.gather(*(agendador.executar() for agendador in agendadores))
+
+    try:
+        asyncio.run(executar())
+    except KeyboardInterrupt:
+        enviados = sum(agendador.enviados for agendador in agendadores)
+        print(f"Agendador encerrado ({enviados} lembrete(s) enviado(s)).")
+
+
+def main_arquivar():
+    """Move os eventos encerrados há mais de AGENDA_ARQUIVAR_APOS_DIAS dias para a aba de arquivo de cada agenda."""
+    print("Iniciando arquivamento de eventos encerrados...")
+    from arquivamento import arquivar_eventos, dias_para_arquivar
+
+    agendas = agendas_configuradas()
+    dias = dias_para_arquivar()
+
+    def arquivar(agenda):
+        store = conectar_store(agenda, agendas)
+        arquivo = conectar_store(agenda, agendas, arquivo=True)
+        if store is None or arquivo is None:
+            raise RuntimeError("armazenamento indisponível")
+        return arquivar_eventos(store, arquivo, dias)
+
+    for resultado in executar_por_agenda(arquivar, agendas):
+        if resultado.erro is not None:
+            print(f"🚨 Falha ao arquivar a agenda '{resultado.agenda.nome}': {resultado.erro}")
+            continue
+        print(
+            f"✅ Agenda '{resultado.agenda.nome}': {resultado.valor.movidos} evento(s) com mais de {dias} dia(s) arquivado(s), "
+            f"{len(resultado.valor.falhas)} falha(s)."
+        )
+        for id_evento, erro in resultado.valor.falhas:
+            print(f"   ⚠️ {id_evento}: {erro}")
 
 
 if __name__ == "__main__":
-    main_alerta()
+    try:
+        if "--arquivar" in sys.argv[1:]:
+            main_arquivar()
+        elif "--daemon" in sys.argv[1:]:
+            main_daemon()
+        elif "--enxuto" in sys.argv[1:]:
+            main_alerta_enxuto()
+        else:
+            main_alerta()
+    finally:
+        if PERFIL.iniciado_em is not None:
+            # --profile: tempo de import (inclusive os tardios), tempo total e pico de RSS
+            relatar_perfil(PERFIL)
+        # Resumo da instrumentação no log do job (e em JSON, se AGENDA_METRICAS_PATH estiver definido)
+        METRICAS.exportar(os.getenv("AGENDA_METRICAS_PATH"))
@@ -2,112 +2,190 @@ import streamlit as st
 import gspread
 import pandas as pd
 import uuid
+import json
 from datetime import date, time, datetime
 import time as t 
 
+from agendas import agendas_configuradas, caminho_por_agenda
+from armazenamento import COLUNAS, OPCOES_LEITURA_SHEETS, EventoNaoEncontrado, criar_store, criar_store_arquivo
+from arquivamento import arquivar_eventos, dias_para_arquivar
+from cliente_sheets import ClienteSheets
+from eventos import (
+    COLUNAS_TEXTO, CacheEventos, IndiceEventos, carregar_dataframe, chaves_ocorrencia, eh_ocorrencia, paginar
+)
+from fila_escrita import FilaEscrita
+from importacao import exportar_csv, exportar_ics, importar_eventos, ler_arquivo
+from metricas import METRICAS
+from recorrencia import montar_regra, pular_ocorrencia, regra_valida
+from snapshot import caminho_snapshot, modo_offline
+
 # --- CONFIGURAÇÕES DO PROJETO ---
-# ID da Planilha no seu Google Drive
-PLANILHA_ID = "1S54b0QtWYaCAgrDNpdQM7ZG5f_KbYXpDztK5TSOn2vU"
-ABA_NOME = "AGENDA"
+# Planilhas/abas: uma ou várias agendas em [agenda].agendas (padrão em agendas.py)
+
+# Status disponíveis para edição e filtro
+OPCOES_STATUS = ['Pendente', 'Concluído', 'Cancelado']
+
+# Repetição oferecida no formulário de novo evento (regras mais complexas: campo "Recorrência" na edição)
+OPCOES_REPETICAO = {'Não repete': None, 'Diariamente': 'DAILY', 'Semanalmente': 'WEEKLY', 'Mensalmente': 'MONTHLY'}
 
-# Ordem de prioridade para exibição: 1-Pendente, 2-Concluído, 3-Cancelado
-STATUS_PRIORITY_MAP = {
-    'Pendente': 1,
-    'Concluído': 2,
-    'Cancelado': 3
-}
+# Paginação da lista de eventos (o custo de cada rerun depende do tamanho da página)
+TAMANHOS_PAGINA = [10, 25, 50, 100]
 
 # =================================================================
 # === FUNÇÕES DE CONEXÃO E GOVERNANÇA ===
 # =================================================================
 
-# Conexão (Recurso Cacheado: Armazena o objeto de conexão Sheets por 1 hora)
+# Cliente (Recurso Cacheado: uma autenticação para todas as planilhas)
 @st.cache_resource(ttl=3600)
-def conectar_sheets_resource():
-    """Tenta conectar ao Google Sheets usando Streamlit Secrets com lógica de Retentativa."""
-    MAX_RETRIES = 3
-    
-    for attempt in range(MAX_RETRIES):
-        try:
-            gc = gspread.service_account_from_dict(st.secrets["gspread"])
-            spreadsheet = gc.open_by_key(PLANILHA_ID)
-            st.sidebar.success("✅ Conexão com Google Sheets estabelecida.")
-            return spreadsheet
-        
-        except Exception as e:
-            if attempt < MAX_RETRIES - 1:
-                wait_time = 2 ** attempt
-                st.sidebar.warning(f"⚠️ Falha de conexão momentânea (Tentativa {attempt + 1}/{MAX_RETRIES}). Retentando em {wait_time}s...")
-                t.sleep(wait_time) 
-            else:
-                st.error(f"🚨 Erro fatal ao conectar após {MAX_RETRIES} tentativas. Erro: {e}")
-                return None
-    return None
+def cliente_gspread_resource():
+    """Cliente gspread autorizado com as credenciais do Streamlit Secrets, com limitador de cota e novas tentativas."""
+    return ClienteSheets(gspread.service_account_from_dict(st.secrets["gspread"]))
+
+# Conexão (Recurso Cacheado: Armazena o objeto de conexão Sheets de cada planilha por 1 hora)
+@st.cache_resource(ttl=3600)
+def conectar_sheets_resource(planilha_id):
+    """Conecta ao Google Sheets; falhas temporárias (429/5xx) já são repetidas pelo ClienteSheets."""
+    try:
+        spreadsheet = cliente_gspread_resource().abrir(planilha_id)
+        st.sidebar.success("✅ Conexão com Google Sheets estabelecida.")
+        return spreadsheet
+    except Exception as e:
+        st.error(f"🚨 Erro fatal ao conectar ao Google Sheets. Erro: {e}")
+        return None
+
+def configuracao_store():
+    """Lê a seção [agenda] do Streamlit Secrets (store, sqlite_path, snapshot_path, offline, agendas...), se existir."""
+    try:
+        return dict(st.secrets.get("agenda", {}))
+    except Exception:
+        return {}
+
+def agendas_app():
+    """Agendas configuradas ([[agenda.agendas]] / AGENDA_AGENDAS); sem configuração, a planilha padrão."""
+    return agendas_configuradas(configuracao_store())
+
+def agenda_ativa():
+    """Agenda escolhida no seletor da sidebar (padrão: a primeira configurada)."""
+    agendas = agendas_app()
+    nome = st.session_state.get('agenda_ativa')
+    return next((agenda for agenda in agendas if agenda.nome == nome), agendas[0])
+
+def _agenda_por_nome(nome_agenda):
+    agendas = agendas_app()
+    return next(agenda for agenda in agendas if agenda.nome == nome_agenda), agendas
+
+def _configuracao_agenda(agenda, agendas):
+    # Com várias agendas, cada uma tem o seu arquivo SQLite
+    config = configuracao_store()
+    if config.get("sqlite_path"):
+        config["sqlite_path"] = caminho_por_agenda(config["sqlite_path"], agenda, agendas)
+    return config
+
+# Os recursos abaixo são cacheados por nome de agenda: trocar de agenda no
+# seletor reaproveita a conexão, o snapshot e a fila já abertos daquela agenda.
+
+# Armazenamento (Recurso Cacheado: Sheets por padrão, ou SQLite/memória via configuração)
+@st.cache_resource(ttl=3600)
+def conectar_store_resource(nome_agenda):
+    """Cria o EventStore configurado (AGENDA_STORE / [agenda].store) da agenda."""
+    agenda, agendas = _agenda_por_nome(nome_agenda)
+    return criar_store(
+        _configuracao_agenda(agenda, agendas),
+        conectar_planilha=lambda: conectar_sheets_resource(agenda.planilha_id),
+        aba=agenda.aba,
+        **OPCOES_LEITURA_SHEETS
+    )
+
+# Arquivo (Recurso Cacheado: aberto só quando o usuário consulta ou arquiva eventos encerrados)
+@st.cache_resource(ttl=3600)
+def conectar_arquivo_resource(nome_agenda):
+    """EventStore da partição de arquivo da agenda (aba <aba>_ARQUIVO / <banco>_arquivo.db)."""
+    agenda, agendas = _agenda_por_nome(nome_agenda)
+    return criar_store_arquivo(
+        _configuracao_agenda(agenda, agendas),
+        conectar_planilha=lambda: conectar_sheets_resource(agenda.planilha_id),
+        aba=agenda.aba,
+        **OPCOES_LEITURA_SHEETS
+    )
 
-# R (Read) - Lê todos os eventos com cache de 10 segundos
-@st.cache_data(ttl=10)
+# Cache Residente + Atualizador (Recurso Cacheado: um snapshot e uma thread de fundo por agenda, para todas as sessões)
+@st.cache_resource
+def cache_eventos_resource(nome_agenda):
+    """Snapshot residente, atualizado pelas escritas do app e por uma única thread de sincronização."""
+    agenda, agendas = _agenda_por_nome(nome_agenda)
+    return CacheEventos(caminho_snapshot=caminho_por_agenda(caminho_snapshot(configuracao_store()), agenda, agendas))
+
+# Fila de Escrita (Recurso Cacheado: agrupa as gravações em lote; política em [agenda].escrita)
+@st.cache_resource
+def fila_escrita_resource(_store, nome_agenda):
+    """Fila de escrita compartilhada da agenda; cada descarga atualiza o cache residente."""
+    config = configuracao_store()
+    return FilaEscrita(
+        _store,
+        politica=config.get("escrita", "demanda"),
+        intervalo=config.get("intervalo_escrita", 5),
+        ao_descarregar=lambda resultados: cache_eventos_resource(nome_agenda).aplicar_resultados(_store, resultados)
+    )
+
+# R (Read) - Serve o último snapshot na hora; a sincronização com a origem roda em segundo plano
 def carregar_eventos(force_reload=False): 
-    """Lê todos os registros (ignorando o cabeçalho) e retorna como DataFrame."""
+    """Lê todos os registros (ignorando o cabeçalho) e retorna o IndiceEventos (DataFrame já na ordem de exibição)."""
     
-    spreadsheet = conectar_sheets_resource() 
+    store = None if modo_offline(configuracao_store()) else conectar_store_resource(agenda_ativa().nome)
     
-    if spreadsheet is None:
-         return pd.DataFrame()
+    if store is None:
+         # Modo offline: somente o snapshot local, sem tocar na origem
+         return IndiceEventos(cache_eventos_resource(agenda_ativa().nome).obter_offline())
          
     # A exceção é lançada e capturada no bloco try/except principal para diagnóstico
-    sheet = spreadsheet.worksheet(ABA_NOME)
-    dados = sheet.get_all_records(
-         value_render_option='UNFORMATTED_VALUE', 
-         head=1 
-    )
-    df = pd.DataFrame(dados)
-    
-    # Correção e Padronização de Colunas para ordenação
-    if not df.empty and 'data_evento' in df.columns and 'hora_evento' in df.columns:
-        df['data_hora_ordenacao'] = pd.to_datetime(
-            df['data_evento'].astype(str) + ' ' + df['hora_evento'].astype(str),
-            errors='coerce'
-        )
-        df = df.dropna(subset=['data_hora_ordenacao']).copy()
-        df['Ordem_Status'] = df['status'].map(STATUS_PRIORITY_MAP).fillna(99) 
-    
-    return df
+    with METRICAS.medir('app.carregar_eventos') as info:
+        indice = cache_eventos_resource(agenda_ativa().nome).obter_indice(store, forcar=force_reload)
+        info['linhas'] = len(indice)
+    return indice
+
+# R (Read) - Arquivo: fora da carga padrão, lido só sob demanda
+@st.cache_data(ttl=600, show_spinner="Carregando o arquivo...")
+def carregar_arquivo(nome_agenda):
+    """Eventos arquivados da agenda como DataFrame (mais recentes primeiro)."""
+    arquivo = conectar_arquivo_resource(nome_agenda)
+    if arquivo is None:
+        return pd.DataFrame()
+    with METRICAS.medir('app.carregar_arquivo') as info:
+        df = carregar_dataframe(arquivo.carregar_registros()).df
+        info['linhas'] = len(df)
+    if df.empty:
+        return df
+    return df.sort_values('data_hora_ordenacao', ascending=False)
 
 # C (Create) - Adiciona um novo evento
-def adicionar_evento(spreadsheet, dados_do_form):
-    """Insere uma nova linha de evento no Sheets."""
+def adicionar_evento(store, dados_do_form):
+    """Insere uma nova linha de evento no armazenamento."""
+    if store is None:
+        st.error("📴 Modo offline: alterações desabilitadas.")
+        return False
     try:
-        sheet = spreadsheet.worksheet(ABA_NOME)
-        
-        colunas = ['id_evento', 'titulo', 'descricao', 'data_evento', 'hora_evento', 'local', 'status']
-        nova_linha = [dados_do_form.get(col) for col in colunas]
-        
-        sheet.append_row(nova_linha, value_input_option='USER_ENTERED')
-        st.success("🎉 Evento criado. **Recarregando dados...**")
-        carregar_eventos.clear() # LIMPA O CACHE
-        st.session_state['needs_reload'] = True # Força a recarga na próxima execução
+        registro = {col: dados_do_form.get(col) for col in COLUNAS}
+        store.adicionar(registro)
+        st.success("🎉 Evento criado.")
+        cache_eventos_resource(agenda_ativa().nome).aplicar(store, 'adicionar', registro) # ATUALIZA SÓ A LINHA NO CACHE
         return True
     except Exception as e:
         st.error(f"Erro ao adicionar evento: {e}")
         return False
 
 # U (Update) - Atualiza um evento existente
-def atualizar_evento(spreadsheet, id_evento, novos_dados):
+def atualizar_evento(store, id_evento, novos_dados):
     """Busca a linha pelo ID e atualiza os dados da linha."""
+    if store is None:
+        st.error("📴 Modo offline: alterações desabilitadas.")
+        return False
     try:
-        sheet = spreadsheet.worksheet(ABA_NOME)
-        cell = sheet.find(id_evento)
-        linha_index = cell.row 
-        
-        colunas = ['id_evento', 'titulo', 'descricao', 'data_evento', 'hora_evento', 'local', 'status']
-        valores_atualizados = [novos_dados.get(col) for col in colunas]
-
-        sheet.update(f'A{linha_index}', [valores_atualizados], value_input_option='USER_ENTERED')
-        st.success(f"🔄 Evento {id_evento[:8]}... atualizado. **Recarregando dados...**")
-        carregar_eventos.clear() # LIMPA O CACHE
-        st.session_state['needs_reload'] = True # Força a recarga na próxima execução
+        registro = {col: novos_dados.get(col) for col in COLUNAS}
+        store.atualizar(id_evento, registro)
+        st.success(f"🔄 Evento {id_evento[:8]}... atualizado.")
+        cache_eventos_resource(agenda_ativa().nome).aplicar(store, 'atualizar', registro, id_evento=id_evento) # ATUALIZA SÓ A LINHA NO CACHE
         return True
-    except gspread.exceptions.CellNotFound:
+    except EventoNaoEncontrado:
         st.error(f"🚫 ID de Evento '{id_evento[:8]}...' não encontrado.")
         return False
     except Exception as e:
@@ -115,25 +193,113 @@ def atualizar_evento(spreadsheet, id_evento, novos_dados):
         return False
 
 # D (Delete) - Remove um evento
-def deletar_evento(spreadsheet, id_evento):
+def deletar_evento(store, id_evento):
     """Busca a linha pelo ID e a deleta."""
+    if store is None:
+        st.error("📴 Modo offline: alterações desabilitadas.")
+        return False
     try:
-        sheet = spreadsheet.worksheet(ABA_NOME)
-        cell = sheet.find(id_evento)
-        linha_index = cell.row
-
-        sheet.delete_rows(linha_index)
-        st.success(f"🗑️ Evento {id_evento[:8]}... deletado. **Recarregando dados...**")
-        carregar_eventos.clear() # LIMPA O CACHE
-        st.session_state['needs_reload'] = True # Força a recarga na próxima execução
+        store.deletar(id_evento)
+        st.success(f"🗑️ Evento {id_evento[:8]}... deletado.")
+        cache_eventos_resource(agenda_ativa().nome).aplicar(store, 'deletar', id_evento=id_evento) # REMOVE SÓ A LINHA DO CACHE
         return True
-    except gspread.exceptions.CellNotFound:
+    except EventoNaoEncontrado:
         st.error(f"🚫 ID de Evento '{id_evento[:8]}...' não encontrado.")
         return False
     except Exception as e:
         st.error(f"🚫 Erro ao deletar o evento: {e}")
         return False
 
+# U (Série) - Pula uma ocorrência
+def pular_ocorrencia_evento(store, mestre, momento):
+    """Acrescenta o dia da ocorrência às exceções (EXDATE) da série; as demais ocorrências continuam."""
+    dados = {col: mestre.get(col) for col in COLUNAS}
+    dados['data_evento'] = mestre['data_hora_ordenacao'].strftime('%Y-%m-%d')
+    dados['recorrencia'] = pular_ocorrencia(mestre['recorrencia'], momento.date())
+    return atualizar_evento(store, mestre['id_evento'], dados)
+
+def textos_para_exibicao(dados):
+    """Cópia (DataFrame ou linha) com os textos vazios, que a carga tipada mantém como NaN, trocados por ''."""
+    return dados.fillna({col: '' for col in COLUNAS_TEXTO if col in dados.keys()})
+
+def regra_do_evento(linha):
+    """Regra de recorrência da linha ('' para eventos únicos)."""
+    regra = linha.get('recorrencia')
+    return regra.strip() if isinstance(regra, str) else ''
+
+# U/D (Lote) - Enfileira as edições coletadas na grade
+def enfileirar_edicoes_grade(fila, grade_original, grade_editada):
+    """Compara a grade editada com a original e enfileira só as linhas alteradas ou marcadas para exclusão.
+
+    Retorna (quantidade enfileirada, lista de erros de validação).
+    """
+    enfileiradas, erros = 0, []
+    colunas_editaveis = [col for col in grade_original.columns if col != 'excluir']
+
+    for id_evento, linha in grade_editada.iterrows():
+        if linha['excluir']:
+            fila.enfileirar('deletar', id_evento=id_evento)
+            enfileiradas += 1
+            continue
+
+        if linha[colunas_editaveis].equals(grade_original.loc[id_evento, colunas_editaveis]):
+            continue
+
+        try:
+            hora_evento = datetime.strptime(str(linha['hora']), '%H:%M').strftime('%H:%M')
+        except ValueError:
+            erros.append(f"Hora inválida ('{linha['hora']}') no evento {id_evento[:8]}... Use HH:MM.")
+            continue
+
+        if not linha['titulo'] or pd.isna(linha['data']):
+            erros.append(f"Título e Data são obrigatórios (evento {id_evento[:8]}...).")
+            continue
+
+        recorrencia = regra_do_evento(linha)
+        motivo = regra_valida(recorrencia) if recorrencia else None
+        if motivo is not None:
+            erros.append(f"Recorrência inválida no evento {id_evento[:8]}...: {motivo}")
+            continue
+
+        dados_atualizados = {
+            'id_evento': id_evento,
+            'titulo': linha['titulo'],
+            'descricao': linha['descricao'],
+            'data_evento': linha['data'].strftime('%Y-%m-%d'),
+            'hora_evento': hora_evento,
+            'local': linha['local'],
+            'status': linha['status'],
+            'recorrencia': recorrencia
+        }
+        fila.enfileirar('atualizar', id_evento=id_evento, registro={col: dados_atualizados.get(col) for col in COLUNAS})
+        enfileiradas += 1
+
+    return enfileiradas, erros
+
+def resumir_resultados_lote(resultados):
+    """Resumo por operação de uma gravação em lote (guardado para exibir após o rerun)."""
+    return {
+        'sucessos': sum(1 for res in resultados if res.sucesso),
+        'falhas': [
+            f"{res.operacao.acao} {str(res.operacao.id_evento)[:8]}...: {res.erro}"
+            for res in resultados if not res.sucesso
+        ]
+    }
+
+
+# --- CALLBACKS DE PAGINAÇÃO ---
+def mudar_pagina(delta):
+    st.session_state['pagina_agenda'] = max(1, st.session_state['pagina_agenda'] + delta)
+
+def voltar_primeira_pagina():
+    st.session_state['pagina_agenda'] = 1
+
+def trocar_agenda():
+    # Página e edição em andamento pertencem à agenda anterior
+    st.session_state['pagina_agenda'] = 1
+    st.session_state['id_edicao_ativa_agenda'] = None
+    st.session_state['mostrar_arquivo'] = False
+
 
 # =================================================================
 # === INTERFACE STREAMLIT (UI) ===
@@ -150,41 +316,55 @@ if 'id_edicao_ativa_agenda' not in st.session_state:
 if 'needs_reload' not in st.session_state:
     st.session_state['needs_reload'] = False
 
+if 'pagina_agenda' not in st.session_state:
+    st.session_state['pagina_agenda'] = 1
+
+
+# Seletor de agenda (só aparece com mais de uma agenda configurada)
+AGENDAS = agendas_app()
+if len(AGENDAS) > 1:
+    st.sidebar.selectbox(
+        "Agenda 🗂️", [agenda.nome for agenda in AGENDAS], key='agenda_ativa', on_change=trocar_agenda
+    )
+
 
 # Conexão (Necessário para o CRUD e para verificar o status antes de prosseguir)
-spreadsheet = conectar_sheets_resource()
-if spreadsheet is None:
-    st.stop() 
+# Sem conexão (ou modo offline explícito), o app segue somente leitura com o snapshot local
+store = None if modo_offline(configuracao_store()) else conectar_store_resource(agenda_ativa().nome)
+if store is None:
+    if cache_eventos_resource(agenda_ativa().nome).obter_offline() is None:
+        st.stop() 
+    st.warning("📴 Modo offline: exibindo o último snapshot local. Alterações desabilitadas.")
 
 
 # --- BLOCO DE DEBUG (TEMPORÁRIO) ---
 with st.sidebar:
     st.markdown("---")
     with st.expander("🛠️ Modo Debug da Leitura (Diagnóstico)", expanded=False):
-        try:
-            # Chama o Sheets diretamente, SEM CACHE, para ver o dado bruto
-            sheet_debug = spreadsheet.worksheet(ABA_NOME)
-            dados_brutos = sheet_debug.get_all_records(
-                 value_render_option='UNFORMATTED_VALUE', 
-                 head=1 
-            )
-            st.success("Dados brutos lidos (SEM CACHE):")
-            st.write(dados_brutos)
-            st.warning("Verifique se a lista acima está vazia ([]), ou se tem seus registros.")
-            
-        except Exception as e:
-            st.error("Falha ao tentar ler dados brutos.")
-            st.exception(e)
+        if store is None:
+            st.info("📴 Modo offline: a origem não está acessível.")
+        # Leitura extra na origem: só quando pedida (não consome cota da API a cada rerun)
+        elif st.button("Ler dados brutos agora 🔍", key='debug_leitura_bruta'):
+            try:
+                # Chama o armazenamento diretamente, SEM CACHE, para ver o dado bruto
+                dados_brutos = store.carregar_registros()
+                st.success("Dados brutos lidos (SEM CACHE):")
+                st.write(dados_brutos)
+                st.warning("Verifique se a lista acima está vazia ([]), ou se tem seus registros.")
+                
+            except Exception as e:
+                st.error("Falha ao tentar ler dados brutos.")
+                st.exception(e)
     st.markdown("---")
     
     # --- BLOCO DE REFRESH MANUAL (Governança e UX) ---
     if st.button("Forçar Atualização Manual 🔄", help="Limpa o cache e busca os dados mais recentes do Google Sheets."):
-        carregar_eventos.clear() 
+        cache_eventos_resource(agenda_ativa().nome).invalidar() 
         st.session_state['needs_reload'] = True # Força a recarga no rerun
         st.success("✅ Cache limpo! Recarregando dados...") 
         st.rerun() 
     st.markdown("---")
-    st.info("Atualização: Apenas ao salvar/deletar, ou use o botão manual. Sem refresh automático.")
+    st.info("Atualização: Suas alterações aparecem na hora; alterações externas são detectadas a cada 10s. Use o botão manual para forçar.")
 
 
 # Carregamento de Dados (Cacheado)
@@ -192,7 +372,8 @@ should_reload = st.session_state['needs_reload']
 
 # Tenta carregar os dados e captura o erro, se houver
 try:
-    df_eventos = carregar_eventos(force_reload=should_reload) 
+    indice_eventos = carregar_eventos(force_reload=should_reload) 
+    df_eventos = indice_eventos.df
 
     # Resetar o estado de recarga forçada após a leitura.
     if st.session_state['needs_reload']:
@@ -220,7 +401,8 @@ with st.form("form_novo_evento", clear_on_submit=True):
     with col2:
         hora = st.time_input("Hora:", time(9, 0)) 
         status_inicial = st.selectbox("Status Inicial:", ['Pendente', 'Rascunho']) 
-        st.markdown("---") 
+        repeticao = st.selectbox("Repetir:", list(OPCOES_REPETICAO))
+        repetir_ate = st.date_input("Repetir até (opcional):", value=None, format="DD/MM/YYYY")
     
     descricao = st.text_area("Descrição Detalhada:")
     
@@ -235,11 +417,13 @@ with st.form("form_novo_evento", clear_on_submit=True):
                 'data_evento': data.strftime('%Y-%m-%d'), 
                 'hora_evento': hora.strftime('%H:%M'),
                 'local': local,
-                'status': status_inicial if status_inicial != 'Rascunho' else 'Pendente' 
+                'status': status_inicial if status_inicial != 'Rascunho' else 'Pendente',
+                # Série: uma linha só, com a regra; as ocorrências são geradas na consulta
+                'recorrencia': montar_regra(OPCOES_REPETICAO[repeticao], ate=repetir_ate) if OPCOES_REPETICAO[repeticao] else ''
             }
             
             # Garante que o rerun só ocorre se a escrita foi bem-sucedida
-            sucesso = adicionar_evento(spreadsheet, dados_para_sheet)
+            sucesso = adicionar_evento(store, dados_para_sheet)
             
             if sucesso:
                 st.rerun() 
@@ -259,123 +443,403 @@ if df_eventos.empty:
     st.info("Sem eventos válidos para exibição.")
 else:
     
-    # 3. Ordem de Registro: 1 - PENDENTE, 2 - CONCLUIDO (Implementado no carregar_eventos)
-    df_display = df_eventos.copy().sort_values(
-        by=['Ordem_Status', 'data_hora_ordenacao'], 
-        ascending=[
-            True,  
-            True   
-        ]
+    # Pendentes com data/hora já passada: uma busca binária no balde 'Pendente'
+    total_atrasados = len(indice_eventos.atrasados())
+    if total_atrasados:
+        st.warning(f"⏰ {total_atrasados} evento(s) pendente(s) com data/hora já passada.")
+
+    # --- FILTROS E PAGINAÇÃO (aplicados ANTES da renderização) ---
+    col_f_status, col_f_periodo, col_f_tamanho, col_f_modo = st.columns([0.3, 0.3, 0.15, 0.25])
+    filtro_status = col_f_status.multiselect(
+        "Filtrar por Status", OPCOES_STATUS, key='filtro_status_agenda', on_change=voltar_primeira_pagina
     )
+    filtro_periodo = col_f_periodo.date_input(
+        "Filtrar por Período", value=(), format="DD/MM/YYYY", key='filtro_periodo_agenda', on_change=voltar_primeira_pagina
+    )
+    tamanho_pagina = col_f_tamanho.selectbox(
+        "Por página", TAMANHOS_PAGINA, index=1, key='tamanho_pagina_agenda', on_change=voltar_primeira_pagina
+    )
+    modo_exibicao = col_f_modo.radio(
+        "Modo de exibição", ["Lista", "Grade (edição em lote)"], horizontal=True, key='modo_exibicao_agenda'
+    )
+
+    inicio_periodo, fim_periodo = filtro_periodo if len(filtro_periodo) == 2 else (None, None)
+    # 3. Ordem de Registro: 1 - PENDENTE, 2 - CONCLUIDO (o índice já guarda os eventos nessa ordem; filtro por busca binária)
+    df_display = indice_eventos.filtrar(filtro_status, inicio_periodo, fim_periodo)
+
+    df_pagina, pagina, total_paginas = paginar(df_display, st.session_state['pagina_agenda'], tamanho_pagina)
+    # Lista, grade e formulários mostram '' para texto vazio (não 'nan' nem erro em len/fatias)
+    df_pagina = textos_para_exibicao(df_pagina)
+    st.session_state['pagina_agenda'] = pagina
+
+    col_anterior, col_info_pagina, col_proxima = st.columns([0.15, 0.7, 0.15])
+    col_anterior.button("◀ Anterior", key='pagina_anterior_agenda', on_click=mudar_pagina, args=(-1,), disabled=pagina <= 1)
+    col_info_pagina.caption(
+        f"Página {pagina} de {total_paginas} · {len(df_display)} evento(s) filtrado(s) de {len(df_eventos)}"
+    )
+    col_proxima.button("Próxima ▶", key='pagina_proxima_agenda', on_click=mudar_pagina, args=(1,), disabled=pagina >= total_paginas)
+
+    # Tempo de montagem da página (grade ou lista), exibido no painel de desempenho
+    inicio_render = t.perf_counter()
+
+    # MODO GRADE: edições coletadas no st.data_editor e gravadas de uma vez
+    if modo_exibicao == "Grade (edição em lote)":
+        # Cada série aparece uma vez, com a data/hora da linha-mestre (editar a linha edita a série)
+        df_grade = df_pagina[~df_pagina['id_evento'].duplicated().to_numpy()]
+        momentos = df_grade['data_hora_ordenacao']
+        ocorrencias_grade = eh_ocorrencia(df_grade)
+        if ocorrencias_grade.any():
+            inicios_series = indice_eventos.series.mestres.set_index('id_evento')['data_hora_ordenacao']
+            momentos = momentos.where(~ocorrencias_grade, df_grade['id_evento'].map(inicios_series))
+        grade_original = pd.DataFrame({
+            'titulo': df_grade['titulo'].astype(str),
+            'descricao': df_grade['descricao'].astype(str),
+            'data': momentos.dt.date,
+            'hora': momentos.dt.strftime('%H:%M'),
+            'local': df_grade['local'].astype(str),
+            'status': df_grade['status'],
+            'recorrencia': df_grade['recorrencia'].fillna('').astype(str) if 'recorrencia' in df_grade.columns else '',
+            'excluir': False
+        })
+        grade_original.index = df_grade['id_evento']
+
+        grade_editada = st.data_editor(
+            grade_original,
+            key=f'grade_agenda_{pagina}',
+            hide_index=True,
+            column_config={
+                'titulo': st.column_config.TextColumn("Título", required=True, max_chars=100),
+                'descricao': st.column_config.TextColumn("Descrição"),
+                'data': st.column_config.DateColumn("Data", format="DD/MM/YYYY", required=True),
+                'hora': st.column_config.TextColumn("Hora (HH:MM)", required=True),
+                'local': st.column_config.TextColumn("Local"),
+                'status': st.column_config.SelectboxColumn("Status", options=OPCOES_STATUS, required=True),
+                'recorrencia': st.column_config.TextColumn("Recorrência", help="Ex.: FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20261231"),
+                'excluir': st.column_config.CheckboxColumn("Excluir?")
+            }
+        )
+
+        # Resultado da última gravação da grade (sobrevive ao rerun)
+        resumo_lote = st.session_state.pop('resumo_lote_agenda', None)
+        if resumo_lote is not None:
+            if 'na_fila' in resumo_lote:
+                st.info(f"📝 {resumo_lote['na_fila']} alteração(ões) na fila; gravação automática em instantes.")
+            else:
+                st.success(f"💾 Grade gravada: {resumo_lote['sucessos']} operação(ões) com sucesso.")
+            for falha in resumo_lote['falhas']:
+                st.error(f"🚫 Falha: {falha}")
+
+        if st.button("💾 Salvar Alterações da Grade", key='salvar_grade_agenda', disabled=store is None):
+            fila = fila_escrita_resource(store, agenda_ativa().nome)
+            enfileiradas, erros = enfileirar_edicoes_grade(fila, grade_original, grade_editada)
+            if fila.politica == "demanda":
+                # Todas as alterações válidas da grade em um único lote
+                resumo_lote = resumir_resultados_lote(fila.descarregar())
+            else:
+                resumo_lote = {'na_fila': enfileiradas, 'sucessos': 0, 'falhas': []}
+            resumo_lote['falhas'] = erros + resumo_lote['falhas']
+            st.session_state['resumo_lote_agenda'] = resumo_lote
+            st.rerun()
+
+    # MODO LISTA: renderiza SOMENTE a página atual
+    else:
+        # Cabeçalhos
+        col_t, col_d, col_l, col_s, col_e, col_x = st.columns([0.25, 0.4, 0.15, 0.1, 0.05, 0.05])
+        col_t.markdown("**Título / Data**")
+        col_d.markdown("**Descrição**")
+        col_l.markdown("**Local**")
+        col_s.markdown("**Status**")
+        col_e.markdown(" ") 
+        col_x.markdown(" ") 
+        st.markdown("---")
     
-    # Cabeçalhos
-    col_t, col_d, col_l, col_s, col_e, col_x = st.columns([0.25, 0.4, 0.15, 0.1, 0.05, 0.05])
-    col_t.markdown("**Título / Data**")
-    col_d.markdown("**Descrição**")
-    col_l.markdown("**Local**")
-    col_s.markdown("**Status**")
-    col_e.markdown(" ") 
-    col_x.markdown(" ") 
-    st.markdown("---")
-    
-    # Loop sobre cada evento para exibição/edição inline
-    for index, row in df_display.iterrows():
+        # Ocorrências de uma série compartilham o id_evento: widgets e edição usam uma chave por linha
+        chaves_pagina = chaves_ocorrencia(df_pagina).tolist()
+        ocorrencias_pagina = eh_ocorrencia(df_pagina).tolist()
+
+        # Loop sobre cada evento para exibição/edição inline
+        for chave, eh_ocorrencia_linha, (index, row) in zip(chaves_pagina, ocorrencias_pagina, df_pagina.iterrows()):
         
-        id_evento = row['id_evento']
+            id_evento = row['id_evento']
+            regra_linha = regra_do_evento(row)
         
-        # 1. Se a linha NÃO está em modo de edição (EXIBIÇÃO NORMAL + BOTÕES)
-        if st.session_state.id_edicao_ativa_agenda != id_evento:
+            # 1. Se a linha NÃO está em modo de edição (EXIBIÇÃO NORMAL + BOTÕES)
+            if st.session_state.id_edicao_ativa_agenda != chave:
             
-            col_t, col_d, col_l, col_s, col_e, col_x = st.columns([0.25, 0.4, 0.15, 0.1, 0.05, 0.05])
+                col_t, col_d, col_l, col_s, col_e, col_x = st.columns([0.25, 0.4, 0.15, 0.1, 0.05, 0.05])
             
-            status_cor = "orange" if row['status'] == 'Pendente' else ("green" if row['status'] == 'Concluído' else "gray")
+                status_cor = "orange" if row['status'] == 'Pendente' else ("green" if row['status'] == 'Concluído' else "gray")
             
-            titulo_e_data = f"**{row['titulo']}**<br><small>{pd.to_datetime(row['data_evento']).strftime('%d/%m/%Y')} {row['hora_evento']}</small>"
+                marca_serie = " 🔁" if regra_linha else ""
+                titulo_e_data = f"**{row['titulo']}**{marca_serie}<br><small>{row['data_hora_ordenacao'].strftime('%d/%m/%Y')} {row['hora_evento']}</small>"
             
-            col_t.markdown(titulo_e_data, unsafe_allow_html=True)
-            col_d.write(row['descricao'][:100] + "..." if len(row['descricao']) > 100 else row['descricao'])
-            col_l.write(row['local'])
-            col_s.markdown(f"**<span style='color:{status_cor}'>{row['status']}</span>**", unsafe_allow_html=True)
-
-            if col_e.button("✍️", key=f'edit_ag_{id_evento}', help="Editar este evento"):
-                st.session_state.id_edicao_ativa_agenda = id_evento 
-                st.rerun() 
-
-            if col_x.button("🗑️", key=f'del_ag_{id_evento}', help="Excluir este evento"):
-                deletar_evento(spreadsheet, id_evento)
-                st.rerun() 
+                col_t.markdown(titulo_e_data, unsafe_allow_html=True)
+                col_d.write(row['descricao'][:100] + "..." if len(row['descricao']) > 100 else row['descricao'])
+                col_l.write(row['local'])
+                col_s.markdown(f"**<span style='color:{status_cor}'>{row['status']}</span>**", unsafe_allow_html=True)
+
+                if col_e.button("✍️", key=f'edit_ag_{chave}', help="Editar este evento" if not regra_linha else "Editar a série"):
+                    st.session_state.id_edicao_ativa_agenda = chave 
+                    st.rerun() 
+
+                if eh_ocorrencia_linha:
+                    if col_x.button("🗑️", key=f'del_ag_{chave}', help="Pular só esta ocorrência"):
+                        pular_ocorrencia_evento(store, indice_eventos.series.mestre(id_evento), row['data_hora_ordenacao'])
+                        st.rerun()
+                elif col_x.button("🗑️", key=f'del_ag_{chave}', help="Excluir este evento" if not regra_linha else "Excluir a série inteira"):
+                    deletar_evento(store, id_evento)
+                    st.rerun() 
         
-            st.markdown("---") 
+                st.markdown("---") 
         
-        # 2. Se a linha ESTÁ em modo de edição (FORMULÁRIO INLINE)
-        else: 
-            st.warning(f"📝 Editando Evento: **{row['titulo']}**")
+            # 2. Se a linha ESTÁ em modo de edição (FORMULÁRIO INLINE)
+            else: 
+                st.warning(f"📝 Editando {'Série' if regra_linha else 'Evento'}: **{row['titulo']}**")
             
-            with st.form(key=f"form_update_ag_{id_evento}"):
+                with st.form(key=f"form_update_ag_{chave}"):
                 
-                transacao_dados = row 
+                    # Ocorrência: o formulário edita a série (data/hora de início da linha-mestre)
+                    transacao_dados = textos_para_exibicao(indice_eventos.series.mestre(id_evento)) if eh_ocorrencia_linha else row 
                 
-                col_upd_1, col_upd_2 = st.columns(2) 
+                    col_upd_1, col_upd_2 = st.columns(2) 
                 
-                # INPUTS
-                novo_titulo = col_upd_1.text_input("Título do Evento", value=transacao_dados['titulo'], key=f'ut_titulo_ag_{id_evento}')
-                novo_local = col_upd_2.text_input("Local", value=transacao_dados['local'], key=f'ut_local_ag_{id_evento}')
+                    # INPUTS
+                    novo_titulo = col_upd_1.text_input("Título do Evento", value=transacao_dados['titulo'], key=f'ut_titulo_ag_{chave}')
+                    novo_local = col_upd_2.text_input("Local", value=transacao_dados['local'], key=f'ut_local_ag_{chave}')
                 
-                col_upd_3, col_upd_4, col_upd_5 = st.columns(3) 
-
-                novo_data = col_upd_3.date_input(
-                    "Data", 
-                    value=pd.to_datetime(transacao_dados['data_evento']).date(),
-                    format="DD/MM/YYYY",
-                    key=f'ut_data_ag_{id_evento}'
-                )
+                    col_upd_3, col_upd_4, col_upd_5 = st.columns(3) 
+
+                    novo_data = col_upd_3.date_input(
+                        "Data", 
+                        value=pd.to_datetime(transacao_dados['data_evento']).date(),
+                        format="DD/MM/YYYY",
+                        key=f'ut_data_ag_{chave}'
+                    )
                 
-                novo_hora_str = transacao_dados['hora_evento']
-                try:
-                    novo_hora = col_upd_4.time_input("Hora", value=time(int(novo_hora_str[:2]), int(novo_hora_str[3:])), key=f'ut_hora_ag_{id_evento}')
-                except:
-                    novo_hora = col_upd_4.time_input("Hora (Padrão 09:00)", value=time(9, 0), key=f'ut_hora_ag_{id_evento}') 
-
-                opcoes_status = ['Pendente', 'Concluído', 'Cancelado']
-                status_idx = opcoes_status.index(transacao_dados['status'])
-                novo_status = col_upd_5.selectbox("Status", opcoes_status, index=status_idx, key=f'ut_status_ag_{id_evento}')
-
-                novo_descricao = st.text_area(
-                    "Descrição", 
-                    value=transacao_dados['descricao'], 
-                    key=f'ut_desc_ag_{id_evento}'
-                )
+                    novo_hora_str = transacao_dados['hora_evento']
+                    try:
+                        novo_hora = col_upd_4.time_input("Hora", value=time(int(novo_hora_str[:2]), int(novo_hora_str[3:])), key=f'ut_hora_ag_{chave}')
+                    except:
+                        novo_hora = col_upd_4.time_input("Hora (Padrão 09:00)", value=time(9, 0), key=f'ut_hora_ag_{chave}') 
+
+                    opcoes_status = ['Pendente', 'Concluído', 'Cancelado']
+                    status_idx = opcoes_status.index(transacao_dados['status'])
+                    novo_status = col_upd_5.selectbox("Status", opcoes_status, index=status_idx, key=f'ut_status_ag_{chave}')
+
+                    novo_descricao = st.text_area(
+                        "Descrição", 
+                        value=transacao_dados['descricao'], 
+                        key=f'ut_desc_ag_{chave}'
+                    )
+
+                    nova_recorrencia = st.text_input(
+                        "Recorrência (vazio = não repete)",
+                        value=regra_linha,
+                        help="Ex.: FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20261231;EXDATE=20261104",
+                        key=f'ut_recorrencia_ag_{chave}'
+                    ).strip()
                 
-                # BOTÃO DE SALVAR (DENTRO DO FORM)
-                update_button = st.form_submit_button("✅ Salvar Alterações")
+                    # BOTÃO DE SALVAR (DENTRO DO FORM)
+                    update_button = st.form_submit_button("✅ Salvar Alterações")
 
-                if update_button:
+                    if update_button:
                     
-                    if novo_titulo and novo_data:
-                        dados_atualizados = {
-                            'id_evento': id_evento, 
-                            'titulo': novo_titulo,
-                            'descricao': novo_descricao,
-                            'data_evento': novo_data.strftime('%Y-%m-%d'),
-                            'hora_evento': novo_hora.strftime('%H:%M'),
-                            'local': novo_local,
-                            'status': novo_status
-                        }
-                        atualizar_evento(spreadsheet, id_evento, dados_atualizados) 
-                        st.session_state.id_edicao_ativa_agenda = None 
-                        st.rerun()
-                    else:
-                        st.warning("Título e Data são obrigatórios na atualização.")
+                        motivo_regra = regra_valida(nova_recorrencia) if nova_recorrencia else None
+                        if motivo_regra is not None:
+                            st.warning(f"Recorrência inválida: {motivo_regra}")
+                        elif novo_titulo and novo_data:
+                            dados_atualizados = {
+                                'id_evento': id_evento, 
+                                'titulo': novo_titulo,
+                                'descricao': novo_descricao,
+                                'data_evento': novo_data.strftime('%Y-%m-%d'),
+                                'hora_evento': novo_hora.strftime('%H:%M'),
+                                'local': novo_local,
+                                'status': novo_status,
+                                'recorrencia': nova_recorrencia
+                            }
+                            atualizar_evento(store, id_evento, dados_atualizados) 
+                            st.session_state.id_edicao_ativa_agenda = None 
+                            st.rerun()
+                        else:
+                            st.warning("Título e Data são obrigatórios na atualização.")
+
+                # BOTÃO DE CANCELAR (FORA DO FORM)
+                col_dummy_save, col_cancel_out = st.columns([1, 4])
+                if col_cancel_out.button("Cancelar Edição", key=f'cancel_edit_ag_{chave}'):
+                    st.session_state.id_edicao_ativa_agenda = None
+                    st.rerun()
+
+                st.markdown("---") 
+
+    METRICAS.registrar(
+        'app.render_grade' if modo_exibicao == "Grade (edição em lote)" else 'app.render_lista',
+        t.perf_counter() - inicio_render, linhas=len(df_pagina)
+    )
+
 
-            # BOTÃO DE CANCELAR (FORA DO FORM)
-            col_dummy_save, col_cancel_out = st.columns([1, 4])
-            if col_cancel_out.button("Cancelar Edição", key=f'cancel_edit_ag_{id_evento}'):
-                st.session_state.id_edicao_ativa_agenda = None
+# === SEÇÃO 3: ARQUIVO (Eventos encerrados antigos, fora da carga padrão) ===
+st.markdown("---")
+with st.expander("📦 Arquivo de Eventos Encerrados", expanded=False):
+    dias_arquivo = dias_para_arquivar(configuracao_store())
+    st.caption(
+        f"Eventos concluídos ou cancelados há mais de {dias_arquivo} dias ficam na aba de arquivo: "
+        "não são baixados nem exibidos na agenda, só aqui, quando solicitados."
+    )
+    if store is None:
+        st.info("📴 Modo offline: o arquivo não está acessível.")
+    else:
+        col_ver_arquivo, col_arquivar = st.columns(2)
+        if col_ver_arquivo.button("Carregar arquivo 🔍", key='carregar_arquivo_agenda'):
+            st.session_state['mostrar_arquivo'] = True
+        if col_arquivar.button("Arquivar encerrados agora 📦", key='arquivar_agenda'):
+            try:
+                resultado_arquivo = arquivar_eventos(store, conectar_arquivo_resource(agenda_ativa().nome), dias_arquivo)
+                # Resumo guardado para exibir após o rerun (a lista acima já foi desenhada com os dados antigos)
+                st.session_state['resumo_arquivo_agenda'] = resultado_arquivo
+                if resultado_arquivo.movidos:
+                    cache_eventos_resource(agenda_ativa().nome).invalidar()
+                    carregar_arquivo.clear()
+                    st.session_state['needs_reload'] = True
                 st.rerun()
+            except Exception as e:
+                st.error(f"🚨 Erro ao arquivar eventos: {e}")
+
+        resumo_arquivo = st.session_state.pop('resumo_arquivo_agenda', None)
+        if resumo_arquivo is not None:
+            st.success(f"📦 {resumo_arquivo.movidos} evento(s) arquivado(s).")
+            for id_evento, erro in resumo_arquivo.falhas:
+                st.warning(f"Evento {str(id_evento)[:8]}... não arquivado: {erro}")
+
+        if st.session_state.get('mostrar_arquivo'):
+            df_arquivo = carregar_arquivo(agenda_ativa().nome)
+            if df_arquivo.empty:
+                st.info("Nenhum evento arquivado.")
+            else:
+                st.caption(f"{len(df_arquivo)} evento(s) arquivado(s).")
+                st.dataframe(
+                    df_arquivo.reindex(columns=['titulo', 'data_evento', 'hora_evento', 'local', 'status', 'descricao']),
+                    hide_index=True,
+                    column_config={'data_evento': st.column_config.DateColumn("data", format="DD/MM/YYYY")}
+                )
 
-            st.markdown("---") 
+
+# === SEÇÃO 4: IMPORTAR / EXPORTAR EM LOTE (CSV e iCalendar) ===
+with st.expander("🔁 Importar / Exportar (CSV e iCalendar)", expanded=False):
+    st.caption(
+        "CSV com as colunas da planilha (titulo, data_evento, hora_evento...) ou arquivo .ics. "
+        "Linhas já importadas são puladas: se a importação parar no meio, basta enviar o mesmo arquivo de novo."
+    )
+    if store is None:
+        st.info("📴 Modo offline: a importação não está disponível.")
+    else:
+        arquivo_importacao = st.file_uploader("Arquivo", type=['csv', 'ics'], key='arquivo_importacao')
+        if arquivo_importacao is not None and st.button("Importar eventos 📥", key='importar_agenda'):
+            barra = st.progress(0.0, text="Importando...")
+            tamanho_arquivo = max(arquivo_importacao.size, 1)
+
+            def mostrar_progresso(andamento):
+                # Posição no arquivo enviado = fração já lida
+                barra.progress(
+                    min(arquivo_importacao.tell() / tamanho_arquivo, 1.0),
+                    text=f"{andamento.importadas} evento(s) gravado(s), {andamento.lidas} linha(s) lida(s)..."
+                )
+
+            resultado_importacao = importar_eventos(
+                store, ler_arquivo(arquivo_importacao), ao_progredir=mostrar_progresso
+            )
+            st.session_state['resumo_importacao_agenda'] = resultado_importacao
+            if resultado_importacao.importadas:
+                cache_eventos_resource(agenda_ativa().nome).invalidar()
+                st.session_state['needs_reload'] = True
+            st.rerun()
+
+        resumo_importacao = st.session_state.pop('resumo_importacao_agenda', None)
+        if resumo_importacao is not None:
+            st.success(
+                f"📥 {resumo_importacao.importadas} evento(s) importado(s), "
+                f"{resumo_importacao.ja_existentes} já existente(s)."
+            )
+            if resumo_importacao.erro is not None:
+                st.error(f"🚨 Importação interrompida: {resumo_importacao.erro}. Envie o arquivo de novo para continuar.")
+            if resumo_importacao.rejeitadas:
+                st.warning(f"{len(resumo_importacao.rejeitadas)} linha(s) rejeitada(s):")
+                st.dataframe(
+                    pd.DataFrame(resumo_importacao.rejeitadas, columns=['linha', 'motivo']), hide_index=True
+                )
+
+    # Gerado só no clique (sem montar o arquivo a cada rerun)
+    col_csv, col_ics = st.columns(2)
+    col_csv.download_button(
+        "Exportar CSV", lambda: "".join(exportar_csv(df_eventos)),
+        file_name=f"{agenda_ativa().nome}.csv", mime="text/csv", key='exportar_csv_agenda'
+    )
+    col_ics.download_button(
+        "Exportar iCalendar", lambda: "".join(exportar_ics(df_eventos)),
+        file_name=f"{agenda_ativa().nome}.ics", mime="text/calendar", key='exportar_ics_agenda'
+    )
 
 
 with st.sidebar:
     st.markdown("---")
-    st.caption(f"Última leitura de dados (Cache/Sheets): {datetime.now().strftime('%H:%M:%S')}")
+    cache_eventos = cache_eventos_resource(agenda_ativa().nome)
+    if cache_eventos.atualizado_em is not None:
+        leitura = datetime.fromtimestamp(cache_eventos.atualizado_em).strftime('%H:%M:%S')
+        # Sem duração quando o DataFrame veio do snapshot em disco
+        duracao = (
+            f", levou {cache_eventos.duracao_ultima * 1000:.0f} ms" if cache_eventos.duracao_ultima is not None else ""
+        )
+        st.caption(
+            f"Última leitura de dados (Cache/Sheets): {leitura} "
+            f"(há {cache_eventos.idade_snapshot:.0f}s{duracao})"
+        )
+    if cache_eventos.em_andamento:
+        st.caption("🔄 Sincronizando em segundo plano...")
+    if cache_eventos.ultimo_erro is not None:
+        st.caption(f"⚠️ Última sincronização falhou (exibindo snapshot anterior): {cache_eventos.ultimo_erro}")
+    if cache_eventos.erro_snapshot is not None:
+        st.caption(f"⚠️ Falha ao gravar o snapshot local: {cache_eventos.erro_snapshot}")
+    fila = fila_escrita_resource(store, agenda_ativa().nome) if store is not None else None
+    if fila is not None and fila.pendentes:
+        st.caption(f"📝 {fila.pendentes} alteração(ões) aguardando gravação em lote.")
+        if st.button("Gravar agora 💾", key='descarregar_fila_agenda'):
+            st.session_state['resumo_lote_agenda'] = resumir_resultados_lote(fila.descarregar())
+            st.rerun()
+    if fila is not None and fila.ultimos_resultados:
+        resumo_fila = resumir_resultados_lote(fila.ultimos_resultados)
+        st.caption(f"Última gravação em lote: {resumo_fila['sucessos']} ok, {len(resumo_fila['falhas'])} falha(s).")
+    if cache_eventos.rejeitados:
+        with st.expander(f"⚠️ {len(cache_eventos.rejeitados)} linha(s) ignorada(s) na leitura"):
+            st.dataframe(
+                pd.DataFrame(cache_eventos.rejeitados).reindex(
+                    columns=['id_evento', 'titulo', 'data_evento', 'hora_evento', 'motivo']
+                ).astype(str),
+                hide_index=True
+            )
+    ultimo_sync = cache_eventos.ultimo_sync
+    if ultimo_sync is not None:
+        tipo_sync = "completa" if ultimo_sync.completa else "incremental"
+        st.caption(
+            f"Sincronização {tipo_sync}: +{ultimo_sync.inseridos} ~{ultimo_sync.atualizados} "
+            f"-{ultimo_sync.removidos} linha(s)"
+        )
+
+    # --- PAINEL DE DESEMPENHO (Instrumentação: Sheets, carga, renderização) ---
+    with st.expander("⏱️ Desempenho", expanded=False):
+        resumo_metricas = METRICAS.resumo()
+        if resumo_metricas['metricas']:
+            st.dataframe(
+                pd.DataFrame.from_dict(resumo_metricas['metricas'], orient='index')[
+                    ['chamadas', 'erros', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'linhas', 'bytes']
+                ]
+            )
+        contadores = resumo_metricas['contadores']
+        acertos, falhas = contadores.get('cache.acerto', 0), contadores.get('cache.falha', 0)
+        if acertos + falhas:
+            st.caption(f"Cache: {acertos} acerto(s), {falhas} falha(s) ({acertos / (acertos + falhas):.0%} de acerto)")
+        if contadores:
+            st.caption(" · ".join(f"{nome}: {valor}" for nome, valor in contadores.items()))
+        st.download_button(
+            "Exportar JSON", json.dumps(resumo_metricas, ensure_ascii=False, indent=2),
+            file_name="metricas_agenda.json", mime="application/json"
+        )
@@ -0,0 +1,668 @@
+import bisect
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+from metricas import ObjetoInstrumentado, instrumentar_http
+
+# --- CONFIGURAÇÕES DO ARMAZENAMENTO ---
+
+# Esquema de colunas da aba AGENDA (mesma ordem das colunas A..H da planilha)
+# 'recorrencia': regra da série (ex.: 'FREQ=WEEKLY;BYDAY=MO'), vazia para eventos únicos
+COLUNAS = ['id_evento', 'titulo', 'descricao', 'data_evento', 'hora_evento', 'local', 'status', 'recorrencia']
+
+# Motor padrão: Google Sheets. Alternativas locais: 'sqlite' (arquivo) e 'memoria'
+MOTOR_PADRAO = "sheets"
+SQLITE_CAMINHO_PADRAO = "agenda.db"
+
+# Partição de arquivo (eventos encerrados antigos): aba "<aba>_ARQUIVO" no Sheets, arquivo "<nome>_arquivo.db" no SQLite
+SUFIXO_ARQUIVO = "_ARQUIVO"
+
+# Leitura do Sheets comum ao app e ao agente: valores crus (datas/horas como número serial)
+OPCOES_LEITURA_SHEETS = {'value_render_option': 'UNFORMATTED_VALUE', 'head': 1}
+
+# Deltas pela coluna de IDs (inclusões/exclusões) entre duas conferências completas do conteúdo
+RECONCILIAR_A_CADA = 10
+
+
+class EventoNaoEncontrado(Exception):
+    """O id_evento informado não existe no armazenamento."""
+
+
+# Resultado de uma leitura incremental: registros novos/alterados, ids removidos e a nova assinatura
+AlteracoesEventos = namedtuple('AlteracoesEventos', ['alterados', 'removidos', 'assinatura'])
+
+# Escrita em lote: acao é 'adicionar', 'atualizar' ou 'deletar' (registro é None no deletar)
+Operacao = namedtuple('Operacao', ['acao', 'id_evento', 'registro'])
+
+# Resultado individual de cada operação do lote (erro é a exceção, ou None em caso de sucesso)
+ResultadoOperacao = namedtuple('ResultadoOperacao', ['operacao', 'sucesso', 'erro'])
+
+
+# =================================================================
+# === INTERFACE (EventStore) ===
+# =================================================================
+
+class EventStore(ABC):
+    """Contrato comum dos motores de armazenamento da agenda.
+
+    Todos os registros são dicts com as chaves de COLUNAS.
+    """
+
+    @abstractmethod
+    def carregar_registros(self):
+        """Retorna a lista de registros (equivalente ao get_all_records)."""
+
+    @abstractmethod
+    def adicionar(self, registro):
+        """Insere um novo registro no final da agenda."""
+
+    @abstractmethod
+    def atualizar(self, id_evento, registro):
+        """Substitui o registro do id_evento. Lança EventoNaoEncontrado."""
+
+    @abstractmethod
+    def deletar(self, id_evento):
+        """Remove o registro do id_evento. Lança EventoNaoEncontrado."""
+
+    def assinatura(self):
+        """Marca barata de versão da origem (muda quando os dados mudam).
+
+        None significa que o motor não sabe detectar mudanças: quem usa o
+        cache deve recarregar a cada intervalo.
+        """
+        return None
+
+    def ler_alteracoes(self, assinatura):
+        """Leitura incremental desde a `assinatura` de uma leitura anterior.
+
+        Retorna AlteracoesEventos (vazio se nada mudou) ou None quando o motor
+        não consegue calcular o delta e o chamador deve fazer a leitura completa.
+        """
+        nova = self.assinatura()
+        if nova is not None and nova == assinatura:
+            return AlteracoesEventos([], [], nova)
+        return None
+
+    def aplicar_lote(self, operacoes):
+        """Aplica várias operações e retorna um ResultadoOperacao para cada uma (mesma ordem).
+
+        Implementação padrão: uma chamada por operação. Motores com escrita em
+        lote sobrescrevem para agrupar as chamadas.
+        """
+        resultados = []
+        for op in operacoes:
+            try:
+                if op.acao == 'adicionar':
+                    self.adicionar(op.registro)
+                elif op.acao == 'atualizar':
+                    self.atualizar(op.id_evento, op.registro)
+                elif op.acao == 'deletar':
+                    self.deletar(op.id_evento)
+                else:
+                    raise ValueError(f"Ação desconhecida: '{op.acao}'")
+                resultados.append(ResultadoOperacao(op, True, None))
+            except Exception as e:
+                resultados.append(ResultadoOperacao(op, False, e))
+        return resultados
+
+
+def registro_para_linha(registro):
+    """Converte um dict de evento para a lista ordenada de COLUNAS."""
+    return [registro.get(col) for col in COLUNAS]
+
+
+# =================================================================
+# === MOTOR GOOGLE SHEETS ===
+# =================================================================
+
+class SheetsEventStore(EventStore):
+    """Implementação atual: cada operação é uma chamada à API do Sheets.
+
+    Mantém um índice id_evento -> linha da planilha (construído a partir do
+    get_all_records e renovado a cada leitura da coluna de IDs) para que
+    edições e exclusões não precisem de sheet.find(). Antes de escrever, a
+    linha indexada é conferida com a leitura de uma única célula (coluna A);
+    se outro usuário alterou a planilha, o índice é reconstruído a partir da
+    coluna de IDs e a operação segue na linha correta.
+    """
+
+    def __init__(self, spreadsheet, aba, verificar_linhas=True, criar_aba=False, **opcoes_leitura):
+        # Toda chamada ao gspread passa pela instrumentação (contagem, latência, linhas, bytes)
+        instrumentar_http(spreadsheet)
+        self.spreadsheet = ObjetoInstrumentado(spreadsheet)
+        self.aba = aba
+        self.verificar_linhas = verificar_linhas
+        # Aba ausente: criada (com o cabeçalho de COLUNAS) na primeira escrita; até lá, leituras vêm vazias
+        self.criar_aba = criar_aba
+        self.opcoes_leitura = opcoes_leitura
+        self._sheet = None
+        # Cabeçalho conferido (colunas novas de COLUNAS acrescentadas) antes da primeira escrita
+        self._cabecalho_conferido = False
+        self._indice_linhas = None
+        self._lock_indice = threading.RLock()
+        # Impressão digital (hash) de cada linha da última leitura, para o delta
+        self._impressoes = None
+        self._deltas_estreitos = 0
+        # ids gravados por este processo desde a última leitura: relidos no próximo delta, sem baixar a aba
+        self._gravados = set()
+
+    @property
+    def sheet(self):
+        # Evita um spreadsheet.worksheet() (ida à API) a cada operação
+        if self._sheet is None:
+            self._sheet = ObjetoInstrumentado(self.spreadsheet.worksheet(self.aba))
+        return self._sheet
+
+    def _aba_existe(self):
+        # Import tardio: SQLite e o agente enxuto não pagam o import do gspread
+        from gspread.exceptions import WorksheetNotFound
+
+        if self._sheet is not None or not self.criar_aba:
+            return True
+        try:
+            self.sheet
+            return True
+        except WorksheetNotFound:
+            return False
+
+    def _garantir_aba(self):
+        if not self._aba_existe():
+            aba = self.spreadsheet.add_worksheet(title=self.aba, rows=1000, cols=len(COLUNAS))
+            aba.append_row(COLUNAS)
+            self._sheet = ObjetoInstrumentado(aba)
+            self._cabecalho_conferido = True
+
+    def _garantir_cabecalho(self):
+        """Abas criadas antes de uma coluna nova (ex.: 'recorrencia') ganham o título que falta, uma vez por store."""
+        if self._cabecalho_conferido:
+            return
+        cabecalho = self.sheet.row_values(self.linha_cabecalho)
+        faltando = COLUNAS[len(cabecalho):] if cabecalho == COLUNAS[:len(cabecalho)] else []
+        if faltando:
+            from gspread.utils import rowcol_to_a1
+
+            if self.sheet.col_count < len(COLUNAS):
+                self.sheet.add_cols(len(COLUNAS) - self.sheet.col_count)
+            self.sheet.update(rowcol_to_a1(self.linha_cabecalho, len(cabecalho) + 1), [faltando])
+        self._cabecalho_conferido = True
+
+    @property
+    def linha_cabecalho(self):
+        return self.opcoes_leitura.get('head', 1)
+
+    def assinatura(self):
+        # Metadado do Drive (modifiedTime): uma chamada leve, sem baixar a aba
+        try:
+            return self.spreadsheet.get_lastUpdateTime()
+        except Exception:
+            return None
+
+    def carregar_registros(self):
+        if not self._aba_existe():
+            return []
+        registros = self.sheet.get_all_records(**self.opcoes_leitura)
+        # O índice sai de graça do download completo que já foi feito
+        self._indexar_ids([str(reg.get('id_evento', '')) for reg in registros])
+        self._impressoes = {
+            str(reg.get('id_evento', '')): hash(tuple(reg.items())) for reg in registros
+        }
+        self._gravados = set()
+        return registros
+
+    def ler_alteracoes(self, assinatura):
+        """Delta pela coluna de IDs; a aba inteira só é lida para edições de terceiros.
+
+        O Sheets não tem feed de mudanças por linha. Sem alteração no
+        modifiedTime, custa só a chamada de metadado. Com alteração, lê-se a
+        coluna A (que também renova o índice id -> linha): IDs que sumiram são
+        removidos, e as linhas de IDs novos (em geral a cauda anexada) e as
+        gravadas por este processo vêm em um único batch_get; as gravadas voltam
+        no delta se o conteúdo lido difere do que foi escrito (ex.: data gravada
+        como texto e lida como número serial). Se nada disso explica a mudança,
+        ela foi uma edição no lugar feita por outro: a aba é lida e só as linhas
+        cujo hash mudou são devolvidas. Edições de outros feitas junto com
+        inclusões, exclusões ou escritas locais aparecem na próxima leitura
+        completa (no máximo a cada RECONCILIAR_A_CADA deltas).
+        """
+        nova = self.assinatura()
+        if nova is not None and nova == assinatura:
+            return AlteracoesEventos([], [], nova)
+
+        anteriores = self._impressoes
+        if anteriores is None:
+            return None
+
+        if self._deltas_estreitos < RECONCILIAR_A_CADA:
+            with self._lock_indice:
+                self._reconstruir_indice()
+                removidos = [id_evento for id_evento in anteriores if id_evento not in self._indice_linhas]
+                linhas = sorted(
+                    linha for id_evento, linha in self._indice_linhas.items()
+                    if id_evento not in anteriores or id_evento in self._gravados
+                )
+                if removidos or linhas:
+                    alterados = []
+                    for reg in self._ler_linhas(linhas):
+                        id_evento, impressao = str(reg.get('id_evento', '')), hash(tuple(reg.items()))
+                        if anteriores.get(id_evento) != impressao:
+                            alterados.append(reg)
+                        anteriores[id_evento] = impressao
+                    for id_evento in removidos:
+                        del anteriores[id_evento]
+                    self._gravados = set()
+                    self._deltas_estreitos += 1
+                    return AlteracoesEventos(alterados, removidos, nova)
+
+        self._deltas_estreitos = 0
+        registros = self.carregar_registros()
+        alterados = [
+            reg for reg in registros
+            if anteriores.get(str(reg.get('id_evento', ''))) != self._impressoes.get(str(reg.get('id_evento', '')))
+        ]
+        removidos = [id_evento for id_evento in anteriores if id_evento not in self._impressoes]
+        return AlteracoesEventos(alterados, removidos, nova)
+
+    def _ler_linhas(self, linhas):
+        """Registros (como os do get_all_records) das linhas informadas: um batch_get com o cabeçalho e cada trecho contínuo."""
+        if not linhas:
+            return []
+        trechos = []
+        for linha in linhas:
+            if trechos and trechos[-1][1] == linha - 1:
+                trechos[-1][1] = linha
+            else:
+                trechos.append([linha, linha])
+        opcoes = {'value_render_option': self.opcoes_leitura['value_render_option']} if 'value_render_option' in self.opcoes_leitura else {}
+        cabecalho, *partes = self.sheet.batch_get(
+            [f'{self.linha_cabecalho}:{self.linha_cabecalho}'] + [f'{inicio}:{fim}' for inicio, fim in trechos], **opcoes
+        )
+        cabecalho = list(cabecalho[0]) if cabecalho else []
+        return [
+            dict(zip(cabecalho, list(valores) + [''] * (len(cabecalho) - len(valores))))
+            for parte in partes for valores in parte
+        ]
+
+    def _registrar_escritas(self, gravados=(), removidos=()):
+        """Impressões acompanham as escritas deste processo (`gravados`: registros escritos; `removidos`: ids).
+
+        O registro gravado entra com o hash do que foi escrito, como uma linha
+        lida: uma edição posterior de outro usuário continua aparecendo no delta.
+        """
+        if self._impressoes is None:
+            return
+        for id_evento in removidos:
+            self._impressoes.pop(str(id_evento), None)
+            self._gravados.discard(str(id_evento))
+        for registro in gravados:
+            id_evento = str(registro.get('id_evento', ''))
+            self._impressoes[id_evento] = hash(tuple(registro.items()))
+            self._gravados.add(id_evento)
+
+    # --- ÍNDICE id_evento -> LINHA ---
+
+    def _indexar_ids(self, ids):
+        primeira_linha = self.linha_cabecalho + 1
+        with self._lock_indice:
+            self._indice_linhas = {
+                id_evento: primeira_linha + pos for pos, id_evento in enumerate(ids) if id_evento
+            }
+
+    def _reconstruir_indice(self):
+        """Reconstrói o índice lendo apenas a coluna A (IDs), sem baixar os registros."""
+        ids = self.sheet.col_values(1)[self.linha_cabecalho:]
+        self._indexar_ids([str(id_evento) for id_evento in ids])
+
+    def _linha_do_evento(self, id_evento):
+        """Linha atual do id_evento, reparando o índice se estiver desatualizado."""
+        with self._lock_indice:
+            if self._indice_linhas is None:
+                self._reconstruir_indice()
+            linha_index = self._indice_linhas.get(id_evento)
+
+            if linha_index is not None and not self.verificar_linhas:
+                return linha_index
+
+            if linha_index is not None and self.sheet.acell(f'A{linha_index}').value == id_evento:
+                return linha_index
+
+            # Índice obsoleto (outro escritor alterou a planilha): reconstrói e tenta de novo
+            self._reconstruir_indice()
+            linha_index = self._indice_linhas.get(id_evento)
+            if linha_index is None:
+                raise EventoNaoEncontrado(id_evento)
+            return linha_index
+
+    def adicionar(self, registro):
+        self._garantir_aba()
+        self._garantir_cabecalho()
+        resposta = self.sheet.append_row(registro_para_linha(registro), value_input_option='USER_ENTERED')
+        with self._lock_indice:
+            self._registrar_escritas(gravados=[registro])
+            if self._indice_linhas is None:
+                return
+            linha_index = _linha_de_intervalo((resposta or {}).get('updates', {}).get('updatedRange', ''))
+            if linha_index is None:
+                # Sem a linha na resposta, o índice é refeito sob demanda
+                self._indice_linhas = None
+            else:
+                self._indice_linhas[str(registro.get('id_evento'))] = linha_index
+
+    def atualizar(self, id_evento, registro):
+        self._garantir_cabecalho()
+        with self._lock_indice:
+            linha_index = self._linha_do_evento(id_evento)
+            self.sheet.update(f'A{linha_index}', [registro_para_linha(registro)], value_input_option='USER_ENTERED')
+            self._registrar_escritas(gravados=[dict(registro, id_evento=id_evento)])
+
+    def deletar(self, id_evento):
+        with self._lock_indice:
+            linha_index = self._linha_do_evento(id_evento)
+            self.sheet.delete_rows(linha_index)
+            # As linhas abaixo da removida sobem uma posição
+            self._remover_do_indice({id_evento}, [linha_index])
+            self._registrar_escritas(removidos=[id_evento])
+
+    def aplicar_lote(self, operacoes):
+        """Agrupa o lote em no máximo três chamadas de escrita.
+
+        Ordem: atualizações (values.batchUpdate), exclusões (um batchUpdate com
+        deleteDimension de baixo para cima, para que os índices continuem
+        válidos) e inclusões (append_rows). Com verificar_linhas, o índice é
+        conferido uma única vez para o lote inteiro (leitura da coluna A).
+        """
+        resultados = {}
+        adicoes = [op for op in operacoes if op.acao == 'adicionar']
+        atualizacoes = [op for op in operacoes if op.acao == 'atualizar']
+        exclusoes = [op for op in operacoes if op.acao == 'deletar']
+        for op in operacoes:
+            if op.acao not in ('adicionar', 'atualizar', 'deletar'):
+                resultados[id(op)] = ResultadoOperacao(op, False, ValueError(f"Ação desconhecida: '{op.acao}'"))
+
+        if adicoes:
+            self._garantir_aba()
+        if adicoes or atualizacoes:
+            self._garantir_cabecalho()
+
+        with self._lock_indice:
+            if atualizacoes or exclusoes:
+                if self._indice_linhas is None or self.verificar_linhas:
+                    self._reconstruir_indice()
+                for op in atualizacoes + exclusoes:
+                    if op.id_evento not in self._indice_linhas:
+                        resultados[id(op)] = ResultadoOperacao(op, False, EventoNaoEncontrado(op.id_evento))
+                atualizacoes = [op for op in atualizacoes if id(op) not in resultados]
+                exclusoes = [op for op in exclusoes if id(op) not in resultados]
+
+            # 1. Atualizações (coordenadas anteriores às exclusões)
+            if atualizacoes:
+                try:
+                    self.sheet.batch_update(
+                        [
+                            {'range': f'A{self._indice_linhas[op.id_evento]}', 'values': [registro_para_linha(op.registro)]}
+                            for op in atualizacoes
+                        ],
+                        value_input_option='USER_ENTERED'
+                    )
+                    resultados.update({id(op): ResultadoOperacao(op, True, None) for op in atualizacoes})
+                    self._registrar_escritas(gravados=[dict(op.registro, id_evento=op.id_evento) for op in atualizacoes])
+                except Exception as e:
+                    resultados.update({id(op): ResultadoOperacao(op, False, e) for op in atualizacoes})
+
+            # 2. Exclusões, da última linha para a primeira
+            if exclusoes:
+                linhas_removidas = sorted({self._indice_linhas[op.id_evento] for op in exclusoes}, reverse=True)
+                try:
+                    self.spreadsheet.batch_update({'requests': [
+                        {'deleteDimension': {'range': {
+                            'sheetId': self.sheet.id,
+                            'dimension': 'ROWS',
+                            'startIndex': linha - 1,
+                            'endIndex': linha
+                        }}}
+                        for linha in linhas_removidas
+                    ]})
+                    resultados.update({id(op): ResultadoOperacao(op, True, None) for op in exclusoes})
+                    self._remover_do_indice({op.id_evento for op in exclusoes}, linhas_removidas)
+                    self._registrar_escritas(removidos=[op.id_evento for op in exclusoes])
+                except Exception as e:
+                    resultados.update({id(op): ResultadoOperacao(op, False, e) for op in exclusoes})
+                    self._indice_linhas = None
+
+            # 3. Inclusões no final da aba
+            if adicoes:
+                try:
+                    resposta = self.sheet.append_rows(
+                        [registro_para_linha(op.registro) for op in adicoes], value_input_option='USER_ENTERED'
+                    )
+                    resultados.update({id(op): ResultadoOperacao(op, True, None) for op in adicoes})
+                    self._registrar_escritas(gravados=[op.registro for op in adicoes])
+                    primeira = _linha_de_intervalo((resposta or {}).get('updates', {}).get('updatedRange', ''))
+                    if self._indice_linhas is not None:
+                        if primeira is None:
+                            self._indice_linhas = None
+                        else:
+                            for pos, op in enumerate(adicoes):
+                                self._indice_linhas[str(op.registro.get('id_evento'))] = primeira + pos
+                except Exception as e:
+                    resultados.update({id(op): ResultadoOperacao(op, False, e) for op in adicoes})
+
+        return [resultados[id(op)] for op in operacoes]
+
+    def _remover_do_indice(self, ids_removidos, linhas_removidas):
+        """Retira os ids e desloca as demais linhas pelo número de remoções acima delas."""
+        crescentes = sorted(linhas_removidas)
+        for id_evento in ids_removidos:
+            self._indice_linhas.pop(id_evento, None)
+        for id_evento, linha in self._indice_linhas.items():
+            self._indice_linhas[id_evento] = linha - bisect.bisect_left(crescentes, linha)
+
+
+def _linha_de_intervalo(intervalo):
+    """Extrai a linha inicial de um intervalo A1 como 'AGENDA!A15:G15' (None se não reconhecido)."""
+    encontrado = re.search(r"![A-Z]+(\d+)", intervalo)
+    return int(encontrado.group(1)) if encontrado else None
+
+
+# =================================================================
+# === MOTOR LOCAL (SQLite / Memória) ===
+# =================================================================
+
+class SQLiteEventStore(EventStore):
+    """Motor local com o mesmo esquema de colunas (sem rede).
+
+    A coluna interna 'posicao' preserva a ordem de inserção, como as linhas da planilha.
+    Cada escrita incrementa um contador global ('versao'), gravado na linha
+    alterada (ou em 'removidos', para exclusões): o delta é um SELECT por versão.
+    """
+
+    def __init__(self, caminho=":memory:"):
+        self.caminho = caminho
+        # Streamlit executa cada sessão em uma thread própria
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._lock = threading.Lock()
+        colunas_sql = ", ".join(
+            f"{col} TEXT UNIQUE NOT NULL" if col == 'id_evento' else f"{col} TEXT"
+            for col in COLUNAS
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS eventos (posicao INTEGER PRIMARY KEY AUTOINCREMENT, {colunas_sql})"
+            )
+            # Bancos criados antes do delta (ou de uma coluna nova, como 'recorrencia') não têm essas colunas
+            existentes = {linha[1] for linha in self._conn.execute("PRAGMA table_info(eventos)")}
+            for col in COLUNAS:
+                if col not in existentes:
+                    self._conn.execute(f"ALTER TABLE eventos ADD COLUMN {col} TEXT")
+            if 'versao' not in existentes:
+                self._conn.execute("ALTER TABLE eventos ADD COLUMN versao INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_eventos_versao ON eventos (versao)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS removidos (id_evento TEXT PRIMARY KEY, versao INTEGER NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao', 0)")
+
+    def _proxima_versao(self):
+        # Chamado dentro da transação de escrita
+        self._conn.execute("UPDATE meta SET valor = valor + 1 WHERE chave = 'versao'")
+        return self._conn.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()[0]
+
+    def assinatura(self):
+        with self._lock:
+            return self._conn.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()[0]
+
+    def carregar_registros(self):
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT {', '.join(COLUNAS)} FROM eventos ORDER BY posicao")
+            return [dict(zip(COLUNAS, linha)) for linha in cursor]
+
+    def ler_alteracoes(self, assinatura):
+        if assinatura is None:
+            return None
+        with self._lock, self._conn:
+            nova = self._conn.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()[0]
+            if nova == assinatura:
+                return AlteracoesEventos([], [], nova)
+            if not isinstance(assinatura, int) or nova < assinatura:
+                # Marca d'água de outro banco (ex.: snapshot antigo): só a leitura completa é confiável
+                return None
+            cursor = self._conn.execute(
+                f"SELECT {', '.join(COLUNAS)} FROM eventos WHERE versao > ? AND versao <= ? ORDER BY posicao",
+                (assinatura, nova),
+            )
+            alterados = [dict(zip(COLUNAS, linha)) for linha in cursor]
+            removidos = [
+                linha[0] for linha in self._conn.execute(
+                    "SELECT id_evento FROM removidos WHERE versao > ? AND versao <= ?", (assinatura, nova)
+                )
+            ]
+        return AlteracoesEventos(alterados, removidos, nova)
+
+    def adicionar(self, registro):
+        with self._lock, self._conn:
+            self._adicionar(registro)
+
+    def atualizar(self, id_evento, registro):
+        with self._lock, self._conn:
+            self._atualizar(id_evento, registro)
+
+    def deletar(self, id_evento):
+        with self._lock, self._conn:
+            self._deletar(id_evento)
+
+    def aplicar_lote(self, operacoes):
+        """Aplica o lote inteiro em uma única transação (uma falha não desfaz as demais)."""
+        resultados = []
+        with self._lock, self._conn:
+            for op in operacoes:
+                try:
+                    if op.acao == 'adicionar':
+                        self._adicionar(op.registro)
+                    elif op.acao == 'atualizar':
+                        self._atualizar(op.id_evento, op.registro)
+                    elif op.acao == 'deletar':
+                        self._deletar(op.id_evento)
+                    else:
+                        raise ValueError(f"Ação desconhecida: '{op.acao}'")
+                    resultados.append(ResultadoOperacao(op, True, None))
+                except Exception as e:
+                    resultados.append(ResultadoOperacao(op, False, e))
+        return resultados
+
+    # --- ESCRITAS (chamadas com o lock e a transação já abertos) ---
+
+    def _adicionar(self, registro):
+        marcadores = ", ".join("?" for _ in COLUNAS)
+        versao = self._proxima_versao()
+        self._conn.execute(
+            f"INSERT INTO eventos ({', '.join(COLUNAS)}, versao) VALUES ({marcadores}, ?)",
+            registro_para_linha(registro) + [versao],
+        )
+        self._conn.execute("DELETE FROM removidos WHERE id_evento = ?", (registro.get('id_evento'),))
+
+    def _atualizar(self, id_evento, registro):
+        atribuicoes = ", ".join(f"{col} = ?" for col in COLUNAS)
+        versao = self._proxima_versao()
+        cursor = self._conn.execute(
+            f"UPDATE eventos SET {atribuicoes}, versao = ? WHERE id_evento = ?",
+            registro_para_linha(registro) + [versao, id_evento],
+        )
+        if cursor.rowcount == 0:
+            raise EventoNaoEncontrado(id_evento)
+
+    def _deletar(self, id_evento):
+        versao = self._proxima_versao()
+        cursor = self._conn.execute("DELETE FROM eventos WHERE id_evento = ?", (id_evento,))
+        if cursor.rowcount == 0:
+            raise EventoNaoEncontrado(id_evento)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO removidos (id_evento, versao) VALUES (?, ?)", (id_evento, versao)
+        )
+
+
+# =================================================================
+# === SELEÇÃO DO MOTOR (CONFIGURAÇÃO) ===
+# =================================================================
+
+def motor_configurado(config=None):
+    """Motor escolhido: config['store'] > variável AGENDA_STORE > 'sheets'."""
+    config = config or {}
+    return str(config.get("store") or os.getenv("AGENDA_STORE") or MOTOR_PADRAO).lower()
+
+
+def criar_store(config=None, conectar_planilha=None, aba=None, **opcoes_leitura):
+    """Instancia o EventStore configurado.
+
+    Para o motor 'sheets', `conectar_planilha` deve retornar o Spreadsheet
+    (ou None em caso de falha, repassado ao chamador).
+    """
+    config = config or {}
+    motor = motor_configurado(config)
+
+    if motor == "sheets":
+        spreadsheet = conectar_planilha()
+        if spreadsheet is None:
+            return None
+        return SheetsEventStore(spreadsheet, aba, **opcoes_leitura)
+
+    if motor == "sqlite":
+        caminho = config.get("sqlite_path") or os.getenv("AGENDA_SQLITE_PATH") or SQLITE_CAMINHO_PADRAO
+        return SQLiteEventStore(caminho)
+
+    if motor == "memoria":
+        return SQLiteEventStore(":memory:")
+
+    raise ValueError(f"Motor de armazenamento desconhecido: '{motor}' (use sheets, sqlite ou memoria).")
+
+
+def caminho_arquivo(caminho):
+    """'agenda.db' -> 'agenda_arquivo.db' (banco SQLite da partição de arquivo)."""
+    base, extensao = os.path.splitext(caminho)
+    return f"{base}{SUFIXO_ARQUIVO.lower()}{extensao}"
+
+
+def criar_store_arquivo(config=None, conectar_planilha=None, aba=None, **opcoes_leitura):
+    """EventStore da partição de arquivo, no mesmo motor da agenda.
+
+    No Sheets é a aba "<aba>_ARQUIVO" da mesma planilha (criada no primeiro
+    arquivamento); no SQLite, um banco separado ao lado do principal.
+    """
+    config = config or {}
+    motor = motor_configurado(config)
+
+    if motor == "sheets":
+        spreadsheet = conectar_planilha()
+        if spreadsheet is None:
+            return None
+        return SheetsEventStore(spreadsheet, f"{aba}{SUFIXO_ARQUIVO}", criar_aba=True, **opcoes_leitura)
+
+    if motor == "sqlite":
+        caminho = config.get("sqlite_path") or os.getenv("AGENDA_SQLITE_PATH") or SQLITE_CAMINHO_PADRAO
+        return SQLiteEventStore(caminho_arquivo(caminho))
+
+    if motor == "memoria":
+        return SQLiteEventStore(":memory:")
+
+    raise ValueError(f"Motor de armazenamento desconhecido: '{motor}' (use sheets, sqlite ou memoria).")
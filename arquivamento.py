@@ -0,0 +1,90 @@
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from armazenamento import COLUNAS, Operacao
+from eventos import carregar_dataframe
+from metricas import METRICAS
+
+# --- CONFIGURAÇÕES DO ARQUIVAMENTO ---
+
+# Só eventos encerrados saem da aba principal
+STATUS_ARQUIVAVEIS = ['Concluído', 'Cancelado']
+# Idade mínima (dias desde a data do evento) para arquivar
+DIAS_PARA_ARQUIVAR = 30
+# Eventos movidos por lote: uma inclusão no arquivo + uma exclusão na aba principal por lote
+TAMANHO_LOTE_ARQUIVO = 200
+
+# Resultado de um arquivamento: quantos eventos saíram da aba principal e as falhas (id_evento, erro)
+ResultadoArquivamento = namedtuple('ResultadoArquivamento', ['movidos', 'falhas'])
+
+
+def dias_para_arquivar(config=None):
+    """Idade mínima: config['arquivar_apos_dias'] > AGENDA_ARQUIVAR_APOS_DIAS > padrão."""
+    config = config or {}
+    valor = config.get('arquivar_apos_dias') or os.getenv("AGENDA_ARQUIVAR_APOS_DIAS")
+    return int(valor) if valor not in (None, "") else DIAS_PARA_ARQUIVAR
+
+
+def selecionar_arquivaveis(registros, dias=DIAS_PARA_ARQUIVAR, hoje=None):
+    """Registros encerrados com data anterior a hoje - `dias`, com data/hora normalizadas para o arquivo.
+
+    Linhas com data ou hora inválida ficam na aba principal (para correção manual).
+    """
+    hoje = pd.Timestamp(hoje or datetime.now().date())
+    df = carregar_dataframe(registros).df
+    if df.empty:
+        return []
+    corte = hoje - timedelta(days=dias)
+    mascara = df['status'].isin(STATUS_ARQUIVAVEIS) & (df['data_hora_ordenacao'] < corte)
+    selecionados = df.loc[mascara, ['id_evento', 'data_evento', 'hora_evento']]
+
+    originais = {str(reg.get('id_evento')): reg for reg in registros}
+    arquivaveis = []
+    for id_evento, data_evento, hora_evento in selecionados.itertuples(index=False):
+        registro = {col: originais[str(id_evento)].get(col) for col in COLUNAS}
+        # Número serial do Sheets vira texto legível na aba de arquivo
+        registro['data_evento'] = data_evento.strftime('%Y-%m-%d')
+        registro['hora_evento'] = hora_evento
+        arquivaveis.append(registro)
+    return arquivaveis
+
+
+def arquivar_eventos(store, arquivo, dias=DIAS_PARA_ARQUIVAR, hoje=None, tamanho_lote=TAMANHO_LOTE_ARQUIVO):
+    """Move eventos encerrados antigos da aba principal (`store`) para a partição de arquivo, em lotes.
+
+    Cada lote é incluído no arquivo antes de sair da origem: uma falha no meio
+    deixa o evento duplicado, nunca perdido. Ids que já estão no arquivo (de
+    uma execução interrompida) só são removidos da origem.
+    """
+    with METRICAS.medir('arquivamento.arquivar') as info:
+        arquivaveis = selecionar_arquivaveis(store.carregar_registros(), dias, hoje)
+        if not arquivaveis:
+            return ResultadoArquivamento(0, [])
+
+        ja_arquivados = {str(reg.get('id_evento')) for reg in arquivo.carregar_registros()}
+        movidos, falhas = 0, []
+        for inicio in range(0, len(arquivaveis), tamanho_lote):
+            lote = arquivaveis[inicio:inicio + tamanho_lote]
+
+            inclusoes = [
+                Operacao('adicionar', reg['id_evento'], reg) for reg in lote if str(reg['id_evento']) not in ja_arquivados
+            ]
+            no_arquivo = [reg['id_evento'] for reg in lote if str(reg['id_evento']) in ja_arquivados]
+            for resultado in arquivo.aplicar_lote(inclusoes):
+                if resultado.sucesso:
+                    no_arquivo.append(resultado.operacao.id_evento)
+                else:
+                    falhas.append((resultado.operacao.id_evento, resultado.erro))
+
+            for resultado in store.aplicar_lote([Operacao('deletar', id_evento, None) for id_evento in no_arquivo]):
+                if resultado.sucesso:
+                    movidos += 1
+                else:
+                    falhas.append((resultado.operacao.id_evento, resultado.erro))
+            print(f"📦 Arquivamento: {movidos}/{len(arquivaveis)} evento(s) movido(s).")
+
+        info['linhas'] = movidos
+    return ResultadoArquivamento(movidos, falhas)
@@ -0,0 +1,299 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from armazenamento import COLUNAS, OPCOES_LEITURA_SHEETS, Operacao, SheetsEventStore, registro_para_linha
+from eventos import CacheEventos, IndiceEventos, carregar_dataframe, paginar
+from planilha_falsa import gerar_linhas, planilha_sintetica
+
+# --- CONFIGURAÇÕES DO BENCHMARK ---
+
+TAMANHOS_PADRAO = [100, 1000, 10000, 100000]
+REPETICOES_PADRAO = 3
+SAIDA_PADRAO = "benchmark_resultados.json"
+# Operações de cada tipo (inclusão, edição, exclusão) nos cenários de CRUD
+OPERACOES_CRUD = 50
+# Entrega no Telegram (BotFalso): chats de destino e limite do servidor simulado (mensagens/s por chat)
+CHATS_TELEGRAM = 5
+LIMITE_TELEGRAM_POR_CHAT = 5
+ABA = "AGENDA"
+
+
+# =================================================================
+# === CENÁRIOS ===
+# =================================================================
+# Cada cenário recebe o contexto do tamanho e devolve a função a cronometrar
+# (a preparação fica fora da medição). A função retorna quantos itens processou.
+
+def _store(contexto):
+    planilha = planilha_sintetica(contexto['tamanho'], ABA, contexto['latencia'], contexto['semente'])
+    return planilha, SheetsEventStore(planilha, ABA, **OPCOES_LEITURA_SHEETS)
+
+
+def cenario_carregar_dataframe(contexto):
+    """Só a conversão tipada de registros já baixados (get_all_records)."""
+    registros = contexto['registros']
+    return lambda: len(carregar_dataframe(registros).df)
+
+
+def cenario_carga_app(contexto):
+    """Primeira leitura do app: CacheEventos.obter sobre o Sheets (download + conversão)."""
+    _, store = _store(contexto)
+    return lambda: len(CacheEventos().obter(store))
+
+
+def cenario_carga_alerta(contexto):
+    """Leitura do agente de alerta (carregar_eventos), sem snapshot em disco."""
+    import alerta_eventos
+
+    _, store = _store(contexto)
+
+    def executar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return len(alerta_eventos.carregar_eventos(store))
+    return executar
+
+
+def cenario_filtro_alerta(contexto):
+    """Filtro de 5 dias do main_alerta (pendentes de hoje até o limite)."""
+    from alerta_eventos import DIAS_DE_ALERTA, filtrar_alerta
+
+    indice, hoje = IndiceEventos(contexto['df']), date.today()
+    return lambda: (filtrar_alerta(indice, hoje, hoje + timedelta(days=DIAS_DE_ALERTA)), len(indice))[1]
+
+
+def cenario_alerta_enxuto(contexto):
+    """Modo enxuto do agente (--enxuto): carga leve + filtro de 5 dias sobre os registros brutos, sem pandas."""
+    from alerta_eventos import DIAS_DE_ALERTA, filtrar_alerta_enxuto
+    from registros import carregar_registros_leves
+
+    registros, hoje = contexto['registros'], date.today()
+
+    def executar():
+        eventos = carregar_registros_leves(registros).eventos
+        filtrar_alerta_enxuto(eventos, hoje, hoje + timedelta(days=DIAS_DE_ALERTA))
+        return len(eventos)
+    return executar
+
+
+def cenario_exibicao_app(contexto):
+    """Preparação da lista do app: filtro (sem critérios) e primeira página, sobre o índice já ordenado."""
+    indice = IndiceEventos(contexto['df'])
+
+    def executar():
+        paginar(indice.filtrar(), 1, 25)
+        return len(indice)
+    return executar
+
+
+def _operacoes_crud(contexto, store):
+    quantidade = min(OPERACOES_CRUD, contexto['tamanho'])
+    existentes = [reg['id_evento'] for reg in store.carregar_registros()[-quantidade:]]
+    novos = [
+        dict(zip(COLUNAS, linha), id_evento=f"bench-{i}")
+        for i, linha in enumerate(gerar_linhas(quantidade, semente=contexto['semente'] + 1))
+    ]
+    return (
+        [Operacao('adicionar', reg['id_evento'], reg) for reg in novos]
+        + [Operacao('atualizar', id_evento, dict(novos[0], id_evento=id_evento, titulo="Editado"))
+           for id_evento in existentes]
+        + [Operacao('deletar', id_evento, None) for id_evento in existentes]
+    )
+
+
+def cenario_crud_unitario(contexto):
+    """Inclusões, edições e exclusões uma a uma (uma chamada de escrita por operação)."""
+    _, store = _store(contexto)
+    operacoes = _operacoes_crud(contexto, store)
+
+    def executar():
+        for op in operacoes:
+            if op.acao == 'adicionar':
+                store.adicionar(op.registro)
+            elif op.acao == 'atualizar':
+                store.atualizar(op.id_evento, op.registro)
+            else:
+                store.deletar(op.id_evento)
+        return len(operacoes)
+    return executar
+
+
+def cenario_crud_lote(contexto):
+    """As mesmas operações em um lote (store.aplicar_lote, como a fila de escrita)."""
+    _, store = _store(contexto)
+    operacoes = _operacoes_crud(contexto, store)
+    return lambda: len(store.aplicar_lote(operacoes))
+
+
+def cenario_crud_find(contexto):
+    """Linha de base: localizar cada evento com sheet.find (sem índice) e editar a linha."""
+    planilha, store = _store(contexto)
+    operacoes = [op for op in _operacoes_crud(contexto, store) if op.acao == 'atualizar']
+    aba = planilha.worksheet(ABA)
+
+    def executar():
+        for op in operacoes:
+            celula = aba.find(op.id_evento, in_column=1)
+            aba.update(f'A{celula.row}', [registro_para_linha(op.registro)])
+        return len(operacoes)
+    return executar
+
+
+def cenario_entrega_telegram(contexto):
+    """Resumo de 5 dias entregue a vários chats pelo EntregadorTelegram, contra o BotFalso.
+
+    O resumo leva a lista completa da janela (sem o corte do alerta), então
+    agendas grandes passam do limite de 4096 caracteres e são divididas; o
+    entregador envia mais rápido do que o servidor simulado aceita, e o tempo
+    inclui as pausas de retry_after dos 429. Itens: partes entregues.
+    """
+    import asyncio
+
+    from agendas import Agenda
+    from alerta_eventos import DIAS_DE_ALERTA, filtrar_alerta, preparar_alerta
+    from entrega_telegram import EntregadorTelegram
+    from telegram_falso import BotFalso
+
+    chats = [f"-100{i}" for i in range(CHATS_TELEGRAM)]
+    indice, hoje = IndiceEventos(contexto['df']), date.today()
+    envio = preparar_alerta(Agenda(ABA, "benchmark", ABA, chats), indice, None)
+    janela = filtrar_alerta(indice, hoje, hoje + timedelta(days=DIAS_DE_ALERTA))
+    texto = (envio.mensagem if envio is not None else "NÃO HÁ EVENTOS") + "\n" + "".join(
+        f"  - {evento.titulo} ({evento.data_evento:%d/%m} {evento.hora_evento} | {evento.local})\n"
+        for evento in janela.itertuples(index=False)
+    )
+
+    async def entregar():
+        bot = BotFalso(latencia=contexto['latencia'], limite_por_chat=LIMITE_TELEGRAM_POR_CHAT)
+        async with EntregadorTelegram(bot, taxa_por_chat=2 * LIMITE_TELEGRAM_POR_CHAT,
+                                      rajada_por_chat=2 * LIMITE_TELEGRAM_POR_CHAT) as entregador:
+            entregues = await entregador.enviar_para_todos(chats, texto)
+        assert all(entregues.values()), entregues
+        return len(bot.mensagens)
+
+    def executar():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(entregar())
+    return executar
+
+
+CENARIOS = {
+    'carregar_dataframe': cenario_carregar_dataframe,
+    'carga_app': cenario_carga_app,
+    'carga_alerta': cenario_carga_alerta,
+    'filtro_alerta': cenario_filtro_alerta,
+    'alerta_enxuto': cenario_alerta_enxuto,
+    'exibicao_app': cenario_exibicao_app,
+    'crud_unitario': cenario_crud_unitario,
+    'crud_lote': cenario_crud_lote,
+    'crud_find': cenario_crud_find,
+    'entrega_telegram': cenario_entrega_telegram,
+}
+
+
+# =================================================================
+# === EXECUÇÃO ===
+# =================================================================
+
+def medir_cenario(nome, contexto, repeticoes):
+    """Tempo (várias repetições, sem tracemalloc) e pico de memória (uma execução à parte)."""
+    tempos = []
+    itens = 0
+    for _ in range(repeticoes):
+        executar = CENARIOS[nome](contexto)
+        inicio = time.perf_counter()
+        itens = executar()
+        tempos.append(time.perf_counter() - inicio)
+
+    executar = CENARIOS[nome](contexto)
+    tracemalloc.start()
+    try:
+        executar()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mediana = statistics.median(tempos)
+    return {
+        'cenario': nome,
+        'tamanho': contexto['tamanho'],
+        'latencia_s': contexto['latencia'],
+        'repeticoes': repeticoes,
+        'itens': itens,
+        'min_s': round(min(tempos), 6),
+        'mediana_s': round(mediana, 6),
+        'itens_por_s': round(itens / mediana, 1) if mediana else None,
+        'pico_memoria_bytes': pico,
+    }
+
+
+def _versao():
+    """Commit atual (git describe), para comparar resultados entre versões."""
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def executar_benchmark(tamanhos, cenarios, repeticoes=REPETICOES_PADRAO, latencia=0.0, semente=42):
+    resultados = []
+    for tamanho in tamanhos:
+        registros = [dict(zip(COLUNAS, linha)) for linha in gerar_linhas(tamanho, semente)]
+        contexto = {
+            'tamanho': tamanho, 'latencia': latencia, 'semente': semente,
+            'registros': registros, 'df': carregar_dataframe(registros).df,
+        }
+        for nome in cenarios:
+            resultado = medir_cenario(nome, contexto, repeticoes)
+            resultados.append(resultado)
+            print(
+                f"⏱️ {nome:<20} {tamanho:>9} eventos: {resultado['mediana_s'] * 1000:>10.1f} ms "
+                f"({resultado['itens_por_s']} itens/s, pico {resultado['pico_memoria_bytes'] / 2**20:.1f} MiB)"
+            )
+    return {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'versao': _versao(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'resultados': resultados,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da agenda com uma planilha falsa em memória.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO,
+                        help="Quantidades de eventos (ex.: 100 1000 1000000).")
+    parser.add_argument('--cenarios', nargs='+', choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO)
+    parser.add_argument('--latencia', type=float, default=0.0,
+                        help="Latência simulada por chamada à API, em segundos.")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', default=SAIDA_PADRAO, help="Arquivo JSON com os resultados.")
+    args = parser.parse_args(argv)
+
+    # O agente não deve ler nem gravar o snapshot local durante a medição
+    os.environ['AGENDA_SNAPSHOT_PATH'] = ""
+
+    relatorio = executar_benchmark(args.tamanhos, args.cenarios, args.repeticoes, args.latencia, args.semente)
+    with open(args.saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f"✅ Resultados gravados em {args.saida}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
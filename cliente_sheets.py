@@ -0,0 +1,235 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from metricas import METRICAS
+
+# --- CONFIGURAÇÕES DO CLIENTE GOOGLE SHEETS ---
+
+# Cota da API do Sheets por usuário (a conta de serviço): 60 leituras e 60 escritas por minuto
+COTA_LEITURAS_POR_MINUTO = 60
+COTA_ESCRITAS_POR_MINUTO = 60
+# Rajada permitida antes de o limitador começar a espaçar as chamadas (meia cota: sobra folga na janela de 1 minuto)
+RAJADA = 30
+# Tentativas por chamada e teto da espera entre elas (segundos)
+MAX_TENTATIVAS = 5
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 32.0
+
+# Respostas que valem nova tentativa: cota estourada e falhas temporárias do servidor
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+
+# Métodos sem efeito colateral: contam na cota de leitura, repetem em qualquer falha
+# transitória e chamadas idênticas simultâneas compartilham uma única requisição
+LEITURAS = {
+    'get_all_records', 'get_all_values', 'get_values', 'get', 'batch_get', 'col_values', 'row_values',
+    'acell', 'cell', 'find', 'findall', 'get_lastUpdateTime', 'worksheet', 'worksheets', 'fetch_sheet_metadata',
+    'open_by_key', 'open', 'open_by_url',
+}
+# Escritas que podem ser repetidas sem duplicar nada (mesmos valores nas mesmas células)
+ESCRITAS_IDEMPOTENTES = {'update', 'update_cell', 'update_acell', 'batch_clear', 'clear'}
+# Métodos cujo retorno é outra planilha/aba, que também passa pelo cliente
+RETORNAM_OBJETO = {'open_by_key', 'open', 'open_by_url', 'worksheet', 'get_worksheet', 'add_worksheet'}
+
+
+def _status_erro(erro):
+    """Status HTTP de um erro do gspread/requests (None se não houver resposta)."""
+    resposta = getattr(erro, 'response', None)
+    return getattr(resposta, 'status_code', None)
+
+
+def _erro_de_rede(erro):
+    try:
+        import requests
+    except ImportError:
+        return False
+    return isinstance(erro, (requests.ConnectionError, requests.Timeout))
+
+
+def _retry_after(erro):
+    # O Sheets raramente manda Retry-After, mas quando manda vale mais que o backoff
+    resposta = getattr(erro, 'response', None)
+    try:
+        return float(resposta.headers.get('Retry-After'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class LimitadorTaxa:
+    """Token bucket (thread-safe) de `por_minuto` fichas por minuto, acumulando até `capacidade`.
+
+    Sem ficha disponível, a chamada espera na fila em vez de falhar: sob carga,
+    o custo vira latência, não erro 429.
+    """
+
+    def __init__(self, por_minuto, capacidade=RAJADA, relogio=time.monotonic, dormir=time.sleep):
+        self.taxa = por_minuto / 60.0
+        self.capacidade = max(1, min(capacidade, por_minuto))
+        self.relogio = relogio
+        self.dormir = dormir
+        self.fichas = float(self.capacidade)
+        self.atualizado_em = relogio()
+        # Pausa imposta por uma resposta 429
+        self.pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def _repor(self, agora):
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado_em) * self.taxa)
+        self.atualizado_em = agora
+
+    def retirar(self):
+        """Bloqueia até haver uma ficha e a consome; retorna quanto tempo esperou."""
+        inicio = self.relogio()
+        while True:
+            with self._lock:
+                agora = self.relogio()
+                if agora < self.pausado_ate:
+                    espera = self.pausado_ate - agora
+                else:
+                    self._repor(agora)
+                    if self.fichas >= 1:
+                        self.fichas -= 1
+                        return agora - inicio
+                    espera = (1 - self.fichas) / self.taxa
+            self.dormir(espera)
+
+    def pausar(self, segundos):
+        """Segura todas as chamadas por `segundos` (cota estourada)."""
+        with self._lock:
+            self.pausado_ate = max(self.pausado_ate, self.relogio() + segundos)
+            self.fichas = 0.0
+
+
+def _cota(variavel, padrao):
+    try:
+        return int(os.getenv(variavel, padrao))
+    except ValueError:
+        return padrao
+
+
+class ClienteSheets:
+    """Ponto único de acesso ao gspread para o app e o agente de alerta.
+
+    Toda chamada a cliente, planilha ou aba passa por aqui:
+    - limitador de cota (leituras e escritas em baldes separados, como as cotas do Sheets);
+    - nova tentativa com backoff exponencial e jitter em 429/5xx e falhas de rede;
+    - leituras idênticas simultâneas (mesmo objeto, método e argumentos) viram uma só requisição;
+    - métricas: 'sheets.nova_tentativa', 'sheets.cota_estourada', 'sheets.leitura_compartilhada', 'sheets.espera_cota'.
+
+    Escritas que não são idempotentes (append_rows, delete_rows...) só são
+    repetidas após 429, quando o servidor garantidamente não as executou.
+    """
+
+    def __init__(self, cliente, limitador_leitura=None, limitador_escrita=None, max_tentativas=MAX_TENTATIVAS,
+                 metricas=None, dormir=time.sleep):
+        self.cliente = cliente
+        self.leitura = limitador_leitura or LIMITADOR_LEITURA
+        self.escrita = limitador_escrita or LIMITADOR_ESCRITA
+        self.max_tentativas = max_tentativas
+        self.metricas = metricas or METRICAS
+        self.dormir = dormir
+        self._em_andamento = {}
+        self._lock = threading.Lock()
+
+    def abrir(self, planilha_id):
+        """open_by_key com limitador e novas tentativas; retorna a planilha protegida."""
+        return self.proteger(self.cliente).open_by_key(planilha_id)
+
+    def proteger(self, alvo):
+        """Proxy do objeto gspread (cliente, planilha ou aba) que passa pelo limitador e pelas novas tentativas."""
+        if isinstance(alvo, ObjetoProtegido):
+            return alvo
+        return ObjetoProtegido(alvo, self)
+
+    # --- EXECUÇÃO DE UMA CHAMADA ---
+
+    def chamar(self, alvo, nome, args, kwargs):
+        funcao = getattr(alvo, nome)
+        if nome not in LEITURAS:
+            return self._executar(nome, funcao, args, kwargs)
+
+        try:
+            chave = (id(alvo), nome, args, tuple(sorted(kwargs.items())))
+            hash(chave)
+        except TypeError:
+            return self._executar(nome, funcao, args, kwargs)
+
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._em_andamento[chave] = Future()
+
+        if not lider:
+            self.metricas.contar('sheets.leitura_compartilhada')
+            resultado = futuro.result()
+        else:
+            try:
+                resultado = self._executar(nome, funcao, args, kwargs)
+                futuro.set_result(resultado)
+            except BaseException as e:
+                futuro.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    self._em_andamento.pop(chave, None)
+        # Cada chamador recebe a sua lista (o conteúdo é compartilhado, somente leitura)
+        return list(resultado) if isinstance(resultado, list) else resultado
+
+    def _executar(self, nome, funcao, args, kwargs):
+        leitura = nome in LEITURAS
+        limitador = self.leitura if leitura else self.escrita
+        repetivel = leitura or nome in ESCRITAS_IDEMPOTENTES
+
+        for tentativa in range(1, self.max_tentativas + 1):
+            espera_cota = limitador.retirar()
+            if espera_cota > 0:
+                self.metricas.registrar('sheets.espera_cota', espera_cota)
+            try:
+                return funcao(*args, **kwargs)
+            except Exception as e:
+                status = _status_erro(e)
+                if status == 429:
+                    self.metricas.contar('sheets.cota_estourada')
+                elif not (repetivel and (status in STATUS_TRANSITORIOS or _erro_de_rede(e))):
+                    raise
+                if tentativa == self.max_tentativas:
+                    raise
+
+                # Backoff exponencial com jitter ("full jitter"); Retry-After do servidor, se houver
+                espera = _retry_after(e) or random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** tentativa))
+                if status == 429:
+                    # A cota é do usuário inteiro: todas as threads esperam
+                    limitador.pausar(espera)
+                else:
+                    self.dormir(espera)
+                self.metricas.contar('sheets.nova_tentativa')
+                print(f"⏳ Sheets {nome}: falha temporária ({status or e}); nova tentativa {tentativa + 1}/{self.max_tentativas} em {espera:.1f}s.")
+
+
+class ObjetoProtegido:
+    """Proxy de Client/Spreadsheet/Worksheet do gspread: métodos passam pelo ClienteSheets."""
+
+    def __init__(self, alvo, cliente_sheets):
+        self._alvo = alvo
+        self._cliente_sheets = cliente_sheets
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._alvo, nome)
+        if not callable(atributo):
+            return atributo
+
+        def chamada(*args, **kwargs):
+            resultado = self._cliente_sheets.chamar(self._alvo, nome, args, kwargs)
+            if nome in RETORNAM_OBJETO and resultado is not None:
+                return self._cliente_sheets.proteger(resultado)
+            return resultado
+
+        return chamada
+
+
+# Limitadores do processo: a cota é da conta de serviço, então todos os clientes dividem os mesmos baldes
+LIMITADOR_LEITURA = LimitadorTaxa(_cota("AGENDA_SHEETS_LEITURAS_POR_MINUTO", COTA_LEITURAS_POR_MINUTO))
+LIMITADOR_ESCRITA = LimitadorTaxa(_cota("AGENDA_SHEETS_ESCRITAS_POR_MINUTO", COTA_ESCRITAS_POR_MINUTO))
@@ -0,0 +1,174 @@
+import asyncio
+import random
+import time
+
+from metricas import METRICAS
+
+# --- CONFIGURAÇÕES DA ENTREGA NO TELEGRAM ---
+
+# Tamanho máximo de uma mensagem de texto na API do Telegram
+LIMITE_MENSAGEM = 4096
+# Limites de envio do Telegram: ~30 mensagens/s no total e ~1 mensagem/s por chat
+TAXA_GLOBAL = 25
+TAXA_POR_CHAT = 1
+RAJADA_POR_CHAT = 3
+# Tentativas por mensagem (429 com retry_after, timeout ou falha de rede)
+MAX_TENTATIVAS = 4
+
+
+def chats_configurados(valor):
+    """'123, -100456' -> ['123', '-100456'] (TELEGRAM_CHAT_ID aceita vários chats separados por vírgula)."""
+    return [chat.strip() for chat in str(valor or "").split(',') if chat.strip()]
+
+
+def dividir_mensagem(texto, limite=LIMITE_MENSAGEM):
+    """Quebra o texto em partes de até `limite` caracteres, preferindo quebras de linha.
+
+    Os alertas são montados linha a linha, então cortar entre linhas não
+    quebra a formatação Markdown; só uma linha maior que o limite é cortada no meio.
+    """
+    if len(texto) <= limite:
+        return [texto]
+    partes, atual = [], ""
+    for linha in texto.splitlines(keepends=True):
+        while len(linha) > limite:
+            if atual:
+                partes.append(atual)
+                atual = ""
+            partes.append(linha[:limite])
+            linha = linha[limite:]
+        if len(atual) + len(linha) > limite:
+            partes.append(atual)
+            atual = ""
+        atual += linha
+    if atual:
+        partes.append(atual)
+    return partes
+
+
+def _segundos(retry_after):
+    # python-telegram-bot entrega int ou timedelta, conforme a versão
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+
+class BaldeTokens:
+    """Token bucket assíncrono: `taxa` fichas por segundo, acumulando até `capacidade`."""
+
+    def __init__(self, taxa, capacidade=None, relogio=time.monotonic):
+        self.taxa = taxa
+        self.capacidade = capacidade or max(1, taxa)
+        self.relogio = relogio
+        self.fichas = float(self.capacidade)
+        self.atualizado_em = relogio()
+        # Pausa imposta por um retry_after do servidor
+        self.pausado_ate = 0.0
+        self._lock = asyncio.Lock()
+
+    def _repor(self, agora):
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado_em) * self.taxa)
+        self.atualizado_em = agora
+
+    async def retirar(self):
+        """Espera até haver uma ficha e a consome (chamadores são atendidos em ordem)."""
+        async with self._lock:
+            while True:
+                agora = self.relogio()
+                if agora < self.pausado_ate:
+                    await asyncio.sleep(self.pausado_ate - agora)
+                    continue
+                self._repor(agora)
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                await asyncio.sleep((1 - self.fichas) / self.taxa)
+
+    def pausar(self, segundos):
+        """Bloqueia o balde por `segundos` (resposta 429 com retry_after)."""
+        self.pausado_ate = max(self.pausado_ate, self.relogio() + segundos)
+        self.fichas = 0.0
+
+
+class EntregadorTelegram:
+    """Entrega assíncrona com um único Bot (uma sessão HTTP) para todos os envios.
+
+    Uso: `async with EntregadorTelegram(bot) as entregador: await entregador.enviar_para_todos(...)`.
+    Cada chat tem o seu balde de fichas e todos dividem um balde global; um
+    429 pausa, pelo retry_after informado pelo Telegram, o balde do chat e
+    também o global (o limite estourado costuma ser o do bot inteiro).
+    """
+
+    def __init__(self, bot, taxa_global=TAXA_GLOBAL, taxa_por_chat=TAXA_POR_CHAT,
+                 rajada_por_chat=RAJADA_POR_CHAT, max_tentativas=MAX_TENTATIVAS, limite=LIMITE_MENSAGEM):
+        self.bot = bot
+        self.taxa_por_chat = taxa_por_chat
+        self.rajada_por_chat = rajada_por_chat
+        self.max_tentativas = max_tentativas
+        self.limite = limite
+        self.balde_global = BaldeTokens(taxa_global)
+        self._baldes = {}
+        # Mensagens de um mesmo chat saem em ordem (partes de um resumo longo)
+        self._locks_chat = {}
+
+    async def __aenter__(self):
+        await self.bot.initialize()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.bot.shutdown()
+
+    def _balde(self, chat_id):
+        if chat_id not in self._baldes:
+            self._baldes[chat_id] = BaldeTokens(self.taxa_por_chat, self.rajada_por_chat)
+            self._locks_chat[chat_id] = asyncio.Lock()
+        return self._baldes[chat_id]
+
+    async def _enviar_parte(self, chat_id, texto, **opcoes):
+        from telegram.error import NetworkError, RetryAfter, TimedOut
+
+        balde = self._balde(chat_id)
+        for tentativa in range(1, self.max_tentativas + 1):
+            await balde.retirar()
+            await self.balde_global.retirar()
+            try:
+                with METRICAS.medir('telegram.send_message') as info:
+                    info['bytes'] = len(texto.encode('utf-8'))
+                    await self.bot.send_message(chat_id=chat_id, text=texto, **opcoes)
+                return True
+            except RetryAfter as e:
+                espera = _segundos(e.retry_after)
+                METRICAS.contar('telegram.retry_after')
+                print(f"⏳ Telegram pediu {espera:.0f}s de pausa para o chat {chat_id} (tentativa {tentativa}).")
+                balde.pausar(espera)
+                self.balde_global.pausar(espera)
+            except (TimedOut, NetworkError) as e:
+                if tentativa == self.max_tentativas:
+                    raise
+                METRICAS.contar('telegram.nova_tentativa')
+                # Backoff exponencial com jitter
+                await asyncio.sleep(min(30, 2 ** tentativa) * random.uniform(0.5, 1.0))
+        return False
+
+    async def enviar(self, chat_id, texto, **opcoes):
+        """Envia o texto a um chat (dividido no limite do Telegram). Retorna True se todas as partes foram entregues."""
+        self._balde(chat_id)
+        async with self._locks_chat[chat_id]:
+            for parte in dividir_mensagem(texto, self.limite):
+                try:
+                    if not await self._enviar_parte(chat_id, parte, **opcoes):
+                        return False
+                except Exception as e:
+                    print(f"🚨 Erro ao enviar mensagem para o chat {chat_id}: {e}")
+                    return False
+        return True
+
+    async def enviar_para_todos(self, chats, texto, **opcoes):
+        """Envia o mesmo texto a vários chats em paralelo; retorna {chat_id: entregue}."""
+        resultados = await asyncio.gather(*(self.enviar(chat, texto, **opcoes) for chat in chats))
+        return dict(zip(chats, resultados))
+
+
+def criar_entregador(token, **opcoes):
+    """EntregadorTelegram sobre um Bot real (import tardio do python-telegram-bot)."""
+    from telegram import Bot
+
+    return EntregadorTelegram(Bot(token=token), **opcoes)
@@ -0,0 +1,805 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import Operacao
+from metricas import METRICAS, medido
+from recorrencia import MAX_JANELAS_MEMORIZADAS, interpretar_regra, ocorrencias, regra_valida
+from registros import FORMATOS_DATA, FORMATOS_HORA, SERIAL_MAXIMO
+from snapshot import carregar_snapshot, salvar_snapshot
+
+# --- CONFIGURAÇÕES DOS EVENTOS ---
+
+# Ordem de prioridade para exibição: 1-Pendente, 2-Concluído, 3-Cancelado
+STATUS_PRIORITY_MAP = {
+    'Pendente': 1,
+    'Concluído': 2,
+    'Cancelado': 3
+}
+
+# --- ESQUEMA DE CARGA ---
+
+# Datas/horas chegam como número serial do Sheets (UNFORMATTED_VALUE) ou como texto (formatos em registros.py)
+EPOCA_SHEETS = pd.Timestamp('1899-12-30')
+
+# Colunas de texto livre: sempre str (planilhas editadas à mão misturam números e texto, ex.: local 305 e 'Sala')
+COLUNAS_TEXTO = ['id_evento', 'titulo', 'descricao', 'local', 'recorrencia']
+
+# Rótulo 'HH:MM' de cada minuto do dia (conversão vetorizada de hora para texto)
+ROTULOS_HORA = np.array([f"{minuto // 60:02d}:{minuto % 60:02d}" for minuto in range(24 * 60)], dtype=object)
+
+# Resultado da carga: DataFrame tipado e registros rejeitados (com o campo 'motivo')
+ResultadoCarga = namedtuple('ResultadoCarga', ['df', 'rejeitados'])
+
+# Intervalo mínimo (segundos) entre verificações de mudança na origem
+INTERVALO_VERIFICACAO = 10
+
+# Quantas linhas cada sincronização moveu (completa=True quando foi recarga total)
+ResultadoSync = namedtuple('ResultadoSync', ['inseridos', 'atualizados', 'removidos', 'completa'])
+
+
+# =================================================================
+# === MONTAGEM DO DATAFRAME ===
+# =================================================================
+
+def _texto(serie):
+    return serie.astype(str).str.strip()
+
+
+def tipar_textos(df):
+    """Colunas de COLUNAS_TEXTO como str (vazios continuam NaN): uma coluna mista não é aceita pelo Parquet."""
+    for coluna in COLUNAS_TEXTO:
+        if coluna in df.columns and pd.api.types.infer_dtype(df[coluna], skipna=True) not in ('string', 'empty'):
+            df[coluna] = df[coluna].where(df[coluna].isna(), df[coluna].astype(str))
+    return df
+
+
+def converter_datas(serie):
+    """Série de datas (datetime64, sem hora): serial do Sheets ou texto nos FORMATOS_DATA."""
+    numeros = pd.to_numeric(serie, errors='coerce')
+    numeros = numeros.where((numeros > 0) & (numeros < SERIAL_MAXIMO))
+    datas = EPOCA_SHEETS + pd.to_timedelta(np.floor(numeros), unit='D')
+
+    pendentes = datas.isna() & serie.notna()
+    for formato in FORMATOS_DATA:
+        if not pendentes.any():
+            break
+        convertidas = pd.to_datetime(_texto(serie[pendentes]), format=formato, errors='coerce')
+        datas = datas.fillna(convertidas.dt.normalize())
+        pendentes &= datas.isna()
+    return datas
+
+
+def converter_horas(serie):
+    """Série de horas (timedelta64): fração de dia do Sheets ou texto nos FORMATOS_HORA. Vazio = 00:00."""
+    numeros = pd.to_numeric(serie, errors='coerce')
+    horas = pd.to_timedelta((numeros % 1).where(numeros >= 0), unit='D').dt.round('s')
+
+    vazias = serie.isna() | (_texto(serie) == '')
+    horas[vazias] = pd.Timedelta(0)
+
+    pendentes = horas.isna()
+    for formato in FORMATOS_HORA:
+        if not pendentes.any():
+            break
+        convertidas = pd.to_datetime(_texto(serie[pendentes]), format=formato, errors='coerce')
+        horas = horas.fillna(convertidas - convertidas.dt.normalize())
+        pendentes &= horas.isna()
+    return horas
+
+
+def tipar_status(serie):
+    """Status como categórico: os conhecidos na ordem de prioridade, depois os demais."""
+    valores = serie.fillna('').astype(str)
+    conhecidos = sorted(STATUS_PRIORITY_MAP, key=STATUS_PRIORITY_MAP.get)
+    extras = sorted(set(valores.unique()) - set(conhecidos))
+    return pd.Series(pd.Categorical(valores, categories=conhecidos + extras), index=serie.index)
+
+
+def ordem_status(status):
+    """Ordem_Status derivada dos códigos da categoria (99 para status desconhecido)."""
+    prioridades = np.array(
+        [STATUS_PRIORITY_MAP.get(categoria, 99) for categoria in status.cat.categories], dtype='int8'
+    )
+    return pd.Series(prioridades[status.cat.codes.to_numpy()], index=status.index)
+
+
+@medido('eventos.carregar_dataframe')
+def carregar_dataframe(registros):
+    """Carga tipada dos registros (get_all_records), igual para o app e o agente de alerta.
+
+    - id_evento, titulo, descricao, local, recorrencia: str (vazios como NaN)
+    - data_evento: datetime64 (data); hora_evento: texto 'HH:MM' normalizado
+    - data_hora_ordenacao: data + hora, sem concatenar texto
+    - status: categórico; Ordem_Status: int8 a partir dos códigos
+    - recorrencia (se houver): regra da série; a linha é a primeira ocorrência
+    Linhas com data, hora ou recorrência inválida vão para `rejeitados` (com o 'motivo').
+    """
+    df = tipar_textos(pd.DataFrame(registros))
+
+    if df.empty or 'data_evento' not in df.columns or 'hora_evento' not in df.columns:
+        return ResultadoCarga(df, [])
+
+    datas = converter_datas(df['data_evento'])
+    horas = converter_horas(df['hora_evento'])
+    validas = datas.notna() & horas.notna()
+    if 'recorrencia' in df.columns:
+        com_regra = tem_regra(df['recorrencia'])
+        if com_regra.any():
+            # Só as poucas linhas-mestre passam pelo interpretador (memorizado por texto)
+            validas.loc[com_regra] &= df.loc[com_regra, 'recorrencia'].astype(str).map(regra_valida).isna()
+
+    rejeitados = []
+    if not validas.all():
+        invalidas = df[~validas].copy()
+        invalidas['motivo'] = np.select(
+            [datas[~validas].isna(), horas[~validas].isna()], ['data inválida', 'hora inválida'], 'recorrência inválida'
+        )
+        rejeitados = invalidas.to_dict('records')
+        df = df[validas].copy()
+        datas, horas = datas[validas], horas[validas]
+
+    minutos = (horas.dt.total_seconds().to_numpy() // 60).astype('int64') % (24 * 60)
+    df['data_evento'] = datas
+    df['hora_evento'] = ROTULOS_HORA[minutos]
+    df['data_hora_ordenacao'] = datas + horas
+    df['status'] = tipar_status(df['status'] if 'status' in df.columns else pd.Series('', index=df.index))
+    df['Ordem_Status'] = ordem_status(df['status'])
+
+    return ResultadoCarga(df, rejeitados)
+
+
+def montar_dataframe(registros):
+    """Converte registros (get_all_records) no DataFrame com as colunas de ordenação."""
+    return carregar_dataframe(registros).df
+
+
+def concatenar_eventos(df, linhas):
+    """Junta linhas novas ao DataFrame mantendo o status categórico."""
+    if linhas is None or linhas.empty:
+        return df
+    if df.empty:
+        return linhas
+    combinado = pd.concat([df, linhas], ignore_index=True)
+    # Categorias diferentes (status novo) fazem o concat cair para object
+    if 'status' in combinado.columns and not isinstance(combinado['status'].dtype, pd.CategoricalDtype):
+        combinado['status'] = tipar_status(combinado['status'])
+    return combinado
+
+
+def mesclar_delta(indice, alteracoes, carga):
+    """Mescla um delta (AlteracoesEventos + sua carga tipada) no IndiceEventos por id_evento.
+
+    Retorna (novo IndiceEventos, ResultadoSync).
+    """
+    df = indice.df
+    # ids comparados como texto, como na coluna id_evento do DataFrame
+    ids_alterados = {str(reg.get('id_evento')) for reg in alteracoes.alterados}
+    ids_removidos = {str(id_evento) for id_evento in alteracoes.removidos}
+    atualizados = removidos = 0
+
+    if (ids_alterados or ids_removidos) and 'id_evento' in df.columns:
+        presentes = df['id_evento'].isin(ids_alterados | ids_removidos)
+        ids_presentes = set(df.loc[presentes, 'id_evento'])
+        atualizados = len(ids_alterados & ids_presentes)
+        removidos = len(ids_removidos & ids_presentes)
+
+    indice = indice.atualizar(ids_alterados | ids_removidos, carga.df)
+    return indice, ResultadoSync(len(ids_alterados) - atualizados, atualizados, removidos, False)
+
+
+# =================================================================
+# === SÉRIES DE UM ÍNDICE (EXPANSÃO POR JANELA, MEMORIZADA) ===
+# =================================================================
+
+def tem_regra(serie):
+    """Máscara das linhas com regra de recorrência preenchida."""
+    return serie.notna() & (serie.astype(str).str.strip() != '')
+
+
+def eh_ocorrencia(df):
+    """Máscara das linhas geradas pela expansão de uma série (não armazenadas)."""
+    if 'ocorrencia' not in df.columns:
+        return pd.Series(False, index=df.index)
+    return df['ocorrencia'].eq(True)
+
+
+def chaves_ocorrencia(df):
+    """Chave única por linha: id_evento, ou 'id_evento@AAAA-MM-DDTHH:MM' para cada ocorrência de uma série."""
+    chaves = df['id_evento'].astype(str)
+    ocorrencias_df = eh_ocorrencia(df).to_numpy()
+    if ocorrencias_df.any():
+        # Por posição: as ocorrências de uma série repetem o rótulo da linha-mestre
+        valores = chaves.to_numpy(dtype=object).copy()
+        momentos = df['data_hora_ordenacao'].to_numpy()[ocorrencias_df]
+        valores[ocorrencias_df] = valores[ocorrencias_df] + '@' + pd.DatetimeIndex(momentos).strftime('%Y-%m-%dT%H:%M').to_numpy(dtype=object)
+        chaves = pd.Series(valores, index=df.index)
+    return chaves
+
+
+class SeriesRecorrentes:
+    """Linhas-mestre (uma por série) de um IndiceEventos e suas expansões por janela.
+
+    O armazenamento e a carga só conhecem a linha-mestre; as ocorrências são
+    geradas sob demanda para a janela consultada [inicio, fim) e guardadas
+    por janela (as reexecuções do app e o agente consultam sempre as mesmas).
+    Como o índice, é imutável: uma nova carga cria outro objeto (e outra memória).
+    """
+
+    def __init__(self, mestres=None):
+        self.mestres = mestres if mestres is not None else pd.DataFrame()
+        self._regras = [interpretar_regra(texto) for texto in self.mestres.get('recorrencia', [])]
+        if len(self.mestres):
+            self._inicios = list(self.mestres['data_hora_ordenacao'].dt.to_pydatetime())
+            self._ordens = self.mestres['Ordem_Status'].to_numpy()
+        else:
+            self._inicios, self._ordens = [], np.array([], dtype='int8')
+        self._janelas = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def do_dataframe(cls, df):
+        """Séries do DataFrame tipado (linhas com 'recorrencia' válida; as demais são eventos comuns)."""
+        if df.empty or 'recorrencia' not in df.columns:
+            return cls()
+        mascara = tem_regra(df['recorrencia'])
+        if not mascara.any():
+            return cls()
+        mestres = df[mascara]
+        validas = mestres['recorrencia'].map(lambda texto: regra_valida(texto) is None).to_numpy(dtype=bool)
+        return cls(mestres[validas])
+
+    def __len__(self):
+        return len(self.mestres)
+
+    @property
+    def posicoes(self):
+        """Rótulos (posições no DataFrame do índice) das linhas-mestre, em ordem crescente."""
+        return self.mestres.index.to_numpy()
+
+    def _montar(self, posicoes, momentos):
+        """DataFrame de ocorrências: cópia das linhas-mestre com data/hora de cada ocorrência."""
+        if not momentos:
+            return self.mestres.iloc[0:0].assign(ocorrencia=True)
+        posicoes = np.asarray(posicoes)
+        momentos = np.array(momentos, dtype='datetime64[ns]')
+        # Ordena antes de copiar: uma única cópia das linhas-mestre, já na ordem final
+        ordem = np.lexsort((momentos, self._ordens[posicoes]))
+        linhas = self.mestres.iloc[posicoes[ordem]]
+        momentos = pd.DatetimeIndex(momentos[ordem])
+        return linhas.assign(
+            data_evento=momentos.normalize(),
+            hora_evento=momentos.strftime('%H:%M'),
+            data_hora_ordenacao=momentos,
+            ocorrencia=True,
+        )
+
+    def expandir(self, inicio, fim):
+        """Ocorrências de todas as séries com data/hora em [inicio, fim), na ordem (Ordem_Status, data/hora)."""
+        janela = (pd.Timestamp(inicio), pd.Timestamp(fim))
+        with self._lock:
+            if janela in self._janelas:
+                self._janelas.move_to_end(janela)
+                return self._janelas[janela]
+
+        posicoes, momentos = [], []
+        fim_janela = janela[1].to_pydatetime()
+        for posicao, (inicio_serie, regra) in enumerate(zip(self._inicios, self._regras)):
+            if inicio_serie >= fim_janela or (regra.ate is not None and regra.ate < janela[0].date()):
+                continue
+            for momento in ocorrencias(inicio_serie, regra, janela[0]):
+                if momento >= janela[1]:
+                    break
+                posicoes.append(posicao)
+                momentos.append(momento)
+        expandidas = self._montar(posicoes, momentos)
+
+        with self._lock:
+            self._janelas[janela] = expandidas
+            while len(self._janelas) > MAX_JANELAS_MEMORIZADAS:
+                self._janelas.popitem(last=False)
+        return expandidas
+
+    def proximas(self, n, a_partir, status):
+        """As `n` primeiras ocorrências a partir de `a_partir` de cada série do status (no máximo n por série)."""
+        posicoes, momentos = [], []
+        if len(self):
+            status_series = self.mestres['status'].astype(str).to_numpy()
+            for posicao, (inicio_serie, regra) in enumerate(zip(self._inicios, self._regras)):
+                if status_series[posicao] != status:
+                    continue
+                for momento in itertools.islice(ocorrencias(inicio_serie, regra, a_partir), n):
+                    posicoes.append(posicao)
+                    momentos.append(momento)
+        return self._montar(posicoes, momentos)
+
+    def mestre(self, id_evento):
+        """Linha-mestre (Series) da série `id_evento`, ou None."""
+        if not len(self):
+            return None
+        encontrados = self.mestres[self.mestres['id_evento'] == id_evento]
+        return encontrados.iloc[0] if not encontrados.empty else None
+
+
+# =================================================================
+# === ÍNDICE ORDENADO (CONSULTAS POR STATUS E PERÍODO) ===
+# =================================================================
+
+def _como_datetime64(momento):
+    return np.datetime64(pd.Timestamp(momento), 'ns')
+
+
+class IndiceEventos:
+    """DataFrame da agenda na ordem de exibição (Ordem_Status, data_hora_ordenacao), com um balde por status.
+
+    Cada status ocupa uma faixa contígua de linhas, já ordenada por data/hora:
+    "pendentes entre T1 e T2", "próximos N" e "atrasados" são buscas binárias
+    (np.searchsorted) que devolvem fatias, sem máscaras sobre a coluna inteira
+    nem nova ordenação. O índice é imutável: atualizar() devolve outro,
+    encaixando as linhas novas nas posições certas em vez de reordenar tudo.
+
+    Séries recorrentes ficam no DataFrame como uma linha-mestre (a primeira
+    ocorrência, com a regra em 'recorrencia'). Consultas com janela fechada
+    (entre, filtrar com período) trocam a linha-mestre pelas ocorrências da
+    janela, geradas sob demanda e memorizadas por janela (coluna 'ocorrencia'
+    = True); sem período, a série aparece uma vez, pela linha-mestre.
+    """
+
+    def __init__(self, df=None, ordenado=False):
+        if df is None or df.empty or 'data_hora_ordenacao' not in df.columns:
+            self.df = df if df is not None else pd.DataFrame()
+            self._ordens = np.array([], dtype='int8')
+            self._tempos = np.array([], dtype='datetime64[ns]')
+            self._faixas = {}
+            self._series = None
+            self._janelas = {}
+            return
+
+        if not ordenado and not self._em_ordem(df):
+            # Estável: empates mantêm a ordem da planilha
+            df = df.sort_values(['Ordem_Status', 'data_hora_ordenacao'], kind='stable')
+        self.df = df.reset_index(drop=True)
+        self._ordens = self.df['Ordem_Status'].to_numpy()
+        self._tempos = self.df['data_hora_ordenacao'].to_numpy(dtype='datetime64[ns]')
+        # Ordem_Status -> (início, fim) da faixa de linhas do balde
+        inicios = np.concatenate(([0], np.flatnonzero(np.diff(self._ordens)) + 1))
+        fins = np.append(inicios[1:], len(self._ordens))
+        self._faixas = {int(self._ordens[ini]): (int(ini), int(fim)) for ini, fim in zip(inicios, fins)}
+        # Montadas na primeira consulta que precisa delas
+        self._series = None
+        # (status, inicio, fim) -> resultado de _linhas com as séries expandidas
+        self._janelas = {}
+
+    @staticmethod
+    def _em_ordem(df):
+        ordens = df['Ordem_Status'].to_numpy()
+        tempos = df['data_hora_ordenacao'].to_numpy()
+        return bool(np.all(
+            (ordens[1:] > ordens[:-1]) | ((ordens[1:] == ordens[:-1]) & (tempos[1:] >= tempos[:-1]))
+        ))
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def series(self):
+        """SeriesRecorrentes do índice (linhas com 'recorrencia' válida)."""
+        if self._series is None:
+            self._series = SeriesRecorrentes.do_dataframe(self.df)
+        return self._series
+
+    # --- CONSULTAS ---
+
+    def _fatia(self, ordem, inicio=None, fim=None):
+        """Linhas do balde `ordem` com data/hora em [inicio, fim) como (início, fim) posicionais."""
+        ini, fim_faixa = self._faixas.get(ordem, (0, 0))
+        tempos = self._tempos[ini:fim_faixa]
+        a = ini + (int(np.searchsorted(tempos, _como_datetime64(inicio), 'left')) if inicio is not None else 0)
+        b = ini + (int(np.searchsorted(tempos, _como_datetime64(fim), 'left')) if fim is not None else len(tempos))
+        return a, b
+
+    def _sem_mestres(self, fatia, a, b):
+        """Fatia [a, b) do DataFrame sem as linhas-mestre das séries (rótulos = posições)."""
+        posicoes = self.series.posicoes
+        dentro = posicoes[np.searchsorted(posicoes, a):np.searchsorted(posicoes, b)]
+        return fatia.drop(index=dentro, errors='ignore') if len(dentro) else fatia
+
+    @staticmethod
+    def _juntar(linhas, ocorrencias, colunas):
+        if ocorrencias.empty:
+            return linhas
+        return pd.concat([linhas, ocorrencias]).sort_values(colunas, kind='stable')
+
+    def _linhas(self, status, inicio=None, fim=None, series='manter'):
+        """Fatia do status; `series`: 'manter' (linha-mestre), 'omitir' ou 'expandir' (ocorrências em [inicio, fim))."""
+        janela = (status, pd.Timestamp(inicio), pd.Timestamp(fim)) if series == 'expandir' else None
+        if janela in self._janelas:
+            return self._janelas[janela]
+        ordem = STATUS_PRIORITY_MAP.get(status, 99)
+        a, b = self._fatia(ordem, inicio, fim)
+        fatia = self.df.iloc[a:b]
+        if ordem == 99:
+            # Status desconhecidos dividem o mesmo balde
+            fatia = fatia[fatia['status'] == status]
+        if series == 'manter' or not len(self.series):
+            return fatia
+        fatia = self._sem_mestres(fatia, a, b)
+        if series == 'omitir':
+            return fatia
+
+        ocorrencias = self.series.expandir(inicio, fim)
+        linhas = self._juntar(fatia, ocorrencias[ocorrencias['status'] == status], 'data_hora_ordenacao')
+        self._janelas[janela] = linhas
+        if len(self._janelas) > MAX_JANELAS_MEMORIZADAS:
+            self._janelas.pop(next(iter(self._janelas)), None)
+        return linhas
+
+    def entre(self, inicio, fim, status='Pendente'):
+        """Eventos do status com data/hora em [inicio, fim), do mais próximo ao mais distante (séries expandidas)."""
+        return self._linhas(status, inicio, fim, series='expandir')
+
+    def proximos(self, n, a_partir=None, status='Pendente'):
+        """Os `n` próximos eventos do status a partir de `a_partir` (padrão: agora), incluindo ocorrências."""
+        a_partir = a_partir or datetime.now()
+        linhas = self._linhas(status, a_partir, series='omitir').head(n)
+        if not len(self.series):
+            return linhas
+        return self._juntar(linhas, self.series.proximas(n, a_partir, status), 'data_hora_ordenacao').head(n)
+
+    def atrasados(self, agora=None, status='Pendente'):
+        """Eventos do status com data/hora já passada (padrão: pendentes antes de agora).
+
+        Séries recorrentes não entram: ocorrências passadas não ficam "atrasadas".
+        """
+        return self._linhas(status, fim=agora or datetime.now(), series='omitir')
+
+    def filtrar(self, status=None, inicio=None, fim=None):
+        """Lista do app: status (lista) e período [inicio, fim] em datas inclusivas, já na ordem de exibição.
+
+        Com o período completo, as séries recorrentes aparecem como as ocorrências do período.
+        """
+        if not self._faixas or (not status and inicio is None and fim is None):
+            return self.df
+        fim = pd.Timestamp(fim) + pd.Timedelta(days=1) if fim is not None else None
+        expandir = inicio is not None and fim is not None and len(self.series) > 0
+        if status:
+            partes = [
+                self._linhas(nome, inicio, fim, series='expandir' if expandir else 'manter')
+                for nome in sorted(set(status), key=lambda nome: STATUS_PRIORITY_MAP.get(nome, 99))
+            ]
+            return pd.concat(partes) if len(partes) > 1 else partes[0]
+
+        partes = []
+        for ordem in sorted(self._faixas):
+            a, b = self._fatia(ordem, inicio, fim)
+            partes.append(self._sem_mestres(self.df.iloc[a:b], a, b) if expandir else self.df.iloc[a:b])
+        linhas = pd.concat(partes) if len(partes) > 1 else partes[0]
+        if expandir:
+            linhas = self._juntar(linhas, self.series.expandir(inicio, fim), ['Ordem_Status', 'data_hora_ordenacao'])
+        return linhas
+
+    # --- MANUTENÇÃO INCREMENTAL ---
+
+    def atualizar(self, ids_removidos=(), linhas=None):
+        """Novo índice sem os ids removidos e com as `linhas` (DataFrame tipado) encaixadas por busca binária."""
+        df = self.df
+        manter = None
+        if ids_removidos and 'id_evento' in df.columns and not df.empty:
+            manter = ~df['id_evento'].isin({str(id_evento) for id_evento in ids_removidos}).to_numpy()
+        if linhas is None or linhas.empty:
+            # Remover linhas não altera a ordem das restantes
+            return self if manter is None else IndiceEventos(df[manter], ordenado=True)
+        if not self._faixas:
+            return IndiceEventos(concatenar_eventos(df if manter is None else df[manter], linhas))
+
+        restantes = np.arange(len(df)) if manter is None else np.flatnonzero(manter)
+        ordens, tempos = self._ordens[restantes], self._tempos[restantes]
+        novas = IndiceEventos(linhas)
+        posicoes = np.empty(len(novas), dtype='int64')
+        for ordem, (ini, fim) in novas._faixas.items():
+            # Balde do status entre as linhas restantes (vazio: posição entre os vizinhos de prioridade)
+            inicio_balde = np.searchsorted(ordens, ordem, 'left')
+            fim_balde = np.searchsorted(ordens, ordem, 'right')
+            posicoes[ini:fim] = inicio_balde + np.searchsorted(
+                tempos[inicio_balde:fim_balde], novas._tempos[ini:fim], 'right'
+            )
+
+        # Uma cópia só: linhas restantes e novas, já na ordem final
+        ordem_linhas = np.insert(restantes, posicoes, len(df) + np.arange(len(novas)))
+        return IndiceEventos(concatenar_eventos(df, novas.df).iloc[ordem_linhas], ordenado=True)
+
+
+# =================================================================
+# === PAGINAÇÃO ===
+# =================================================================
+
+def paginar(df, pagina, tamanho_pagina):
+    """Retorna (fatia da página, página ajustada ao intervalo válido, total de páginas)."""
+    total_paginas = max(1, -(-len(df) // tamanho_pagina))
+    pagina = min(max(1, pagina), total_paginas)
+    inicio = (pagina - 1) * tamanho_pagina
+    return df.iloc[inicio:inicio + tamanho_pagina], pagina, total_paginas
+
+
+# =================================================================
+# === CACHE RESIDENTE (MUTAÇÃO OTIMISTA) ===
+# =================================================================
+
+class CacheEventos:
+    """DataFrame residente da agenda, compartilhado entre as sessões.
+
+    As escritas do próprio app são aplicadas direto no DataFrame (apenas a
+    linha afetada é remontada). A cada intervalo, a origem é sincronizada de
+    forma incremental (store.ler_alteracoes): só as linhas novas/alteradas são
+    remontadas e mescladas por id_evento. A recarga completa fica para quando
+    o motor não consegue calcular o delta.
+
+    A sincronização roda em uma única thread de fundo (stale-while-revalidate):
+    quem lê recebe na hora o último snapshot bom, e pedidos simultâneos de
+    atualização viram uma só leitura na origem. Só a primeira carga (sem
+    snapshot) e a recarga forçada bloqueiam quem chamou.
+
+    O DataFrame publicado nunca é alterado: cada mutação gera um novo objeto
+    (copy-on-write), então leitores em outras threads não veem estados parciais.
+
+    Com `caminho_snapshot`, a última carga também fica em Parquet no disco: a
+    partida a frio serve esse arquivo na hora e reconcilia com a origem em
+    segundo plano, a partir da marca d'água (assinatura) gravada junto.
+    """
+
+    def __init__(self, intervalo_verificacao=INTERVALO_VERIFICACAO, caminho_snapshot=None):
+        self.intervalo_verificacao = intervalo_verificacao
+        self.caminho_snapshot = caminho_snapshot
+        # IndiceEventos do snapshot publicado (df ordenado + baldes por status)
+        self.indice = None
+        self.assinatura = None
+        self.ultima_verificacao = 0.0
+        self.ultimo_sync = None
+        # Linhas descartadas na carga (data/hora inválida), com o motivo
+        self.rejeitados = []
+        # Telemetria do snapshot (exibida na sidebar)
+        self.atualizado_em = None
+        self.duracao_ultima = None
+        self.ultimo_erro = None
+        self.erro_snapshot = None
+        self.em_andamento = False
+        self._lock = threading.Lock()
+        # Incrementada a cada escrita local, para detectar escritas durante uma sincronização
+        self._geracao = 0
+        self._store = None
+        self._pedido = threading.Event()
+        self._thread = None
+        # Snapshot em disco desatualizado em relação ao DataFrame residente
+        self._snapshot_sujo = False
+        self._lock_disco = threading.Lock()
+
+    @property
+    def df(self):
+        """DataFrame do snapshot atual, na ordem de exibição (None antes da primeira carga)."""
+        indice = self.indice
+        return indice.df if indice is not None else None
+
+    def obter(self, store, forcar=False):
+        """Retorna o snapshot atual; se vencido, agenda a sincronização em segundo plano."""
+        return self.obter_indice(store, forcar).df
+
+    def obter_indice(self, store, forcar=False):
+        """Como obter(), mas devolve o IndiceEventos do snapshot (consultas por status e período)."""
+        with self._lock:
+            self._store = store
+            if self.indice is None and not forcar:
+                self._carregar_do_disco()
+            if self.indice is None or forcar:
+                METRICAS.contar('cache.falha')
+                self._recarregar(store)
+                self._salvar_em_segundo_plano()
+                return self.indice
+            METRICAS.contar('cache.acerto')
+            indice = self.indice
+            vencido = time.monotonic() - self.ultima_verificacao >= self.intervalo_verificacao
+
+        if vencido:
+            self.solicitar_atualizacao()
+        return indice
+
+    @property
+    def idade_snapshot(self):
+        """Segundos desde a última leitura bem-sucedida da origem (None antes da primeira)."""
+        if self.atualizado_em is None:
+            return None
+        return time.time() - self.atualizado_em
+
+    def invalidar(self):
+        """Descarta o DataFrame residente (próxima leitura é completa)."""
+        with self._lock:
+            self.indice = None
+
+    def obter_offline(self):
+        """Modo offline: DataFrame residente ou snapshot em disco, sem tocar na origem (None se não houver)."""
+        with self._lock:
+            if self.df is None:
+                self._carregar_do_disco()
+            return self.df
+
+    def sincronizar_agora(self, store):
+        """Execução única (ex.: agente de alerta): snapshot em disco + delta da origem, tudo em primeiro plano."""
+        with self._lock:
+            self._store = store
+            if self.df is None:
+                self._carregar_do_disco()
+            if self.df is None:
+                self._recarregar(store)
+                mudou = True
+            else:
+                mudou = None
+        if mudou is None:
+            mudou = self._sincronizar(store)
+        if mudou and self.caminho_snapshot:
+            self._snapshot_sujo = True
+            self._salvar_snapshot()
+        return self.df
+
+    # --- SNAPSHOT EM DISCO (PARTIDA A FRIO) ---
+
+    def _carregar_do_disco(self):
+        # Chamado com o lock: publica o snapshot e força a reconciliação no próximo acesso
+        snapshot = carregar_snapshot(self.caminho_snapshot)
+        if snapshot is None:
+            return
+        METRICAS.contar('cache.snapshot_disco')
+        # Snapshot gravado já ordenado: o índice só confere a ordem, sem reordenar
+        self.indice = IndiceEventos(snapshot.df)
+        self.assinatura = snapshot.assinatura
+        self.ultima_verificacao = 0.0
+        if snapshot.salvo_em:
+            self.atualizado_em = datetime.fromisoformat(snapshot.salvo_em).timestamp()
+
+    def _salvar_em_segundo_plano(self):
+        """Grava o Parquet em outra thread (a escrita não atrasa quem pediu os dados)."""
+        self._snapshot_sujo = True
+        if self.caminho_snapshot:
+            threading.Thread(target=self._salvar_snapshot, name="snapshot-agenda", daemon=True).start()
+
+    def _salvar_snapshot(self):
+        # Uma gravação por vez; se outra estiver em curso, ela (ou a próxima) leva o estado atual
+        if not self._lock_disco.acquire(blocking=False):
+            return
+        try:
+            while self._snapshot_sujo:
+                self._snapshot_sujo = False
+                with self._lock:
+                    df, assinatura = self.df, self.assinatura
+                if df is not None:
+                    salvar_snapshot(df, assinatura, self.caminho_snapshot)
+            self.erro_snapshot = None
+        except Exception as e:
+            # Continua sujo: nova tentativa na próxima sincronização; a falha fica visível na sidebar e nas métricas
+            METRICAS.contar('cache.snapshot_falha')
+            self.erro_snapshot = e
+            self._snapshot_sujo = True
+        finally:
+            self._lock_disco.release()
+
+    # --- ATUALIZADOR EM SEGUNDO PLANO (SINGLE-FLIGHT) ---
+
+    def solicitar_atualizacao(self):
+        """Pede uma sincronização; ignorado se já existe uma em andamento."""
+        with self._lock:
+            if self.em_andamento:
+                return
+            self.em_andamento = True
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._laco_atualizacao, name="atualizador-agenda", daemon=True
+                )
+                self._thread.start()
+        self._pedido.set()
+
+    def _laco_atualizacao(self):
+        while True:
+            self._pedido.wait()
+            self._pedido.clear()
+            with self._lock:
+                store = self._store
+            try:
+                if self._sincronizar(store):
+                    self._snapshot_sujo = True
+                if self._snapshot_sujo and self.caminho_snapshot:
+                    self._salvar_snapshot()
+                self.ultimo_erro = None
+            except Exception as e:
+                # Mantém o último snapshot bom; nova tentativa no próximo intervalo
+                self.ultimo_erro = e
+                self.ultima_verificacao = time.monotonic()
+            finally:
+                self.em_andamento = False
+
+    def _sincronizar(self, store):
+        """Sincroniza com a origem; retorna True se o DataFrame residente mudou."""
+        inicio = time.monotonic()
+        with self._lock:
+            assinatura = self.assinatura
+            geracao = self._geracao
+
+        # Rede e conversão ficam FORA do lock: leitores continuam sendo atendidos
+        alteracoes = store.ler_alteracoes(assinatura)
+        if alteracoes is None:
+            assinatura = store.assinatura()
+            carga = carregar_dataframe(store.carregar_registros())
+            indice = IndiceEventos(carga.df)
+            with self._lock:
+                self.indice = indice
+                self.rejeitados = carga.rejeitados
+                self.assinatura = assinatura
+                self.ultimo_sync = ResultadoSync(len(carga.df), 0, 0, True)
+                METRICAS.contar('sync.completa')
+                self._registrar_leitura(inicio)
+                if self._geracao != geracao:
+                    # Houve escrita local durante a leitura: confere de novo no próximo acesso
+                    self.ultima_verificacao = 0.0
+            return True
+
+        carga = carregar_dataframe(alteracoes.alterados) if alteracoes.alterados else ResultadoCarga(None, [])
+        ids_tocados = {reg.get('id_evento') for reg in alteracoes.alterados} | set(alteracoes.removidos)
+
+        with self._lock:
+            # O delta é mesclado no snapshot ATUAL, preservando escritas locais feitas no meio tempo
+            self.indice, self.ultimo_sync = mesclar_delta(self.indice, alteracoes, carga)
+            self.rejeitados = [
+                reg for reg in self.rejeitados if reg.get('id_evento') not in ids_tocados
+            ] + carga.rejeitados
+            METRICAS.contar('sync.incremental')
+            mudou = self.assinatura != alteracoes.assinatura
+            self.assinatura = alteracoes.assinatura
+            self._registrar_leitura(inicio)
+        return mudou
+
+    def _registrar_leitura(self, inicio):
+        self.ultima_verificacao = time.monotonic()
+        self.atualizado_em = time.time()
+        self.duracao_ultima = self.ultima_verificacao - inicio
+
+    def _recarregar(self, store):
+        inicio = time.monotonic()
+        # A assinatura é lida ANTES dos dados: mudanças durante a leitura aparecem na próxima verificação
+        assinatura = store.assinatura()
+        carga = carregar_dataframe(store.carregar_registros())
+        self.indice = IndiceEventos(carga.df)
+        self.rejeitados = carga.rejeitados
+        self.assinatura = assinatura
+        self.ultimo_sync = ResultadoSync(len(self.df), 0, 0, True)
+        self._registrar_leitura(inicio)
+
+    def aplicar(self, store, acao, registro=None, id_evento=None):
+        """Aplica uma escrita já confirmada na origem ('adicionar', 'atualizar' ou 'deletar')."""
+        if id_evento is None and registro is not None:
+            id_evento = registro.get('id_evento')
+        self.aplicar_operacoes(store, [Operacao(acao, id_evento, registro)])
+
+    def aplicar_resultados(self, store, resultados):
+        """Aplica as operações bem-sucedidas de um lote (lista de ResultadoOperacao)."""
+        self.aplicar_operacoes(store, [res.operacao for res in resultados if res.sucesso])
+
+    def aplicar_operacoes(self, store, operacoes):
+        """Aplica escritas já confirmadas: remove as linhas dos ids e remonta só as novas/alteradas."""
+        if not operacoes:
+            return
+        # A assinatura (marca d'água) NÃO avança aqui: a nova versão da origem também cobriria
+        # edições externas feitas desde a última verificação. O próximo delta as traz; no Sheets,
+        # as próprias escritas são relidas só nas linhas gravadas, sem baixar a aba inteira.
+        with self._lock:
+            if self.indice is None:
+                return
+
+            registros = [op.registro for op in operacoes if op.acao in ('adicionar', 'atualizar')]
+            # Só as linhas novas passam pela conversão de data/hora e status, e são encaixadas no índice
+            self.indice = self.indice.atualizar(
+                {op.id_evento for op in operacoes}, montar_dataframe(registros) if registros else None
+            )
+            self._geracao += 1
+            self._snapshot_sujo = True
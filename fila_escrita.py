@@ -0,0 +1,98 @@
+import threading
+import time
+
+from armazenamento import Operacao, ResultadoOperacao
+
+# --- CONFIGURAÇÕES DA FILA DE ESCRITA ---
+
+# 'demanda': grava só quando descarregar() é chamado; 'intervalo': uma thread grava a cada N segundos
+POLITICA_PADRAO = "demanda"
+INTERVALO_DESCARGA_PADRAO = 5
+# Acima deste número de operações pendentes a fila grava na hora, em qualquer política
+LIMITE_PENDENTES = 500
+
+
+class FilaEscrita:
+    """Fila que acumula inclusões, edições e exclusões e as grava em lote (store.aplicar_lote).
+
+    Operações sobre o mesmo id_evento são combinadas antes de chegar à origem:
+    adicionar + atualizar vira um adicionar com os dados finais, qualquer coisa
+    + deletar vira deletar, e adicionar + deletar se anulam.
+    """
+
+    def __init__(self, store, politica=POLITICA_PADRAO, intervalo=INTERVALO_DESCARGA_PADRAO,
+                 limite_pendentes=LIMITE_PENDENTES, ao_descarregar=None):
+        if politica not in ("demanda", "intervalo"):
+            raise ValueError(f"Política de escrita desconhecida: '{politica}' (use demanda ou intervalo).")
+        self.store = store
+        self.politica = politica
+        self.intervalo = intervalo
+        self.limite_pendentes = limite_pendentes
+        # Callback com a lista de ResultadoOperacao de cada descarga (ex.: atualizar o cache)
+        self.ao_descarregar = ao_descarregar
+        self.ultimos_resultados = []
+        self._pendentes = {}
+        self._lock = threading.Lock()
+        self._lock_descarga = threading.Lock()
+        self._thread = None
+
+        if politica == "intervalo":
+            self._thread = threading.Thread(target=self._laco_descarga, name="fila-escrita-agenda", daemon=True)
+            self._thread.start()
+
+    @property
+    def pendentes(self):
+        with self._lock:
+            return len(self._pendentes)
+
+    def enfileirar(self, acao, id_evento=None, registro=None):
+        """Adiciona uma operação à fila, combinando com a pendente do mesmo id_evento."""
+        if id_evento is None and registro is not None:
+            id_evento = registro.get('id_evento')
+
+        with self._lock:
+            anterior = self._pendentes.get(id_evento)
+            if anterior is None:
+                self._pendentes[id_evento] = Operacao(acao, id_evento, registro)
+            elif acao == 'deletar':
+                if anterior.acao == 'adicionar':
+                    # Nunca chegou à origem: nada a gravar
+                    del self._pendentes[id_evento]
+                else:
+                    self._pendentes[id_evento] = Operacao('deletar', id_evento, None)
+            elif anterior.acao == 'adicionar':
+                self._pendentes[id_evento] = Operacao('adicionar', id_evento, registro)
+            else:
+                self._pendentes[id_evento] = Operacao(acao, id_evento, registro)
+            cheia = len(self._pendentes) >= self.limite_pendentes
+
+        if cheia:
+            self.descarregar()
+
+    def descarregar(self):
+        """Grava todas as operações pendentes em um lote e retorna os ResultadoOperacao."""
+        # Uma descarga por vez: a ordem das operações na origem é a ordem da fila
+        with self._lock_descarga:
+            with self._lock:
+                operacoes = list(self._pendentes.values())
+                self._pendentes = {}
+            if not operacoes:
+                return []
+
+            try:
+                resultados = self.store.aplicar_lote(operacoes)
+            except Exception as e:
+                # Falha antes de qualquer gravação (ex.: conexão): todas as operações falham
+                resultados = [ResultadoOperacao(op, False, e) for op in operacoes]
+            self.ultimos_resultados = resultados
+            if self.ao_descarregar is not None:
+                self.ao_descarregar(resultados)
+            return resultados
+
+    def _laco_descarga(self):
+        while True:
+            time.sleep(self.intervalo)
+            try:
+                self.descarregar()
+            except Exception as e:
+                print(f"🚨 Erro ao gravar a fila de escrita: {e}")
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# --- CONFIGURAÇÕES DO HISTÓRICO DE ALERTAS ---
+
+# Registro local do que já foi entregue no Telegram (vazio em AGENDA_HISTORICO_PATH desativa)
+HISTORICO_CAMINHO_PADRAO = "alertas_enviados.db"
+# Reserva de uma execução que caiu antes de confirmar expira depois deste tempo (segundos)
+VALIDADE_RESERVA = 15 * 60
+
+# Campos do evento que entram na impressão digital do conteúdo
+CAMPOS_HASH = ['titulo', 'descricao', 'data_evento', 'hora_evento', 'local', 'status']
+
+
+def hash_evento(evento):
+    """Impressão digital estável (entre processos) do conteúdo de um evento."""
+    partes = []
+    for campo in CAMPOS_HASH:
+        valor = evento.get(campo)
+        partes.append(valor.isoformat() if hasattr(valor, 'isoformat') else str(valor))
+    return hashlib.sha1("\x1f".join(partes).encode('utf-8')).hexdigest()
+
+
+def caminho_historico(config=None):
+    """Caminho do histórico: config['historico_path'] > AGENDA_HISTORICO_PATH > padrão. Vazio desativa."""
+    config = config or {}
+    if 'historico_path' in config:
+        caminho = config['historico_path']
+    else:
+        caminho = os.getenv("AGENDA_HISTORICO_PATH", HISTORICO_CAMINHO_PADRAO)
+    return caminho or None
+
+
+class HistoricoAlertas:
+    """Histórico de alertas entregues, por (id_evento, tipo) + hash do conteúdo.
+
+    `tipo` separa os alertas de um mesmo evento (ex.: 'alerta_5_dias',
+    'lembrete_60'). O envio segue reservar -> enviar -> confirmar (ou
+    liberar, se o envio falhar): a reserva é gravada em uma transação
+    IMMEDIATE, então duas execuções simultâneas nunca reservam o mesmo item.
+    """
+
+    def __init__(self, caminho=HISTORICO_CAMINHO_PADRAO, validade_reserva=VALIDADE_RESERVA):
+        self.caminho = caminho
+        self.validade_reserva = validade_reserva
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        if caminho != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS envios ("
+            " id_evento TEXT NOT NULL, tipo TEXT NOT NULL,"
+            " hash_enviado TEXT, enviado_em REAL,"
+            " hash_reservado TEXT, reservado_em REAL,"
+            " PRIMARY KEY (id_evento, tipo))"
+        )
+
+    def reservar(self, itens):
+        """Reserva os (id_evento, tipo, hash) ainda não entregues com esse conteúdo; retorna os reservados."""
+        itens = list(itens)
+        if not itens:
+            return []
+        agora = time.time()
+        reservados = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for id_evento, tipo, hash_conteudo in itens:
+                    linha = self._conn.execute(
+                        "SELECT hash_enviado, hash_reservado, reservado_em FROM envios WHERE id_evento = ? AND tipo = ?",
+                        (str(id_evento), tipo),
+                    ).fetchone()
+                    if linha is not None:
+                        hash_enviado, hash_reservado, reservado_em = linha
+                        if hash_enviado == hash_conteudo:
+                            continue
+                        if hash_reservado == hash_conteudo and agora - reservado_em < self.validade_reserva:
+                            # Outra execução está enviando este mesmo conteúdo
+                            continue
+                    self._conn.execute(
+                        "INSERT INTO envios (id_evento, tipo, hash_reservado, reservado_em) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (id_evento, tipo) DO UPDATE SET "
+                        "hash_reservado = excluded.hash_reservado, reservado_em = excluded.reservado_em",
+                        (str(id_evento), tipo, hash_conteudo, agora),
+                    )
+                    reservados.append((id_evento, tipo, hash_conteudo))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return reservados
+
+    def confirmar(self, itens):
+        """Marca os itens reservados como entregues."""
+        agora = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE envios SET hash_enviado = hash_reservado, enviado_em = ?, hash_reservado = NULL, reservado_em = NULL "
+                "WHERE id_evento = ? AND tipo = ? AND hash_reservado = ?",
+                [(agora, str(id_evento), tipo, hash_conteudo) for id_evento, tipo, hash_conteudo in itens],
+            )
+
+    def liberar(self, itens):
+        """Desfaz as reservas (envio falhou): a próxima execução tenta de novo."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE envios SET hash_reservado = NULL, reservado_em = NULL "
+                "WHERE id_evento = ? AND tipo = ? AND hash_reservado = ?",
+                [(str(id_evento), tipo, hash_conteudo) for id_evento, tipo, hash_conteudo in itens],
+            )
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+
+def abrir_historico(config=None):
+    """HistoricoAlertas no caminho configurado, ou None se desativado/inacessível."""
+    caminho = caminho_historico(config)
+    if not caminho:
+        return None
+    try:
+        return HistoricoAlertas(caminho)
+    except Exception as e:
+        print(f"⚠️ Histórico de alertas indisponível ({caminho}): {e}. Enviando sem deduplicação.")
+        return None
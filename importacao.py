@@ -0,0 +1,421 @@
+import argparse
+import csv
+import io
+import itertools
+import sys
+import uuid
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from armazenamento import COLUNAS, Operacao
+from eventos import STATUS_PRIORITY_MAP
+from recorrencia import DIAS_SEMANA, interpretar_regra, regra_valida
+from registros import FORMATOS_DATA, FORMATOS_HORA
+
+# --- CONFIGURAÇÕES DA IMPORTAÇÃO / EXPORTAÇÃO ---
+
+# Eventos por append_rows (uma chamada à API por lote)
+TAMANHO_LOTE_IMPORTACAO = 500
+# Linhas por pedaço de texto gerado na exportação
+LINHAS_POR_PEDACO = 1000
+# Nomes de coluna aceitos no CSV além dos de COLUNAS
+APELIDOS_COLUNAS = {'data': 'data_evento', 'hora': 'hora_evento', 'id': 'id_evento', 'título': 'titulo',
+                    'descrição': 'descricao'}
+# Status do iCalendar -> status da agenda (o resto vira 'Pendente')
+STATUS_ICS = {'CANCELLED': 'Cancelado'}
+# Propriedade própria que preserva o status exato na ida e volta pelo .ics
+PROPRIEDADE_STATUS_ICS = "X-AGENDA-STATUS"
+# Base dos id_evento gerados: a mesma linha (todas as colunas) gera sempre o mesmo UUID (retomada)
+NAMESPACE_IMPORTACAO = uuid.uuid5(uuid.NAMESPACE_URL, "agenda/importacao")
+
+# Uma linha (ou VEVENT) lida da origem: posição no arquivo e os campos encontrados
+LinhaImportada = namedtuple('LinhaImportada', ['numero', 'dados'])
+
+# Andamento reportado a cada lote gravado
+ProgressoImportacao = namedtuple('ProgressoImportacao', ['lidas', 'importadas', 'ja_existentes', 'rejeitadas'])
+
+# Resultado final: rejeitadas é uma lista de (numero, motivo); erro é a falha que interrompeu a gravação
+ResultadoImportacao = namedtuple('ResultadoImportacao', ['importadas', 'ja_existentes', 'rejeitadas', 'erro'])
+
+
+# =================================================================
+# === LEITURA EM FLUXO (CSV / ICS) ===
+# =================================================================
+
+def _abrir_texto(arquivo):
+    """Caminho, arquivo binário (ex.: upload do Streamlit) ou texto -> (fluxo de texto, fechar)."""
+    if isinstance(arquivo, str):
+        texto = open(arquivo, encoding='utf-8-sig', newline='')
+        return texto, texto.close
+    if isinstance(arquivo, io.TextIOBase):
+        return arquivo, lambda: None
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    # Devolve o arquivo original intacto ao terminar
+    return texto, texto.detach
+
+
+def ler_csv(arquivo):
+    """Gera LinhaImportada para cada linha do CSV (separador ',' ou ';'), sem carregar o arquivo inteiro."""
+    texto, fechar = _abrir_texto(arquivo)
+    try:
+        primeira = texto.readline()
+        separador = ';' if primeira.count(';') > primeira.count(',') else ','
+        leitor = csv.DictReader(itertools.chain([primeira], texto), delimiter=separador)
+        colunas = {
+            nome: APELIDOS_COLUNAS.get(nome.strip().lower(), nome.strip().lower()) for nome in (leitor.fieldnames or [])
+        }
+        for numero, linha in enumerate(leitor, start=2):
+            yield LinhaImportada(numero, {colunas[nome]: valor for nome, valor in linha.items() if nome in colunas})
+    finally:
+        fechar()
+
+
+def _desdobrar(texto):
+    # RFC 5545: linhas longas continuam na linha seguinte iniciada por espaço ou tab
+    atual = None
+    for linha in texto:
+        linha = linha.rstrip('\r\n')
+        if linha[:1] in (' ', '\t') and atual is not None:
+            atual += linha[1:]
+            continue
+        if atual is not None:
+            yield atual
+        atual = linha
+    if atual is not None:
+        yield atual
+
+
+def _texto_ics(valor):
+    return (valor.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',')
+            .replace('\\;', ';').replace('\\\\', '\\'))
+
+
+def _momento_ics(valor):
+    """DTSTART -> (data 'YYYY-MM-DD', hora 'HH:MM'). UTC ('Z') vira hora local; TZID é lido como hora local."""
+    valor = valor.strip()
+    if 'T' not in valor:
+        return datetime.strptime(valor[:8], '%Y%m%d').strftime('%Y-%m-%d'), '00:00'
+    momento = datetime.strptime(valor[:15], '%Y%m%dT%H%M%S')
+    if valor.endswith('Z'):
+        momento = momento.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return momento.strftime('%Y-%m-%d'), momento.strftime('%H:%M')
+
+
+def _evento_ics(propriedades):
+    dados = {
+        'titulo': _texto_ics(propriedades.get('SUMMARY', '')),
+        'descricao': _texto_ics(propriedades.get('DESCRIPTION', '')),
+        'local': _texto_ics(propriedades.get('LOCATION', '')),
+        'status': propriedades.get(PROPRIEDADE_STATUS_ICS)
+                  or STATUS_ICS.get(propriedades.get('STATUS', '').upper(), 'Pendente'),
+        'recorrencia': propriedades.get('RRULE', ''),
+    }
+    if dados['recorrencia'] and propriedades.get('EXDATE'):
+        # EXDATE pode vir repetido e com hora; a agenda guarda só as datas
+        dias = [valor.strip()[:8] for linha in propriedades['EXDATE'] for valor in linha.split(',') if valor.strip()]
+        dados['recorrencia'] += ";EXDATE=" + ",".join(dias)
+    try:
+        dados['data_evento'], dados['hora_evento'] = _momento_ics(propriedades.get('DTSTART', ''))
+    except ValueError:
+        dados['data_evento'], dados['hora_evento'] = propriedades.get('DTSTART', ''), ''
+
+    uid = propriedades.get('UID', '')
+    if uid:
+        try:
+            # Exportado por esta agenda: o UID já é o id_evento
+            dados['id_evento'] = str(uuid.UUID(uid))
+        except ValueError:
+            chave = f"ics|{uid}|{propriedades.get('RECURRENCE-ID', '')}"
+            dados['id_evento'] = str(uuid.uuid5(NAMESPACE_IMPORTACAO, chave))
+    return dados
+
+
+def ler_ics(arquivo):
+    """Gera LinhaImportada para cada VEVENT do iCalendar (numero = ordem do evento no arquivo)."""
+    texto, fechar = _abrir_texto(arquivo)
+    try:
+        numero, propriedades, aninhados = 0, None, 0
+        for linha in _desdobrar(texto):
+            nome, _, valor = linha.partition(':')
+            nome = nome.split(';', 1)[0].upper()
+            if nome == 'BEGIN':
+                if valor.upper() == 'VEVENT' and propriedades is None:
+                    numero += 1
+                    propriedades = {}
+                elif propriedades is not None:
+                    # VALARM e afins dentro do evento: propriedades ignoradas
+                    aninhados += 1
+            elif nome == 'END':
+                if aninhados:
+                    aninhados -= 1
+                elif valor.upper() == 'VEVENT' and propriedades is not None:
+                    yield LinhaImportada(numero, _evento_ics(propriedades))
+                    propriedades = None
+            elif propriedades is not None and not aninhados:
+                if nome == 'EXDATE':
+                    propriedades.setdefault(nome, []).append(valor)
+                else:
+                    propriedades.setdefault(nome, valor)
+    finally:
+        fechar()
+
+
+def ler_arquivo(arquivo, nome=None):
+    """Leitor pelo nome/extensão: .ics/.ical -> ler_ics, demais -> ler_csv."""
+    nome = (nome or (arquivo if isinstance(arquivo, str) else getattr(arquivo, 'name', ''))).lower()
+    return ler_ics(arquivo) if nome.endswith(('.ics', '.ical')) else ler_csv(arquivo)
+
+
+# =================================================================
+# === VALIDAÇÃO E GRAVAÇÃO EM LOTES ===
+# =================================================================
+
+def _converter(valor, formatos):
+    for formato in formatos:
+        try:
+            return datetime.strptime(valor, formato)
+        except ValueError:
+            continue
+    return None
+
+
+def validar_registro(linha, repeticoes=None):
+    """LinhaImportada -> (registro com as COLUNAS normalizadas, None) ou (None, motivo).
+
+    `repeticoes` (Counter compartilhado pela importação) numera linhas de
+    conteúdo idêntico no mesmo arquivo, para que cada uma ganhe o seu id_evento.
+    """
+    dados = {col: str(linha.dados.get(col) or '').strip() for col in COLUNAS}
+    if not dados['titulo']:
+        return None, "título vazio"
+    data = _converter(dados['data_evento'], FORMATOS_DATA)
+    if data is None:
+        return None, f"data inválida ('{dados['data_evento']}')"
+    # Hora vazia = 00:00, como na leitura da planilha
+    hora = _converter(dados['hora_evento'] or '00:00', FORMATOS_HORA)
+    if hora is None:
+        return None, f"hora inválida ('{dados['hora_evento']}')"
+    dados['status'] = dados['status'] or 'Pendente'
+    if dados['status'] not in STATUS_PRIORITY_MAP:
+        return None, f"status desconhecido ('{dados['status']}')"
+    if dados['recorrencia']:
+        motivo = regra_valida(dados['recorrencia'])
+        if motivo is not None:
+            return None, f"recorrência inválida: {motivo}"
+
+    dados['data_evento'] = data.strftime('%Y-%m-%d')
+    dados['hora_evento'] = hora.strftime('%H:%M')
+    if not dados['id_evento']:
+        # Pelo conteúdo (todas as colunas), não pela posição: reimportar o arquivo, mesmo com linhas
+        # inseridas ou reordenadas, não duplica o que já foi gravado. Linhas idênticas levam o número
+        # da repetição, então continuam eventos distintos
+        chave = "|".join(dados[col] for col in COLUNAS if col != 'id_evento')
+        if repeticoes is not None:
+            repeticoes[chave] += 1
+            chave = f"{chave}|{repeticoes[chave]}"
+        dados['id_evento'] = str(uuid.uuid5(NAMESPACE_IMPORTACAO, chave))
+    return dados, None
+
+
+def importar_eventos(store, linhas, tamanho_lote=TAMANHO_LOTE_IMPORTACAO, ao_progredir=None):
+    """Valida e grava as linhas (gerador de LinhaImportada) em lotes de `tamanho_lote` inclusões.
+
+    Retomada: ids já presentes na agenda são pulados, então basta repetir a
+    importação do mesmo arquivo depois de uma falha. Um lote que falha
+    interrompe a importação (ResultadoImportacao.erro).
+    """
+    existentes = {str(reg.get('id_evento')) for reg in store.carregar_registros()}
+    importadas = ja_existentes = lidas = 0
+    rejeitadas = []
+    lote = []
+    repeticoes = Counter()
+
+    def gravar():
+        for resultado in store.aplicar_lote([Operacao('adicionar', reg['id_evento'], reg) for reg in lote]):
+            if not resultado.sucesso:
+                raise resultado.erro
+        lote.clear()
+
+    try:
+        for linha in linhas:
+            lidas += 1
+            registro, motivo = validar_registro(linha, repeticoes)
+            if registro is None:
+                rejeitadas.append((linha.numero, motivo))
+                continue
+            if registro['id_evento'] in existentes:
+                ja_existentes += 1
+                continue
+            existentes.add(registro['id_evento'])
+            lote.append(registro)
+            if len(lote) >= tamanho_lote:
+                quantidade = len(lote)
+                gravar()
+                importadas += quantidade
+                if ao_progredir:
+                    ao_progredir(ProgressoImportacao(lidas, importadas, ja_existentes, len(rejeitadas)))
+        if lote:
+            quantidade = len(lote)
+            gravar()
+            importadas += quantidade
+    except Exception as e:
+        return ResultadoImportacao(importadas, ja_existentes, rejeitadas, e)
+
+    if ao_progredir:
+        ao_progredir(ProgressoImportacao(lidas, importadas, ja_existentes, len(rejeitadas)))
+    return ResultadoImportacao(importadas, ja_existentes, rejeitadas, None)
+
+
+# =================================================================
+# === EXPORTAÇÃO EM FLUXO ===
+# =================================================================
+
+def _linhas_exportacao(df):
+    """Tuplas (COLUNAS) do DataFrame tipado, uma por vez (sem copiar o DataFrame)."""
+    presentes = [col for col in COLUNAS if col in df.columns]
+    for valores in df[presentes].itertuples(index=False, name=None):
+        evento = dict(zip(presentes, valores))
+        data = evento.get('data_evento')
+        evento['data_evento'] = data.strftime('%Y-%m-%d') if hasattr(data, 'strftime') else data
+        yield ['' if pd.isna(evento.get(col)) else evento[col] for col in COLUNAS]
+
+
+def exportar_csv(df, linhas_por_pedaco=LINHAS_POR_PEDACO):
+    """Gera o CSV da agenda em pedaços de texto (cabeçalho = COLUNAS, reimportável)."""
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerow(COLUNAS)
+    for numero, linha in enumerate(_linhas_exportacao(df), start=1):
+        escritor.writerow(linha)
+        if numero % linhas_por_pedaco == 0:
+            yield saida.getvalue()
+            saida.seek(0)
+            saida.truncate()
+    yield saida.getvalue()
+
+
+def _escapar_ics(valor):
+    return (str(valor if valor is not None else '').replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _dobrar_ics(linha):
+    # RFC 5545: no máximo 75 octetos por linha; a continuação começa com espaço
+    dados = linha.encode('utf-8')
+    if len(dados) <= 75:
+        return linha + "\r\n"
+    partes, inicio, limite = [], 0, 75
+    while inicio < len(dados):
+        fim = min(inicio + limite, len(dados))
+        # Não corta um caractere UTF-8 ao meio
+        while fim < len(dados) and (dados[fim] & 0xC0) == 0x80:
+            fim -= 1
+        partes.append(dados[inicio:fim].decode('utf-8'))
+        inicio, limite = fim, 74
+    return "\r\n ".join(partes) + "\r\n"
+
+
+def _linhas_recorrencia_ics(texto, inicio):
+    """RRULE (e EXDATE, com a hora da série) de uma regra da agenda."""
+    regra = interpretar_regra(texto)
+    partes = [f"FREQ={regra.frequencia}"]
+    if regra.intervalo != 1:
+        partes.append(f"INTERVAL={regra.intervalo}")
+    if regra.dias_semana:
+        partes.append("BYDAY=" + ",".join(DIAS_SEMANA[dia] for dia in regra.dias_semana))
+    if regra.ate is not None:
+        # DTSTART tem hora: UNTIL também (fim do dia, inclusivo)
+        partes.append(f"UNTIL={regra.ate.strftime('%Y%m%d')}T235959")
+    if regra.contagem is not None:
+        partes.append(f"COUNT={regra.contagem}")
+    linhas = ["RRULE:" + ";".join(partes)]
+    if regra.excecoes:
+        hora = inicio.strftime('T%H%M%S')
+        linhas.append("EXDATE:" + ",".join(dia.strftime('%Y%m%d') + hora for dia in sorted(regra.excecoes)))
+    return linhas
+
+
+def exportar_ics(df, agora=None):
+    """Gera o iCalendar da agenda, um VEVENT por vez (horários locais, sem fuso)."""
+    carimbo = (agora or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//AGENDA//Agenda de Eventos//PT\r\nCALSCALE:GREGORIAN\r\n"
+    presentes = [col for col in COLUNAS + ['data_hora_ordenacao'] if col in df.columns]
+    for valores in df[presentes].itertuples(index=False, name=None):
+        evento = dict(zip(presentes, valores))
+        status = str(evento.get('status') or 'Pendente')
+        linhas = [
+            "BEGIN:VEVENT",
+            f"UID:{evento.get('id_evento')}",
+            f"DTSTAMP:{carimbo}",
+            f"DTSTART:{evento['data_hora_ordenacao'].strftime('%Y%m%dT%H%M%S')}",
+            f"SUMMARY:{_escapar_ics(evento.get('titulo'))}",
+        ]
+        for propriedade, coluna in (('DESCRIPTION', 'descricao'), ('LOCATION', 'local')):
+            if evento.get(coluna) and not pd.isna(evento[coluna]):
+                linhas.append(f"{propriedade}:{_escapar_ics(evento[coluna])}")
+        if isinstance(evento.get('recorrencia'), str) and evento['recorrencia'].strip():
+            linhas += _linhas_recorrencia_ics(evento['recorrencia'], evento['data_hora_ordenacao'])
+        linhas += [
+            f"STATUS:{'CANCELLED' if status == 'Cancelado' else 'CONFIRMED'}",
+            f"{PROPRIEDADE_STATUS_ICS}:{_escapar_ics(status)}",
+            "END:VEVENT",
+        ]
+        yield "".join(_dobrar_ics(linha) for linha in linhas)
+    yield "END:VCALENDAR\r\n"
+
+
+# =================================================================
+# === LINHA DE COMANDO ===
+# =================================================================
+
+def main(argv=None):
+    # Mesma conexão do agente de alerta (GSPREAD_CREDENTIALS_JSON / AGENDA_STORE)
+    from agendas import agendas_configuradas
+    from alerta_eventos import conectar_store
+    from eventos import IndiceEventos, carregar_dataframe
+
+    parser = argparse.ArgumentParser(description="Importação e exportação em lote da agenda (CSV e iCalendar).")
+    parser.add_argument('acao', choices=['importar', 'exportar'])
+    parser.add_argument('arquivo', help="Arquivo .csv ou .ics (o formato vem da extensão).")
+    parser.add_argument('--agenda', help="Nome da agenda (padrão: a primeira configurada).")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE_IMPORTACAO, help="Eventos por gravação.")
+    args = parser.parse_args(argv)
+
+    agendas = agendas_configuradas()
+    agenda = next((agenda for agenda in agendas if agenda.nome == args.agenda), None) if args.agenda else agendas[0]
+    if agenda is None:
+        print(f"🚨 Agenda '{args.agenda}' não configurada.")
+        return 1
+    store = conectar_store(agenda, agendas)
+    if store is None:
+        return 1
+
+    if args.acao == 'exportar':
+        df = IndiceEventos(carregar_dataframe(store.carregar_registros()).df).df
+        gerador = exportar_ics(df) if args.arquivo.lower().endswith(('.ics', '.ical')) else exportar_csv(df)
+        with open(args.arquivo, 'w', encoding='utf-8', newline='') as saida:
+            for pedaco in gerador:
+                saida.write(pedaco)
+        print(f"✅ {len(df)} evento(s) exportado(s) para {args.arquivo}.")
+        return 0
+
+    def progresso(andamento):
+        print(f"📥 {andamento.lidas} lida(s), {andamento.importadas} gravada(s), "
+              f"{andamento.ja_existentes} já existente(s), {andamento.rejeitadas} rejeitada(s).")
+
+    resultado = importar_eventos(store, ler_arquivo(args.arquivo), args.lote, progresso)
+    for numero, motivo in resultado.rejeitadas:
+        print(f"   ⚠️ Linha {numero}: {motivo}")
+    if resultado.erro is not None:
+        print(f"🚨 Importação interrompida ({resultado.importadas} gravado(s)): {resultado.erro}. "
+              "Repita o comando para retomar.")
+        return 1
+    print(f"✅ Importação concluída: {resultado.importadas} novo(s), {resultado.ja_existentes} já existente(s), "
+          f"{len(resultado.rejeitadas)} rejeitado(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
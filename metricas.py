@@ -0,0 +1,278 @@
+import builtins
+import functools
+import json
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- CONFIGURAÇÕES DA INSTRUMENTAÇÃO ---
+
+# Amostras de latência guardadas por métrica (janela deslizante para os percentis)
+AMOSTRAS_POR_METRICA = 1000
+PERCENTIS = (50, 90, 99)
+
+
+def _percentil(ordenadas, p):
+    """Percentil pelo método do posto mais próximo (lista já ordenada, não vazia)."""
+    posto = max(1, -(-p * len(ordenadas) // 100))
+    return ordenadas[posto - 1]
+
+
+class Metricas:
+    """Registro leve de contagens, latências, linhas/bytes e acertos de cache.
+
+    Cada métrica tem um nome com prefixo da camada ('sheets.get_all_records',
+    'eventos.carregar_dataframe', 'app.render_lista', 'telegram.enviar_alerta'...).
+    Os totais são acumulados desde o início do processo; os percentis saem das
+    últimas AMOSTRAS_POR_METRICA medições.
+    """
+
+    def __init__(self, amostras=AMOSTRAS_POR_METRICA):
+        self.amostras = amostras
+        self.iniciado_em = time.time()
+        self._lock = threading.Lock()
+        self._metricas = {}
+        self._contadores = {}
+
+    def _metrica(self, nome):
+        metrica = self._metricas.get(nome)
+        if metrica is None:
+            metrica = self._metricas[nome] = {
+                'chamadas': 0, 'erros': 0, 'total_ms': 0.0, 'linhas': 0, 'bytes': 0,
+                'latencias': deque(maxlen=self.amostras),
+            }
+        return metrica
+
+    def registrar(self, nome, duracao, linhas=None, bytes_=None, erro=False):
+        """Registra uma medição (duração em segundos)."""
+        ms = duracao * 1000
+        with self._lock:
+            metrica = self._metrica(nome)
+            metrica['chamadas'] += 1
+            metrica['total_ms'] += ms
+            metrica['latencias'].append(ms)
+            if erro:
+                metrica['erros'] += 1
+            if linhas:
+                metrica['linhas'] += linhas
+            if bytes_:
+                metrica['bytes'] += bytes_
+
+    def contar(self, nome, quantidade=1):
+        """Incrementa um contador simples (ex.: 'cache.acerto' / 'cache.falha')."""
+        with self._lock:
+            self._contadores[nome] = self._contadores.get(nome, 0) + quantidade
+
+    @contextmanager
+    def medir(self, nome):
+        """Mede o bloco; quem chama pode preencher info['linhas'] e info['bytes']."""
+        info = {}
+        inicio = time.perf_counter()
+        erro = False
+        try:
+            yield info
+        except BaseException:
+            erro = True
+            raise
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio, info.get('linhas'), info.get('bytes'), erro)
+
+    def resumo(self):
+        """Dict serializável: por métrica, totais e percentis de latência (ms); mais os contadores."""
+        with self._lock:
+            copia = {
+                nome: dict(m, latencias=sorted(m['latencias'])) for nome, m in self._metricas.items()
+            }
+            contadores = dict(self._contadores)
+
+        metricas = {}
+        for nome, m in sorted(copia.items()):
+            latencias = m.pop('latencias')
+            m['total_ms'] = round(m['total_ms'], 2)
+            m['media_ms'] = round(m['total_ms'] / m['chamadas'], 2) if m['chamadas'] else 0.0
+            for p in PERCENTIS:
+                m[f'p{p}_ms'] = round(_percentil(latencias, p), 2) if latencias else None
+            m['max_ms'] = round(latencias[-1], 2) if latencias else None
+            metricas[nome] = m
+
+        return {
+            'iniciado_em': datetime.fromtimestamp(self.iniciado_em).isoformat(timespec='seconds'),
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'metricas': metricas,
+            'contadores': dict(sorted(contadores.items())),
+        }
+
+    def exportar(self, caminho=None):
+        """Grava o resumo em JSON (se houver caminho) e imprime uma linha por métrica no log."""
+        resumo = self.resumo()
+        if caminho:
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                json.dump(resumo, arquivo, ensure_ascii=False, indent=2)
+        for nome, m in resumo['metricas'].items():
+            print(
+                f"⏱️ {nome}: {m['chamadas']}x, p50 {m['p50_ms']} ms, p99 {m['p99_ms']} ms"
+                f", {m['linhas']} linhas, {m['bytes']} bytes, {m['erros']} erro(s)"
+            )
+        for nome, valor in resumo['contadores'].items():
+            print(f"⏱️ {nome}: {valor}")
+        return resumo
+
+    def limpar(self):
+        with self._lock:
+            self._metricas = {}
+            self._contadores = {}
+            self.iniciado_em = time.time()
+
+
+# Registro único do processo (app: compartilhado entre as sessões; agente: uma execução)
+METRICAS = Metricas()
+
+
+def medido(nome, metricas=None):
+    """Decorador: cada chamada vira uma medição de `nome` (linhas = len do 1º argumento, se houver)."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with (metricas or METRICAS).medir(nome) as info:
+                if args and hasattr(args[0], '__len__'):
+                    info['linhas'] = len(args[0])
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+# =================================================================
+# === INSTRUMENTAÇÃO DO GSPREAD ===
+# =================================================================
+
+class ObjetoInstrumentado:
+    """Proxy de Spreadsheet/Worksheet do gspread: cada método chamado vira uma métrica.
+
+    Ex.: sheet.get_all_records -> 'sheets.get_all_records', com o número de
+    linhas devolvidas quando o retorno é uma lista.
+    """
+
+    def __init__(self, alvo, prefixo="sheets", metricas=None):
+        self._alvo = alvo
+        self._prefixo = prefixo
+        self._registro = metricas or METRICAS
+
+    def __getattr__(self, nome):
+        atributo = getattr(self._alvo, nome)
+        if not callable(atributo):
+            return atributo
+
+        def chamada(*args, **kwargs):
+            with self._registro.medir(f"{self._prefixo}.{nome}") as info:
+                resultado = atributo(*args, **kwargs)
+                if isinstance(resultado, list):
+                    info['linhas'] = len(resultado)
+                return resultado
+
+        return chamada
+
+
+def instrumentar_http(spreadsheet, metricas=None):
+    """Conta requisições HTTP e bytes recebidos da sessão do gspread ('sheets.http')."""
+    registro = metricas or METRICAS
+    try:
+        sessao = spreadsheet.client.http_client.session
+    except AttributeError:
+        # Não é um Spreadsheet real (ex.: dublê de teste): só a medição por método
+        return False
+    if getattr(sessao, '_agenda_instrumentada', False):
+        return True
+
+    def ao_responder(resposta, *args, **kwargs):
+        registro.registrar(
+            'sheets.http', resposta.elapsed.total_seconds(),
+            bytes_=len(resposta.content or b""), erro=not resposta.ok
+        )
+        if resposta.status_code == 429:
+            registro.contar('sheets.http_429')
+
+    sessao.hooks.setdefault('response', []).append(ao_responder)
+    sessao._agenda_instrumentada = True
+    return True
+
+
+# =================================================================
+# === PERFIL DE PARTIDA (--profile DO AGENTE) ===
+# =================================================================
+
+class PerfilImportacoes:
+    """Tempo gasto em imports desde iniciar(), por pacote (só o import mais externo de cada thread conta).
+
+    Envolve builtins.__import__, então mede também os imports tardios feitos
+    dentro das funções (gspread, pandas, telegram) e não só os do topo do módulo.
+    """
+
+    def __init__(self):
+        self.iniciado_em = None
+        self.por_pacote = {}
+        self._original = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        if self._original is None:
+            self.iniciado_em = time.perf_counter()
+            self._original = builtins.__import__
+            builtins.__import__ = self._importar
+
+    def parar(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _importar(self, nome, *args, **kwargs):
+        profundidade = getattr(self._local, 'profundidade', 0)
+        if profundidade or not nome or nome in sys.modules:
+            # Import aninhado (já contado pelo de fora) ou módulo já carregado
+            self._local.profundidade = profundidade + 1
+            try:
+                return self._original(nome, *args, **kwargs)
+            finally:
+                self._local.profundidade = profundidade
+        self._local.profundidade = 1
+        inicio = time.perf_counter()
+        try:
+            return self._original(nome, *args, **kwargs)
+        finally:
+            self._local.profundidade = 0
+            pacote = nome.split('.')[0]
+            with self._lock:
+                self.por_pacote[pacote] = self.por_pacote.get(pacote, 0.0) + time.perf_counter() - inicio
+
+    @property
+    def segundos(self):
+        return sum(self.por_pacote.values())
+
+
+def pico_rss_mib():
+    """Pico de memória residente do processo (MiB); None onde não há o módulo resource (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: kB no Linux, bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def relatar_perfil(perfil, metricas=None, mais_lentos=5):
+    """Imprime (e registra nas métricas) o tempo de import, o tempo total e o pico de RSS do processo."""
+    registro = metricas or METRICAS
+    total = time.perf_counter() - perfil.iniciado_em
+    pico = pico_rss_mib()
+    registro.registrar('agente.importacoes', perfil.segundos)
+    registro.registrar('agente.execucao', total)
+    lentos = sorted(perfil.por_pacote.items(), key=lambda item: item[1], reverse=True)[:mais_lentos]
+    detalhe = ", ".join(f"{pacote} {segundos * 1000:.0f} ms" for pacote, segundos in lentos)
+    print(f"⏱️ Perfil: importações {perfil.segundos * 1000:.0f} ms ({detalhe}); execução {total * 1000:.0f} ms")
+    print(f"⏱️ Perfil: pico de RSS {pico:.1f} MiB" if pico is not None else "⏱️ Perfil: pico de RSS indisponível")
+    return {'importacoes_s': perfil.segundos, 'execucao_s': total, 'pico_rss_mib': pico}
+
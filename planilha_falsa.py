@@ -0,0 +1,287 @@
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime
+
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import rowcol_to_a1
+
+from armazenamento import COLUNAS
+
+# --- DUBLÊ EM PROCESSO DO GSPREAD (BENCHMARKS E TESTES SEM REDE) ---
+
+# Mesma época dos números seriais de data do Sheets (UNFORMATTED_VALUE)
+EPOCA_SERIAL = date(1899, 12, 30)
+
+# Distribuição de status das agendas sintéticas
+PESOS_STATUS = {'Pendente': 0.6, 'Concluído': 0.3, 'Cancelado': 0.1}
+# Regras das séries recorrentes sintéticas (em rodízio)
+REGRAS_SINTETICAS = ['FREQ=WEEKLY', 'FREQ=DAILY;COUNT=30', 'FREQ=MONTHLY;UNTIL=20271231', 'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH']
+
+
+class CelulaFalsa:
+    """Equivalente ao gspread.Cell: valor, linha e coluna (1-based)."""
+
+    def __init__(self, valor, linha=None, coluna=None):
+        self.value = valor
+        self.row = linha
+        self.col = coluna
+
+
+class AbaFalsa:
+    """Worksheet em memória com a API do gspread usada pela agenda.
+
+    `latencia` (segundos) é somada a cada chamada para simular a ida à API;
+    `chamadas` conta as chamadas por método.
+    """
+
+    def __init__(self, planilha, titulo, linhas=None, cabecalho=None, latencia=0.0, id_aba=0):
+        self.planilha = planilha
+        self.title = titulo
+        self.id = id_aba
+        self.latencia = latencia
+        self.chamadas = Counter()
+        self.linhas = [list(cabecalho or COLUNAS)] + [list(linha) for linha in (linhas or [])]
+        # Tamanho da grade (colunas), como o Worksheet.col_count do gspread
+        self.col_count = max(26, len(self.linhas[0]))
+        self._lock = threading.Lock()
+
+    def _chamada(self, metodo, escrita=False):
+        self.chamadas[metodo] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        if escrita:
+            self.planilha.modificada()
+
+    # --- LEITURA ---
+
+    def get_all_records(self, head=1, **kwargs):
+        self._chamada('get_all_records')
+        with self._lock:
+            cabecalho = self.linhas[head - 1]
+            return [dict(zip(cabecalho, linha)) for linha in self.linhas[head:]]
+
+    def get_all_values(self, **kwargs):
+        self._chamada('get_all_values')
+        with self._lock:
+            return [list(linha) for linha in self.linhas]
+
+    def row_values(self, linha, **kwargs):
+        self._chamada('row_values')
+        with self._lock:
+            valores = list(self.linhas[linha - 1]) if len(self.linhas) >= linha else []
+        # O Sheets omite as células vazias do fim da linha
+        while valores and valores[-1] in ('', None):
+            valores.pop()
+        return valores
+
+    def col_values(self, coluna, **kwargs):
+        self._chamada('col_values')
+        with self._lock:
+            return [linha[coluna - 1] if len(linha) >= coluna else '' for linha in self.linhas]
+
+    def batch_get(self, intervalos, **kwargs):
+        """Intervalos de linhas inteiras ('5:7'), como o Sheets: sem as células vazias do fim de cada linha."""
+        self._chamada('batch_get')
+        resultado = []
+        with self._lock:
+            for intervalo in intervalos:
+                inicio, fim = (int(parte) for parte in intervalo.split('!')[-1].split(':'))
+                linhas = []
+                for valores in self.linhas[inicio - 1:fim]:
+                    valores = list(valores)
+                    while valores and valores[-1] in ('', None):
+                        valores.pop()
+                    linhas.append(valores)
+                resultado.append(linhas)
+        return resultado
+
+    def acell(self, rotulo, **kwargs):
+        self._chamada('acell')
+        linha, coluna = _coordenadas(rotulo)
+        with self._lock:
+            valores = self.linhas[linha - 1] if linha <= len(self.linhas) else []
+            return CelulaFalsa(valores[coluna - 1] if coluna <= len(valores) else None, linha, coluna)
+
+    def find(self, consulta, in_row=None, in_column=None, case_sensitive=True):
+        """Primeira célula com o valor (como o gspread 6: None quando não encontra)."""
+        self._chamada('find')
+        with self._lock:
+            for num_linha, linha in enumerate(self.linhas, start=1):
+                if in_row is not None and num_linha != in_row:
+                    continue
+                for num_coluna, valor in enumerate(linha, start=1):
+                    if in_column is not None and num_coluna != in_column:
+                        continue
+                    if str(valor) == str(consulta):
+                        return CelulaFalsa(valor, num_linha, num_coluna)
+        return None
+
+    # --- ESCRITA ---
+
+    def append_row(self, valores, **kwargs):
+        return self._anexar('append_row', [valores])
+
+    def append_rows(self, valores, **kwargs):
+        return self._anexar('append_rows', valores)
+
+    def _anexar(self, metodo, valores):
+        self._chamada(metodo, escrita=True)
+        with self._lock:
+            primeira = len(self.linhas) + 1
+            self.linhas.extend(list(linha) for linha in valores)
+            ultima = len(self.linhas)
+        return {'updates': {'updatedRange': f"'{self.title}'!A{primeira}:H{ultima}", 'updatedRows': len(valores)}}
+
+    def update(self, intervalo, valores, **kwargs):
+        self._chamada('update', escrita=True)
+        with self._lock:
+            return self._gravar(intervalo, valores)
+
+    def batch_update(self, dados, **kwargs):
+        self._chamada('batch_update', escrita=True)
+        with self._lock:
+            return {'responses': [self._gravar(item['range'], item['values']) for item in dados]}
+
+    def add_cols(self, quantidade):
+        self._chamada('add_cols', escrita=True)
+        self.col_count += quantidade
+
+    def delete_rows(self, inicio, fim=None):
+        self._chamada('delete_rows', escrita=True)
+        with self._lock:
+            del self.linhas[inicio - 1:(fim or inicio)]
+
+    def _gravar(self, intervalo, valores):
+        linha, coluna = _coordenadas(intervalo.split(':')[0].split('!')[-1])
+        for deslocamento, valores_linha in enumerate(valores):
+            indice = linha - 1 + deslocamento
+            while len(self.linhas) <= indice:
+                self.linhas.append([])
+            atual = self.linhas[indice] + [''] * max(0, coluna - 1 - len(self.linhas[indice]))
+            self.linhas[indice] = atual[:coluna - 1] + list(valores_linha) + atual[coluna - 1 + len(valores_linha):]
+        # Resposta como a do values.update: intervalo efetivamente gravado
+        ultima_coluna = rowcol_to_a1(1, coluna - 1 + max((len(v) for v in valores), default=1))[:-1]
+        return {
+            'updatedRange': f"'{self.title}'!{rowcol_to_a1(linha, coluna)}:{ultima_coluna}{linha + len(valores) - 1}",
+            'updatedRows': len(valores)
+        }
+
+
+class PlanilhaFalsa:
+    """Spreadsheet em memória: abas por título, modifiedTime e batch_update (deleteDimension)."""
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.abas = {}
+        self.chamadas = Counter()
+        self._modificada_em = datetime.now()
+
+    def adicionar_aba(self, titulo, linhas=None, cabecalho=None):
+        aba = AbaFalsa(self, titulo, linhas, cabecalho, self.latencia, id_aba=len(self.abas))
+        self.abas[titulo] = aba
+        return aba
+
+    def modificada(self):
+        self._modificada_em = datetime.now()
+
+    def _chamada(self, metodo):
+        self.chamadas[metodo] += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def worksheet(self, titulo):
+        self._chamada('worksheet')
+        if titulo not in self.abas:
+            raise WorksheetNotFound(titulo)
+        return self.abas[titulo]
+
+    def add_worksheet(self, title, rows=1000, cols=26, index=None):
+        self._chamada('add_worksheet')
+        self.modificada()
+        aba = self.adicionar_aba(title)
+        # Aba nova do Sheets vem vazia, sem cabeçalho
+        aba.linhas = []
+        return aba
+
+    def get_lastUpdateTime(self):
+        self._chamada('get_lastUpdateTime')
+        return self._modificada_em.isoformat()
+
+    def batch_update(self, corpo):
+        self._chamada('batch_update')
+        por_id = {aba.id: aba for aba in self.abas.values()}
+        for requisicao in corpo.get('requests', []):
+            faixa = requisicao['deleteDimension']['range']
+            aba = por_id[faixa['sheetId']]
+            with aba._lock:
+                del aba.linhas[faixa['startIndex']:faixa['endIndex']]
+        self.modificada()
+        return {'replies': []}
+
+    def total_chamadas(self):
+        total = Counter(self.chamadas)
+        for aba in self.abas.values():
+            total.update(aba.chamadas)
+        return total
+
+
+def _coordenadas(rotulo):
+    """'B12' -> (12, 2)."""
+    letras, numero = re.match(r'([A-Z]+)(\d+)', rotulo).groups()
+    coluna = 0
+    for letra in letras:
+        coluna = coluna * 26 + ord(letra) - ord('A') + 1
+    return int(numero), coluna
+
+
+# =================================================================
+# === AGENDAS SINTÉTICAS ===
+# =================================================================
+
+def gerar_linhas(quantidade, semente=42, hoje=None, dias=365, fracao_invalida=0.005, fracao_recorrente=0.01):
+    """Gera linhas (listas na ordem de COLUNAS) como o Sheets devolve com UNFORMATTED_VALUE.
+
+    Datas ficam em ±`dias` a partir de hoje; a maioria vem como número serial
+    e parte como texto (ISO ou DD/MM/AAAA), como em planilhas editadas à mão.
+    Uma fração pequena tem data inválida, para exercitar os rejeitados, e
+    outra (`fracao_recorrente`) é série recorrente, para exercitar a expansão.
+    """
+    aleatorio = random.Random(semente)
+    serial_hoje = ((hoje or date.today()) - EPOCA_SERIAL).days
+    status = list(PESOS_STATUS)
+    pesos = list(PESOS_STATUS.values())
+    passo_recorrente = round(1 / fracao_recorrente) if fracao_recorrente else 0
+
+    for i in range(quantidade):
+        serial = serial_hoje + aleatorio.randint(-dias, dias)
+        minutos = aleatorio.randrange(8 * 60, 20 * 60, 15)
+        sorteio = aleatorio.random()
+        if sorteio < fracao_invalida:
+            data_evento, hora_evento = 'data a definir', '10:00'
+        elif sorteio < 0.85:
+            data_evento, hora_evento = serial, minutos / (24 * 60)
+        else:
+            dia = date.fromordinal(EPOCA_SERIAL.toordinal() + serial)
+            data_evento = dia.isoformat() if sorteio < 0.93 else dia.strftime('%d/%m/%Y')
+            hora_evento = f"{minutos // 60:02d}:{minutos % 60:02d}"
+        yield [
+            f"{i:08x}-0000-4000-8000-{semente:012x}",
+            f"Evento sintético {i}",
+            "Descrição gerada para benchmark" if i % 3 else "",
+            data_evento,
+            hora_evento,
+            f"Sala {i % 17}",
+            aleatorio.choices(status, pesos)[0],
+            REGRAS_SINTETICAS[(i // passo_recorrente) % len(REGRAS_SINTETICAS)]
+            if passo_recorrente and i % passo_recorrente == passo_recorrente - 1 else "",
+        ]
+
+
+def planilha_sintetica(quantidade, aba="AGENDA", latencia=0.0, semente=42):
+    """PlanilhaFalsa com uma aba de `quantidade` eventos sintéticos."""
+    planilha = PlanilhaFalsa(latencia=latencia)
+    planilha.adicionar_aba(aba, gerar_linhas(quantidade, semente))
+    return planilha
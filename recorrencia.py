@@ -0,0 +1,181 @@
+import calendar
+import re
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+# --- CONFIGURAÇÕES DA RECORRÊNCIA ---
+
+# Frequências aceitas na coluna 'recorrencia' (subconjunto do RRULE do iCalendar)
+FREQUENCIAS = ('DAILY', 'WEEKLY', 'MONTHLY')
+# Dias da semana no formato do RRULE (BYDAY), na ordem de date.weekday()
+DIAS_SEMANA = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+# Janelas expandidas guardadas por índice (app: período filtrado; agente: horizonte do alerta)
+MAX_JANELAS_MEMORIZADAS = 32
+
+# Regra interpretada: intervalo em dias/semanas/meses, dias_semana (0=segunda) só para WEEKLY,
+# ate (date inclusiva) e contagem limitam a série; excecoes são as datas puladas (EXDATE)
+RegraRecorrencia = namedtuple(
+    'RegraRecorrencia', ['frequencia', 'intervalo', 'dias_semana', 'ate', 'contagem', 'excecoes']
+)
+
+
+# =================================================================
+# === REGRA (TEXTO DA COLUNA 'recorrencia') ===
+# =================================================================
+
+def _data_regra(texto):
+    texto = texto.strip()
+    for formato in ('%Y%m%d', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(texto[:10 if '-' in texto else 8], formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida na recorrência: '{texto}'")
+
+
+@lru_cache(maxsize=1024)
+def interpretar_regra(texto):
+    """'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;UNTIL=20261231;EXDATE=20261104' -> RegraRecorrencia.
+
+    Chaves: FREQ (DAILY, WEEKLY, MONTHLY; obrigatória), INTERVAL, BYDAY (só
+    WEEKLY), UNTIL (data inclusiva), COUNT e EXDATE (datas puladas, separadas
+    por vírgula). Levanta ValueError se a regra não for reconhecida.
+    """
+    partes = {}
+    for item in re.sub(r'^RRULE:', '', str(texto).strip(), flags=re.IGNORECASE).split(';'):
+        if not item.strip():
+            continue
+        chave, separador, valor = item.partition('=')
+        if not separador:
+            raise ValueError(f"Item sem '=' na recorrência: '{item}'")
+        partes[chave.strip().upper()] = valor.strip()
+
+    frequencia = partes.pop('FREQ', '').upper()
+    if frequencia not in FREQUENCIAS:
+        raise ValueError(f"FREQ deve ser uma de {', '.join(FREQUENCIAS)} (recebido: '{frequencia}')")
+    intervalo = int(partes.pop('INTERVAL', 1))
+    if intervalo < 1:
+        raise ValueError("INTERVAL deve ser maior que zero")
+    dias_semana = ()
+    if 'BYDAY' in partes:
+        if frequencia != 'WEEKLY':
+            raise ValueError("BYDAY só é aceito com FREQ=WEEKLY")
+        dias = [dia.strip().upper() for dia in partes.pop('BYDAY').split(',') if dia.strip()]
+        if not dias or any(dia not in DIAS_SEMANA for dia in dias):
+            raise ValueError(f"BYDAY aceita {', '.join(DIAS_SEMANA)}")
+        dias_semana = tuple(sorted({DIAS_SEMANA.index(dia) for dia in dias}))
+    ate = _data_regra(partes.pop('UNTIL')) if 'UNTIL' in partes else None
+    contagem = int(partes.pop('COUNT')) if 'COUNT' in partes else None
+    if contagem is not None and contagem < 1:
+        raise ValueError("COUNT deve ser maior que zero")
+    excecoes = frozenset(_data_regra(dia) for dia in partes.pop('EXDATE', '').split(',') if dia.strip())
+    if partes:
+        raise ValueError(f"Chave(s) não suportada(s) na recorrência: {', '.join(sorted(partes))}")
+    return RegraRecorrencia(frequencia, intervalo, dias_semana, ate, contagem, excecoes)
+
+
+def regra_valida(texto):
+    """Motivo do erro (texto) ou None se a regra for válida."""
+    try:
+        interpretar_regra(texto)
+        return None
+    except ValueError as e:
+        return str(e)
+
+
+def montar_regra(frequencia, intervalo=1, dias_semana=(), ate=None, contagem=None, excecoes=()):
+    """Texto da coluna 'recorrencia' a partir das partes (inverso de interpretar_regra)."""
+    partes = [f"FREQ={frequencia}"]
+    if intervalo and intervalo != 1:
+        partes.append(f"INTERVAL={intervalo}")
+    if dias_semana:
+        partes.append("BYDAY=" + ",".join(DIAS_SEMANA[dia] for dia in sorted(set(dias_semana))))
+    if ate is not None:
+        partes.append(f"UNTIL={ate.strftime('%Y%m%d')}")
+    if contagem is not None:
+        partes.append(f"COUNT={contagem}")
+    if excecoes:
+        partes.append("EXDATE=" + ",".join(dia.strftime('%Y%m%d') for dia in sorted(set(excecoes))))
+    return ";".join(partes)
+
+
+def pular_ocorrencia(texto, dia):
+    """Regra com `dia` acrescentado às exceções (EXDATE)."""
+    regra = interpretar_regra(texto)
+    return montar_regra(
+        regra.frequencia, regra.intervalo, regra.dias_semana, regra.ate, regra.contagem, regra.excecoes | {dia}
+    )
+
+
+# =================================================================
+# === EXPANSÃO PREGUIÇOSA (GERADOR) ===
+# =================================================================
+
+def _periodo_inicial(inicio, regra, a_partir):
+    """(período, ocorrências anteriores a ele) do primeiro período que pode alcançar `a_partir`."""
+    dias = (a_partir.date() - inicio.date()).days
+    if dias <= 0:
+        return 0, 0
+    if regra.frequencia == 'DAILY':
+        periodo = dias // regra.intervalo
+        return periodo, periodo
+    if regra.frequencia == 'WEEKLY':
+        dias_semana = regra.dias_semana or (inicio.weekday(),)
+        periodo = (dias + inicio.weekday()) // (7 * regra.intervalo)
+        if periodo == 0:
+            return 0, 0
+        primeira_semana = sum(1 for dia in dias_semana if dia >= inicio.weekday())
+        return periodo, primeira_semana + (periodo - 1) * len(dias_semana)
+    # MONTHLY: meses sem o dia (ex.: 31) não geram ocorrência, então COUNT exige contar desde o início
+    if regra.contagem is not None:
+        return 0, 0
+    meses = (a_partir.year - inicio.year) * 12 + a_partir.month - inicio.month
+    return max(0, meses // regra.intervalo), 0
+
+
+def _candidatos(inicio, regra, periodo):
+    if regra.frequencia == 'DAILY':
+        return [inicio + timedelta(days=periodo * regra.intervalo)]
+    if regra.frequencia == 'WEEKLY':
+        segunda = inicio - timedelta(days=inicio.weekday()) + timedelta(weeks=periodo * regra.intervalo)
+        return [segunda + timedelta(days=dia) for dia in (regra.dias_semana or (inicio.weekday(),))]
+    meses = inicio.month - 1 + periodo * regra.intervalo
+    ano, mes = inicio.year + meses // 12, meses % 12 + 1
+    if inicio.day > calendar.monthrange(ano, mes)[1]:
+        return []
+    return [inicio.replace(year=ano, month=mes)]
+
+
+def _como_datetime(momento):
+    """datetime puro (Timestamp do pandas ou date viram datetime), sem importar o pandas."""
+    if hasattr(momento, 'to_pydatetime'):
+        return momento.to_pydatetime()
+    if not isinstance(momento, datetime) and isinstance(momento, date):
+        return datetime.combine(momento, time())
+    return momento
+
+
+def ocorrencias(inicio, regra, a_partir=None):
+    """Gera as datas/horas da série em ordem, a partir de `a_partir`, sem materializar a série.
+
+    Pula direto para o período de `a_partir` (sem percorrer a série desde o
+    início); exceções (EXDATE) contam para COUNT, como no iCalendar. Séries
+    sem UNTIL/COUNT são infinitas: o chamador decide onde parar.
+    """
+    inicio = _como_datetime(inicio)
+    a_partir = max(inicio, _como_datetime(a_partir)) if a_partir is not None else inicio
+    periodo, emitidas = _periodo_inicial(inicio, regra, a_partir)
+    while True:
+        for momento in _candidatos(inicio, regra, periodo):
+            if momento < inicio:
+                continue
+            if regra.ate is not None and momento.date() > regra.ate:
+                return
+            if regra.contagem is not None:
+                if emitidas >= regra.contagem:
+                    return
+                emitidas += 1
+            if momento >= a_partir and momento.date() not in regra.excecoes:
+                yield momento
+        periodo += 1
@@ -0,0 +1,160 @@
+import math
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from recorrencia import interpretar_regra, ocorrencias, regra_valida
+
+# --- ESQUEMA DOS REGISTROS BRUTOS (get_all_records) ---
+
+# Datas/horas chegam como número serial do Sheets (UNFORMATTED_VALUE) ou como texto
+EPOCA_SHEETS = datetime(1899, 12, 30)
+# Seriais plausíveis (evita estouro do datetime64 com números que não são datas)
+SERIAL_MAXIMO = 100000
+FORMATOS_DATA = ['%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S']
+FORMATOS_HORA = ['%H:%M', '%H:%M:%S']
+
+# Evento tipado sem pandas (agente enxuto): tupla compacta, já ordenável por (data/hora, posição).
+# posicao: linha na planilha; ocorrências de séries vêm depois dos eventos armazenados no mesmo horário.
+EventoLeve = namedtuple('EventoLeve', [
+    'data_hora_ordenacao', 'posicao', 'id_evento', 'titulo', 'descricao', 'data_evento', 'hora_evento',
+    'local', 'status', 'recorrencia', 'ocorrencia'
+])
+
+# Resultado da carga leve: eventos válidos e registros rejeitados (com o campo 'motivo')
+CargaLeve = namedtuple('CargaLeve', ['eventos', 'rejeitados'])
+
+
+# =================================================================
+# === CONVERSÃO (MESMAS REGRAS DE eventos.carregar_dataframe) ===
+# =================================================================
+
+def _numero(valor):
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    try:
+        return float(str(valor).strip())
+    except ValueError:
+        return None
+
+
+def _texto(valor):
+    # None vira NaN, como nas colunas de texto do DataFrame: hash do histórico e mensagem iguais aos do modo completo
+    return math.nan if valor is None else valor
+
+
+def converter_data(valor):
+    """Data (datetime à meia-noite) de um serial do Sheets ou texto nos FORMATOS_DATA; None se inválida."""
+    if valor is None:
+        return None
+    numero = _numero(valor)
+    if numero is not None and 0 < numero < SERIAL_MAXIMO:
+        return EPOCA_SHEETS + timedelta(days=math.floor(numero))
+    texto = str(valor).strip()
+    if len(texto) == 10 and texto[4] == '-' and texto[7] == '-':
+        # Atalho para o ISO (o caso comum): strptime é lento para dezenas de milhares de linhas
+        try:
+            return datetime.fromisoformat(texto)
+        except ValueError:
+            pass
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).replace(hour=0, minute=0, second=0)
+        except ValueError:
+            continue
+    return None
+
+
+def converter_hora(valor):
+    """Hora (timedelta) de uma fração de dia do Sheets ou texto nos FORMATOS_HORA. Vazio = 00:00; None se inválida."""
+    if valor is None or str(valor).strip() == '':
+        return timedelta(0)
+    numero = _numero(valor)
+    if numero is not None and numero >= 0:
+        return timedelta(seconds=round((numero % 1) * 86400))
+    texto = str(valor).strip()
+    if len(texto) == 5 and texto[2] == ':' and texto[:2].isdigit() and texto[3:].isdigit():
+        horas, minutos = int(texto[:2]), int(texto[3:])
+        if horas < 24 and minutos < 60:
+            return timedelta(hours=horas, minutes=minutos)
+    for formato in FORMATOS_HORA:
+        try:
+            momento = datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+        return timedelta(hours=momento.hour, minutes=momento.minute, seconds=momento.second)
+    return None
+
+
+def carregar_registros_leves(registros):
+    """Registros brutos (get_all_records) -> CargaLeve, com a validação de eventos.carregar_dataframe.
+
+    Nada de DataFrame: cada linha válida vira um EventoLeve (tupla); séries
+    recorrentes continuam uma linha só, com a regra em 'recorrencia'.
+    """
+    if not registros or 'data_evento' not in registros[0] or 'hora_evento' not in registros[0]:
+        return CargaLeve([], [])
+
+    eventos, rejeitados = [], []
+    for posicao, registro in enumerate(registros):
+        data = converter_data(registro.get('data_evento'))
+        hora = converter_hora(registro.get('hora_evento'))
+        recorrencia = registro.get('recorrencia')
+        com_regra = recorrencia is not None and str(recorrencia).strip() != ''
+        if data is None or hora is None or (com_regra and regra_valida(str(recorrencia)) is not None):
+            motivo = 'data inválida' if data is None else ('hora inválida' if hora is None else 'recorrência inválida')
+            rejeitados.append({**registro, 'motivo': motivo})
+            continue
+        minutos = int(hora.total_seconds() // 60) % (24 * 60)
+        status = registro.get('status')
+        eventos.append(EventoLeve(
+            data + hora, posicao, _texto(registro.get('id_evento')), _texto(registro.get('titulo')),
+            _texto(registro.get('descricao')), data, f"{minutos // 60:02d}:{minutos % 60:02d}", _texto(registro.get('local')),
+            '' if status is None else str(status), recorrencia if com_regra else None, False
+        ))
+    return CargaLeve(eventos, rejeitados)
+
+
+# =================================================================
+# === CONSULTAS (MESMO RESULTADO DE IndiceEventos) ===
+# =================================================================
+
+def _ocorrencias_leves(mestre, inicio, fim, posicao):
+    """Ocorrências (EventoLeve) da série `mestre` com data/hora em [inicio, fim)."""
+    regra = interpretar_regra(mestre.recorrencia)
+    if mestre.data_hora_ordenacao >= fim or (regra.ate is not None and regra.ate < inicio.date()):
+        return
+    for momento in ocorrencias(mestre.data_hora_ordenacao, regra, inicio):
+        if momento >= fim:
+            return
+        yield mestre._replace(
+            data_hora_ordenacao=momento, posicao=posicao,
+            data_evento=momento.replace(hour=0, minute=0, second=0, microsecond=0),
+            hora_evento=momento.strftime('%H:%M'), ocorrencia=True
+        )
+
+
+def entre_leve(eventos, inicio, fim, status='Pendente'):
+    """Eventos do status com data/hora em [inicio, fim), do mais próximo ao mais distante (séries expandidas)."""
+    selecionados, mestres = [], []
+    for evento in eventos:
+        if evento.status != status:
+            continue
+        if evento.recorrencia is not None:
+            mestres.append(evento)
+        elif inicio <= evento.data_hora_ordenacao < fim:
+            selecionados.append(evento)
+    # Empates: eventos armazenados primeiro, depois as ocorrências na ordem das séries (início, linha)
+    apos_armazenados = eventos[-1].posicao + 1 if eventos else 0
+    for ordem, mestre in enumerate(sorted(mestres)):
+        selecionados.extend(_ocorrencias_leves(mestre, inicio, fim, apos_armazenados + ordem))
+    selecionados.sort()
+    return selecionados
+
+
+def chave_evento(evento):
+    """Chave do histórico: id_evento, ou 'id_evento@AAAA-MM-DDTHH:MM' para uma ocorrência (como chaves_ocorrencia)."""
+    if evento.ocorrencia:
+        return f"{evento.id_evento}@{evento.data_hora_ordenacao.strftime('%Y-%m-%dT%H:%M')}"
+    return str(evento.id_evento)
@@ -0,0 +1,66 @@
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+
+# --- CONFIGURAÇÕES DO SNAPSHOT LOCAL ---
+
+# Última carga bem-sucedida em Parquet (colunar, lido com memory map na partida)
+SNAPSHOT_CAMINHO_PADRAO = "agenda_snapshot.parquet"
+
+# Chave dos metadados do Parquet que guarda a marca d'água da sincronização
+CHAVE_METADADOS = b"agenda_snapshot"
+
+# df: eventos já tipados; assinatura: marca d'água (store.assinatura() da carga); salvo_em: ISO 8601
+Snapshot = namedtuple('Snapshot', ['df', 'assinatura', 'salvo_em'])
+
+
+def caminho_snapshot(config=None):
+    """Caminho do snapshot: config['snapshot_path'] > AGENDA_SNAPSHOT_PATH > padrão. Vazio desativa."""
+    config = config or {}
+    if 'snapshot_path' in config:
+        caminho = config['snapshot_path']
+    else:
+        caminho = os.getenv("AGENDA_SNAPSHOT_PATH", SNAPSHOT_CAMINHO_PADRAO)
+    return caminho or None
+
+
+def modo_offline(config=None):
+    """Modo offline explícito: config['offline'] > AGENDA_OFFLINE (1/true/sim)."""
+    config = config or {}
+    valor = config['offline'] if 'offline' in config else os.getenv("AGENDA_OFFLINE", "")
+    return str(valor).strip().lower() in ("1", "true", "sim", "yes")
+
+
+def salvar_snapshot(df, assinatura, caminho):
+    """Grava o DataFrame em Parquet com a marca d'água nos metadados (escrita atômica)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados[CHAVE_METADADOS] = json.dumps({
+        'assinatura': assinatura,
+        'salvo_em': datetime.now().isoformat(timespec='seconds')
+    }).encode()
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    # Grava em arquivo temporário e troca: um leitor nunca vê o arquivo pela metade
+    temporario = f"{caminho}.tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, caminho)
+
+
+def carregar_snapshot(caminho):
+    """Lê o snapshot local. Retorna None se não existir ou estiver ilegível."""
+    if not caminho or not os.path.exists(caminho):
+        return None
+    try:
+        import pyarrow.parquet as pq
+
+        tabela = pq.read_table(caminho, memory_map=True)
+        metadados = json.loads((tabela.schema.metadata or {}).get(CHAVE_METADADOS, b"{}"))
+        return Snapshot(tabela.to_pandas(), metadados.get('assinatura'), metadados.get('salvo_em'))
+    except Exception as e:
+        print(f"⚠️ Snapshot local ignorado ({caminho}): {e}")
+        return None
@@ -0,0 +1,64 @@
+import asyncio
+import time
+from collections import defaultdict, namedtuple
+
+from telegram.error import BadRequest, RetryAfter
+
+from entrega_telegram import LIMITE_MENSAGEM
+
+# --- DUBLÊ LOCAL DA API DO TELEGRAM (TESTES E BENCHMARKS SEM REDE) ---
+
+MensagemEnviada = namedtuple('MensagemEnviada', ['chat_id', 'texto', 'enviada_em'])
+
+
+class BotFalso:
+    """Substituto do telegram.Bot: mesma interface usada pelo EntregadorTelegram.
+
+    Simula a latência de cada chamada e os limites do servidor: mais de
+    `limite_por_chat` mensagens por segundo no mesmo chat (ou `limite_global`
+    no total) geram RetryAfter, como o 429 da API real. Textos acima de
+    LIMITE_MENSAGEM geram BadRequest.
+    """
+
+    def __init__(self, latencia=0.0, limite_por_chat=None, limite_global=None, retry_after=1):
+        self.latencia = latencia
+        self.limite_por_chat = limite_por_chat
+        self.limite_global = limite_global
+        self.retry_after = retry_after
+        self.mensagens = []
+        self.recusadas = 0
+        self.inicializado = False
+        self._envios_chat = defaultdict(list)
+        self._envios = []
+
+    async def initialize(self):
+        self.inicializado = True
+
+    async def shutdown(self):
+        self.inicializado = False
+
+    def _excede(self, envios, limite, agora):
+        # Janela deslizante de 1 segundo
+        while envios and agora - envios[0] >= 1:
+            envios.pop(0)
+        return limite is not None and len(envios) >= limite
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        if len(text) > LIMITE_MENSAGEM:
+            raise BadRequest("Message is too long")
+
+        agora = time.monotonic()
+        envios_chat = self._envios_chat[chat_id]
+        if self._excede(envios_chat, self.limite_por_chat, agora) or self._excede(self._envios, self.limite_global, agora):
+            self.recusadas += 1
+            raise RetryAfter(self.retry_after)
+
+        envios_chat.append(agora)
+        self._envios.append(agora)
+        self.mensagens.append(MensagemEnviada(chat_id, text, agora))
+        return {'chat_id': chat_id, 'message_id': len(self.mensagens)}
+
+    def mensagens_do_chat(self, chat_id):
+        return [mensagem.texto for mensagem in self.mensagens if mensagem.chat_id == chat_id]